@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Association analysis
+Qlik associates tables on every field name they share, while a universe only
+joins them on its join columns. Loading the tables as they are therefore
+creates synthetic keys (tables sharing several fields) and circular
+references (association loops) the universe never had.
+
+This pass builds a field-to-table index of the tables with known columns,
+reports the synthetic keys and loops of that naive model, and plans how each
+table is loaded so only the intended join fields associate: the columns of
+single-column joins share one field name (renamed with AS when they differ),
+multi-column joins get a composite key field, joins that would close a loop
+are left out, and every other shared column is qualified as Table.column
+(the name QUALIFY gives it). Each step is a linear pass over the columns or
+the joins with a union-find, so universes with thousands of tables are
+analysed in near-linear time.
+"""
+
+from join_analysis import join_pairs
+
+class _DisjointSets:
+    """Union-find over hashable nodes (path halving, union by size)"""
+
+    def __init__(self):
+        self.parents = {}
+        self.sizes = {}
+
+    def find(self, node):
+        parents = self.parents
+        if node not in parents:
+            parents[node] = node
+            self.sizes[node] = 1
+            return node
+        while parents[node] != node:
+            parents[node] = parents[parents[node]]
+            node = parents[node]
+        return node
+
+    def union(self, left, right):
+        """Merges the sets of two nodes; False if they were already in the same set"""
+        left, right = self.find(left), self.find(right)
+        if left == right:
+            return False
+        if self.sizes[left] < self.sizes[right]:
+            left, right = right, left
+        self.parents[right] = left
+        self.sizes[left] += self.sizes[right]
+        return True
+
+def field_index(tables, table_columns):
+    """{field name: [tables loading it]} of the tables with known columns, in table order"""
+    index = {}
+    for table in tables:
+        for name, _ in table_columns.get(table, ()):
+            tables_of_field = index.setdefault(name, [])
+            if not tables_of_field or tables_of_field[-1] != table:
+                tables_of_field.append(table)
+    return index
+
+def synthetic_keys(tables, table_columns, index=None):
+    """[(tables, fields)] of the synthetic keys Qlik would build: each set of tables sharing two fields or more
+
+    Tables are grouped by the pairs of shared fields they hold, so the cost is
+    linear in the tables and quadratic only in the shared columns of one table.
+    """
+    index = field_index(tables, table_columns) if index is None else index
+    pairs = {}
+    for table in tables:
+        shared = sorted({name for name, _ in table_columns.get(table, ()) if len(index[name]) > 1})
+        for position, field in enumerate(shared):
+            for other in shared[position + 1:]:
+                pairs.setdefault((field, other), []).append(table)
+    keys = {}
+    for pair, tables_of_pair in pairs.items():
+        if len(tables_of_pair) > 1:
+            keys.setdefault(tuple(tables_of_pair), set()).update(pair)
+    return [(key_tables, tuple(sorted(fields))) for key_tables, fields in keys.items()]
+
+def association_loops(tables, table_columns, index=None):
+    """[(table, field)] associations closing a circular reference, in table then column order
+
+    Tables and shared fields are the nodes of a graph whose edges are the fields
+    each table loads: an edge joining two nodes already connected closes a loop.
+    """
+    index = field_index(tables, table_columns) if index is None else index
+    components = _DisjointSets()
+    loops = []
+    for table in tables:
+        seen = set()
+        for name, _ in table_columns.get(table, ()):
+            if len(index[name]) > 1 and name not in seen:
+                seen.add(name)
+                if not components.union(('table', table), ('field', name)):
+                    loops.append((table, name))
+    return loops
+
+def composite_key_name(table, other):
+    return f"%Key_{table}_{other}"
+
+def plan_associations(tables, table_columns, joins, shared_fields=None):
+    """Association plan of the tables with known columns
+
+    Returns {'index': field index, 'synthetic_keys': synthetic keys and 'loops': loops
+    of the tables loaded as they are, 'aliases': {table: {column: loaded field name}},
+    'keys': {table: [(composite key field, [columns])]}, 'fields': {table: {associated
+    field: column}}, 'broken_joins': [joins left out because they would close a loop]}. Joins on tables or columns that are not
+    known are ignored. shared_fields ({field: [tables]}) are associated before the joins
+    (the link key of fact_model).
+    """
+    index = field_index(tables, table_columns)
+    known = {table: {name for name, _ in table_columns.get(table, ())} for table in tables}
+    components = _DisjointSets()
+    members = {}  # (table, column) -> shared field name
+    table_fields = {}  # table -> {shared field name: column}
+    keys = {}
+    broken_joins = []
+
+    def connect(field, sides):
+        """Adds the (table, column) sides to a field unless it closes a loop"""
+        new = [(table, column) for table, column in sides if (table, column) not in members]
+        roots = [components.find(('field', field))] + [components.find(('table', table)) for table, _ in new]
+        if len(set(roots)) < len(roots):
+            return False
+        for table, column in new:
+            components.union(('field', field), ('table', table))
+            members[(table, column)] = field
+            table_fields.setdefault(table, {})[field] = column
+        return True
+
+    def can_share(field, table, column):
+        """True if the column of table can be loaded as field without clashing with another one"""
+        owner = table_fields.get(table, {}).get(field)
+        if owner is not None:
+            return owner == column
+        return field == column or field not in known[table]
+
+    for field, field_tables in (shared_fields or {}).items():
+        connect(field, [(table, field) for table in field_tables if field in known.get(table, ())])
+    for expression in joins:
+        pairs = join_pairs(expression)
+        sides = {table for pair in pairs for table, _ in pair}
+        if len(sides) != 2 or any(left[0] == right[0] for left, right in pairs) or not sides <= known.keys() or \
+                any(column not in known[table] for pair in pairs for table, column in pair):
+            continue
+        if len(pairs) == 1:
+            left, right = pairs[0]
+            field = members.get(left) or members.get(right) or left[1]
+            if all(can_share(field, table, column) for table, column in (left, right)) and \
+                    members.get(left, field) == field and members.get(right, field) == field:
+                if not connect(field, (left, right)):
+                    broken_joins.append(expression)
+                continue
+        # Several columns (or columns already shared under other names): composite key
+        (table, _), (other, _) = pairs[0]
+        name = composite_key_name(table, other)
+        if components.find(('table', table)) == components.find(('table', other)):
+            broken_joins.append(expression)
+            continue
+        components.union(('table', table), ('field', name))
+        components.union(('table', other), ('field', name))
+        for side in (table, other):
+            columns = [column for pair in pairs for pair_table, column in pair if pair_table == side]
+            keys.setdefault(side, []).append((name, columns))
+
+    shared = set(members.values())
+    owners = {}
+    aliases = {}
+    for table in tables:
+        for column, _ in table_columns.get(table, ()):
+            field = members.get((table, column))
+            if field is not None:
+                if field != column:
+                    aliases.setdefault(table, {})[column] = field
+            elif column in shared or (len(index[column]) > 1 and owners.setdefault(column, table) != table):
+                aliases.setdefault(table, {})[column] = f"{table}.{column}"
+    return {
+        'index': index,
+        'synthetic_keys': synthetic_keys(tables, table_columns, index),
+        'loops': association_loops(tables, table_columns, index),
+        'aliases': aliases,
+        'keys': keys,
+        'fields': table_fields,
+        'broken_joins': broken_joins
+    }
+
+def format_associations(plan, limit=20):
+    """Script comment lines describing the synthetic keys and loops found and how they are resolved"""
+    lines = []
+
+    def listed(title, items):
+        if not items:
+            return
+        lines.append(f"// {title}: {len(items)}")
+        for item in items[:limit]:
+            lines.append(f"//   {item}")
+        if len(items) > limit:
+            lines.append(f"//   ... and {len(items) - limit} more")
+
+    listed("Synthetic keys found", [f"{', '.join(tables)} on {', '.join(fields)}"
+                                    for tables, fields in plan['synthetic_keys']])
+    listed("Circular references found", [f"{table}.{field}" for table, field in plan['loops']])
+    composite = {}
+    for table, table_keys in plan['keys'].items():
+        for name, _ in table_keys:
+            composite.setdefault(name, []).append(table)
+    listed("Composite keys", [f"{name}: {', '.join(tables)}" for name, tables in composite.items()])
+    listed("Joins left out to avoid a loop", plan['broken_joins'])
+    aliases = [(table, column, field) for table, table_aliases in plan['aliases'].items()
+               for column, field in table_aliases.items()]
+    listed("Renamed join fields", [f"{table}.{column} AS {field}" for table, column, field in aliases
+                                   if field != f"{table}.{column}"])
+    listed("Qualified fields", [field for table, column, field in aliases if field == f"{table}.{column}"])
+    return lines
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Asyncio batch conversion pipeline (universal_converter.py --batch DIR --pipeline)
+Universes flow through read, decompress, parse, generate and write stages
+connected by bounded queues: parsing universe N+1 overlaps with generating and
+writing universe N, and a full queue suspends the stages upstream of it, which
+caps how many universes are in memory at once.
+
+Reading, decompressing (zlib releases the GIL) and writing run in threads.
+Parsing is CPU-bound Python, so with several workers it runs in a process pool
+with up to `workers` universes in flight (a single worker parses in a thread);
+generation stays in this process, next to the writer.
+"""
+
+import asyncio
+import contextlib
+import io
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from parse_cache import ParseCache
+from script_writer import write_script
+from thread_output import captured, install, last_error, uninstall
+from universal_converter import UniversalBO2QlikConverter, detect_file_type
+from unv_reader import UniverseArchiveReader
+
+STAGES = ('read', 'decompress', 'parse', 'generate', 'write')
+DEFAULT_DEPTH = 2  # Universes waiting between two stages
+CHUNK_BATCH_SIZE = 256 * 1024  # Script text handed from generate to write at once
+CHUNK_QUEUE_SIZE = 8  # Batches waiting to be written (generate blocks beyond)
+
+class PipelineJob:
+    __slots__ = ('file_path', 'output_name', 'start', 'data', 'members', 'cache_key', 'converter', 'chunks',
+                 'generated', 'error', 'log')
+
+    def __init__(self, file_path, output_name):
+        self.file_path = file_path
+        self.output_name = output_name
+        self.start = None
+        self.data = None  # Raw universe bytes, until decompressed
+        self.members = None  # Decompressed members, until parsed (None on a cache hit)
+        self.cache_key = None
+        self.converter = None
+        self.chunks = None  # Bounded queue between the generate and write stages
+        self.generated = None  # Task of the generate stage
+        self.error = None
+        self.log = []
+
+    def result(self):
+        """Result record, in the format of convert_universe"""
+        converter = self.converter
+        return {
+            'file': self.file_path,
+            'success': self.error is None,
+            'seconds': time.perf_counter() - self.start,
+            'tables': len(converter.model.tables) if converter else 0,
+            'joins': len(converter.model.joins) if converter else 0,
+            'objects': len(converter.model.objects) if converter else 0,
+            'output': self.output_name,
+            'error': self.error
+        }
+
+def parse_members(file_path, members, keywords_file=None):
+    """Parses decompressed universe members; returns the UniverseModel, None on failure"""
+    converter = UniversalBO2QlikConverter()
+    converter.file_path = file_path
+    converter.file_type = detect_file_type(file_path)
+    converter.keywords_file = keywords_file
+    converter.archive = UniverseArchiveReader.from_members(members, file_path)
+    if converter.file_type == 'unx':
+        parsed = converter.parse_unx_file()
+    else:
+        parsed = converter.parse_unv_file()
+    return converter.model if parsed else None
+
+def _parse_in_worker(file_path, members, keywords_file):
+    """parse_members in a worker process; returns (model, output)"""
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        model = parse_members(file_path, members, keywords_file)
+    return model, log.getvalue()
+
+class ConversionPipeline:
+    def __init__(self, workers=None, depth=DEFAULT_DEPTH, cache_dir=None, keywords_file=None, on_result=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.depth = depth
+        self.cache = ParseCache(cache_dir) if cache_dir else None
+        self.keywords_file = keywords_file
+        self.on_result = on_result  # Called with each result record as soon as it is known
+        self.results = []
+        # Busy time of each stage (summed over parallel parses), to see which one bounds the throughput
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+        self._executor = None
+
+    # Stage work (threads, except parse)
+
+    def read(self, job):
+        job.start = time.perf_counter()
+        with open(job.file_path, 'rb') as f:
+            job.data = f.read()
+        return True
+
+    def decompress(self, job):
+        converter = UniversalBO2QlikConverter()
+        converter.file_path = job.file_path
+        converter.file_type = detect_file_type(job.file_path)
+        converter.output_name = job.output_name
+        converter.keywords_file = self.keywords_file
+        converter.cache = self.cache
+        job.converter = converter
+        converter.archive = UniverseArchiveReader(io.BytesIO(job.data))
+        job.data = None
+        try:
+            # A cached model skips decompression and parsing
+            if not converter.load_cached_model():
+                job.cache_key = converter.cache_key() if self.cache else None
+                job.members = converter.archive.preload()
+        finally:
+            converter.cleanup()
+        return True
+
+    async def parse(self, job):
+        if job.members is None:
+            return True
+        members, job.members = job.members, None
+        if self._executor is None:
+            # A single parser: a thread avoids pickling the members and the model
+            model, log = await asyncio.to_thread(captured, parse_members, job.file_path, members, self.keywords_file)
+        else:
+            loop = asyncio.get_running_loop()
+            model, log = await loop.run_in_executor(self._executor, _parse_in_worker, job.file_path, members,
+                                                    self.keywords_file)
+        job.log.append(log)
+        if model is None:
+            return False
+        job.converter.model = model
+        if job.cache_key:
+            await asyncio.to_thread(self.cache.put, job.cache_key, model.to_lists())
+        return True
+
+    def generate(self, job):
+        """Puts the script into job.chunks in batches, then None (an exception on failure)"""
+        try:
+            batch = []
+            size = 0
+            for chunk in job.converter.iter_qlik_script():
+                batch.append(chunk)
+                size += len(chunk)
+                if size >= CHUNK_BATCH_SIZE:
+                    job.chunks.put(''.join(batch))
+                    batch = []
+                    size = 0
+            if batch:
+                job.chunks.put(''.join(batch))
+            job.chunks.put(None)
+        except Exception as e:
+            job.chunks.put(e)
+            raise
+        return True
+
+    def write(self, job):
+        try:
+            write_script(job.converter.output_path(), _drain(job.chunks))
+        except BaseException:
+            # Unblock a generate thread still waiting for room in the queue
+            for _ in _drain(job.chunks):
+                pass
+            raise
+        return True
+
+    # Stages
+
+    async def _run(self, stage, job):
+        """Runs the work of a stage (in a thread unless it is a coroutine); records the failure of the job"""
+        start = time.perf_counter()
+        work = getattr(self, stage)
+        try:
+            if asyncio.iscoroutinefunction(work):
+                success = await work(job)
+            else:
+                success, log = await asyncio.to_thread(captured, work, job)
+                job.log.append(log)
+            if not success:
+                job.error = job.error or f"❌ {last_error(''.join(job.log))}"
+        except Exception as e:
+            # A failed generation also fails the write: keep the first error
+            job.error = job.error or f"❌ Error during {stage}: {e}"
+        self.stage_seconds[stage] += time.perf_counter() - start
+        return job.error is None
+
+    def _finish(self, job):
+        result = job.result()
+        self.results.append(result)
+        if self.on_result:
+            self.on_result(result)
+
+    async def _forward(self, stage, job, outbox):
+        if await self._run(stage, job):
+            await outbox.put(job)
+        else:
+            self._finish(job)
+
+    async def _stage(self, stage, inbox, outbox, concurrency=1):
+        """Takes jobs from inbox, up to concurrency at a time, and passes the successful ones on"""
+        pending = set()
+        while True:
+            job = await inbox.get()
+            if job is None:
+                break
+            if len(pending) >= concurrency:
+                _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            pending.add(asyncio.ensure_future(self._forward(stage, job, outbox)))
+        if pending:
+            await asyncio.gather(*pending)
+        await outbox.put(None)
+
+    async def _generate_stage(self, inbox, outbox):
+        # The write stage starts on a job as soon as its generation starts
+        while True:
+            job = await inbox.get()
+            if job is None:
+                await outbox.put(None)
+                return
+            job.chunks = queue.Queue(CHUNK_QUEUE_SIZE)
+            job.generated = asyncio.ensure_future(self._run('generate', job))
+            await outbox.put(job)
+            await job.generated
+
+    async def _write_stage(self, inbox):
+        while True:
+            job = await inbox.get()
+            if job is None:
+                return
+            await self._run('write', job)
+            await job.generated
+            self._finish(job)
+
+    async def run(self, universes):
+        """Converts (file path, output name) pairs; returns the result records"""
+        queues = [asyncio.Queue(self.depth) for _ in STAGES]
+        install()
+        self._executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            tasks = [
+                asyncio.ensure_future(self._stage('read', queues[0], queues[1])),
+                asyncio.ensure_future(self._stage('decompress', queues[1], queues[2])),
+                asyncio.ensure_future(self._stage('parse', queues[2], queues[3], self.workers)),
+                asyncio.ensure_future(self._generate_stage(queues[3], queues[4])),
+                asyncio.ensure_future(self._write_stage(queues[4]))
+            ]
+            for file_path, output_name in universes:
+                await queues[0].put(PipelineJob(file_path, output_name))
+            await queues[0].put(None)
+            await asyncio.gather(*tasks)
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            uninstall()
+        return self.results
+
+def _drain(chunks):
+    """Iterates a chunk queue up to its None sentinel, raising a queued exception"""
+    while True:
+        chunk = chunks.get()
+        if chunk is None:
+            return
+        if isinstance(chunk, BaseException):
+            raise chunk
+        yield chunk
+
+def run_pipeline(universes, workers=None, depth=DEFAULT_DEPTH, cache_dir=None, keywords_file=None, on_result=None):
+    """Converts (file path, output name) pairs through the pipeline; returns (results, stage seconds)"""
+    pipeline = ConversionPipeline(workers, depth, cache_dir, keywords_file, on_result)
+    results = asyncio.run(pipeline.run(universes))
+    return results, pipeline.stage_seconds
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the keyword field classifier
+Compares the historical any(keyword in field.lower()) loop of categorize_fields
+with the compiled KeywordClassifier on synthetic field names (1M by default)
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from field_classifier import KeywordClassifier
+from universal_converter import DEFAULT_KEYWORDS
+
+PARTS = ['Shop', 'Article', 'Sales', 'Week', 'Promotion', 'Store', 'Color', 'Family', 'Margin', 'Amount',
+         'Quantity', 'Label', 'Country', 'Manager', 'Floor', 'Space', 'Holiday', 'Flag', 'Lines', 'Total']
+SUFFIXES = ['id', 'name', 'code', 'revenue', 'sold', 'price', 'cost', 'count', 'open', 'hours', 'desc']
+
+def build_fields(count, seed=42):
+    """Builds synthetic universe field names"""
+    rng = random.Random(seed)
+    return [f"{rng.choice(PARTS)}_{rng.choice(PARTS).lower()}_{rng.choice(SUFFIXES)}{i % 97}" for i in range(count)]
+
+def categorize_legacy(fields, keywords):
+    """Historical categorize_fields loop of the universal converter"""
+    dimensions = []
+    measures = []
+    for field in fields:
+        field_lower = field.lower()
+        is_dimension = any(keyword in field_lower for keyword in keywords['dimension'])
+        is_measure = any(keyword in field_lower for keyword in keywords['measure'])
+        if is_dimension and not is_measure:
+            dimensions.append(field)
+        elif is_measure:
+            measures.append(field)
+        else:
+            dimensions.append(field)
+    return dimensions, measures
+
+def categorize_compiled(fields, classifier):
+    dimensions = []
+    measures = []
+    for field, measure in zip(fields, classifier.classify(fields, ('measure',))['measure']):
+        if measure:
+            measures.append(field)
+        else:
+            dimensions.append(field)
+    return dimensions, measures
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark categorize_fields")
+    parser.add_argument('--fields', type=int, default=1000000, help="Number of synthetic field names")
+    parser.add_argument('--skip-legacy', action='store_true', help="Only time the compiled classifier")
+    args = parser.parse_args()
+
+    print(f"Building {args.fields} synthetic field names...")
+    fields = build_fields(args.fields)
+
+    classifier, compile_time = timed(KeywordClassifier, DEFAULT_KEYWORDS)
+    new_result, new_time = timed(categorize_compiled, fields, classifier)
+    print(f"⚡ compiled classifier: {new_time:.2f}s (+{compile_time * 1000:.2f}ms compile, "
+          f"{len(new_result[0])} dimensions, {len(new_result[1])} measures)")
+
+    if args.skip_legacy:
+        return True
+    legacy_result, legacy_time = timed(categorize_legacy, fields, DEFAULT_KEYWORDS)
+    print(f"🐢 keyword loop:        {legacy_time:.2f}s ({len(legacy_result[0])} dimensions, {len(legacy_result[1])} measures)")
+    if legacy_result != new_result:
+        print("❌ Results differ between implementations")
+        return False
+    print(f"✅ Identical output, speedup x{legacy_time / new_time:.1f}")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark for memory-mapped member files
+Writes a synthetic extracted member (1 GB by default) and parses it with
+UNV2QlikConverter in fresh processes, once reading it into memory and once
+through mmap, reporting the peak RSS of each process above the interpreter
+baseline. Both modes must return the same result.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+NAMES = [b'Shop_facts', b'Calendar_year_lookup', b'Article_lookup', b'promotion_lookup', b'Outlet_Lookup',
+         b'Agg_yr_qt_rn_st_ln_ca_sr', b'Article_Color_Lookup', b'Calendar_Week_Table']
+# What each member is parsed with, and the member file name of an extracted universe
+MEMBERS = {
+    'tables': ('Tables', 'parse_tables_file'),
+    'columns': ('Columns', 'parse_columns_file')
+}
+
+def build_block(member, seed=42):
+    """Builds a block repeated to fill the member"""
+    rng = random.Random(seed)
+    chunks = []
+    for index in range(1024):
+        name = rng.choice(NAMES)
+        if member == 'columns':
+            chunks.append(b'%s_%d %s\n' % (name, index, rng.choice(NAMES)))
+        else:
+            # Binary member: names between runs of non-printable bytes, like Tables;
+            chunks.append(name + b'_%d' % index)
+            chunks.append(bytes(rng.randrange(0, 32) for _ in range(rng.randrange(512, 4096))))
+    return b''.join(chunks)
+
+def write_member(path, member, size):
+    block = build_block(member)
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            data = block[:size - written]
+            f.write(data)
+            written += len(data)
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_child(mode, member, directory):
+    """Parses the extracted member in directory; prints a JSON report"""
+    from unv2qlik_final import UNV2QlikConverter
+
+    os.chdir(directory)
+    baseline = peak_rss_mb()
+    converter = UNV2QlikConverter()
+    converter.memory_map = mode == 'mmap'
+    start = time.perf_counter()
+    result = getattr(converter, MEMBERS[member][1])()
+    seconds = time.perf_counter() - start
+    digest = hashlib.sha1('\n'.join(result).encode('utf-8')).hexdigest()
+    print(json.dumps({'baseline': baseline, 'peak': peak_rss_mb(), 'seconds': seconds, 'items': len(result),
+                      'digest': digest}))
+
+def measure(mode, member, directory):
+    output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, '--member', member,
+                             directory], check=True, capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark peak RSS of read() against mmap on an extracted member")
+    parser.add_argument('--size-mb', type=int, default=1024, help="Synthetic member size in MB")
+    parser.add_argument('--member', choices=sorted(MEMBERS), default='tables', help="Member to generate and parse")
+    parser.add_argument('--child', choices=('read', 'mmap'), help=argparse.SUPPRESS)
+    parser.add_argument('directory', nargs='?', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.member, args.directory)
+        return True
+
+    directory = tempfile.mkdtemp(prefix="bo2qlik_mmap_benchmark_")
+    try:
+        print(f"Writing a {args.size_mb} MB synthetic {MEMBERS[args.member][0]} member...")
+        write_member(os.path.join(directory, MEMBERS[args.member][0]), args.member, args.size_mb * 1024 * 1024)
+        reports = {}
+        for mode in ('read', 'mmap'):
+            report = measure(mode, args.member, directory)
+            reports[mode] = report
+            print(f"{'📖' if mode == 'read' else '🗺️ '} {mode:<5} peak RSS {report['peak']:8.1f} MB "
+                  f"(+{report['peak'] - report['baseline']:.1f} MB over the interpreter), "
+                  f"{report['seconds']:.2f}s, {report['items']} items")
+        if reports['read']['digest'] != reports['mmap']['digest']:
+            print("❌ read and mmap results differ")
+            return False
+        print(f"✅ Identical results, peak RSS x{reports['read']['peak'] / reports['mmap']['peak']:.1f} lower with mmap")
+        return True
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
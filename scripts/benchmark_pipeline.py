@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the asyncio batch pipeline
+Generates a batch of synthetic universes (half .unv, half .unx) and converts
+it twice in-process: sequentially, one universe after the other as
+run_conversion does, then through async_pipeline. Both runs must produce the
+same scripts.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from async_pipeline import DEFAULT_DEPTH, run_pipeline
+from universal_converter import batch_output_name, convert_universe, find_universe_files
+from universe_generator import generate_universe
+
+def generate_batch(data_dir, count, tables):
+    for index in range(count):
+        extension = 'unv' if index % 2 else 'unx'
+        generate_universe(os.path.join(data_dir, f"universe_{index:03d}.{extension}"), tables=tables, seed=index)
+    return find_universe_files(data_dir)
+
+def run_sequential(universes):
+    return [convert_universe(file_path, output_name) for file_path, output_name in universes]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def read_scripts(output_dir):
+    """Scripts of a run, without their generation date line"""
+    scripts = {}
+    for name in sorted(os.listdir(output_dir)):
+        with open(os.path.join(output_dir, name), 'r', encoding='utf-8') as f:
+            scripts[name] = [line for line in f if not line.startswith('// Generation date:')]
+    return scripts
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the asyncio pipeline against sequential conversions")
+    parser.add_argument('--universes', type=int, default=16, help="Universes in the batch")
+    parser.add_argument('--tables', type=int, default=2000, help="Tables per synthetic universe")
+    parser.add_argument('--workers', type=int, default=None, help="Pipeline parse workers (default: CPU count)")
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help="Pipeline queue depth")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="bo2qlik_pipeline_benchmark_")
+    original_cwd = os.getcwd()
+    try:
+        data_dir = os.path.join(root, 'data')
+        work_dir = os.path.join(root, 'work')
+        os.makedirs(data_dir)
+        os.makedirs(work_dir)
+        print(f"Generating {args.universes} universes of {args.tables} tables...")
+        files = generate_batch(data_dir, args.universes, args.tables)
+        universes = [(file_path, batch_output_name(file_path, data_dir)) for file_path in files]
+        # Converters write to ../output relative to the working directory
+        os.chdir(work_dir)
+        output_dir = os.path.join(root, 'output')
+
+        sequential, sequential_time = timed(run_sequential, universes)
+        sequential_scripts = read_scripts(output_dir)
+        shutil.rmtree(output_dir)
+        print(f"🐢 sequential: {sequential_time:.2f}s")
+
+        (pipelined, stage_seconds), pipeline_time = timed(run_pipeline, universes, args.workers, args.depth)
+        print(f"⚡ pipeline:   {pipeline_time:.2f}s ({args.workers or os.cpu_count()} parse workers, "
+              f"queue depth {args.depth})")
+        print("   stage busy time: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stage_seconds.items()))
+
+        if not all(result['success'] for result in sequential + pipelined):
+            print("❌ Some conversions failed")
+            return False
+        if read_scripts(output_dir) != sequential_scripts:
+            print("❌ Scripts differ between the sequential and pipelined runs")
+            return False
+        print(f"✅ Identical scripts, speedup x{sequential_time / pipeline_time:.2f}")
+        return True
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(root, ignore_errors=True)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the binary string extractor
+Compares the historical per-byte loop with the regex extractor on a synthetic
+Tables;/Joins;-like stream (100 MB by default)
+"""
+
+import argparse
+import random
+import sys
+import time
+
+from string_extractor import extract_strings, extract_strings_legacy
+
+NAMES = [b'Shop_facts', b'Calendar_year_lookup', b'Article_lookup', b'promotion_lookup',
+         b'Week_id', b'Article_id', b'Shop_id', b'Promotion_id', b'Agg_yr_qt_rn_st_ln_ca_sr']
+
+def build_stream(size, seed=42):
+    """Builds a synthetic binary member mixing names and binary padding"""
+    rng = random.Random(seed)
+    chunks = []
+    # A pre-built block is repeated to keep generation cheap for large sizes
+    for _ in range(4096):
+        chunks.append(rng.choice(NAMES))
+        chunks.append(bytes(rng.randrange(0, 32) for _ in range(rng.randrange(2, 24))))
+    block = b''.join(chunks)
+    repeat = size // len(block) + 1
+    return (block * repeat)[:size]
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark extract_strings")
+    parser.add_argument('--size-mb', type=int, default=100, help="Synthetic stream size in MB")
+    parser.add_argument('--skip-legacy', action='store_true', help="Only time the regex extractor")
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    print(f"Building a {args.size_mb} MB synthetic stream...")
+    data = build_stream(size)
+
+    new_result, new_time = timed(lambda d: extract_strings(memoryview(d)), data)
+    print(f"⚡ regex extractor: {new_time:.2f}s ({len(new_result)} strings, {args.size_mb / new_time:.1f} MB/s)")
+
+    if args.skip_legacy:
+        return True
+    legacy_result, legacy_time = timed(extract_strings_legacy, data)
+    print(f"🐢 per-byte loop:   {legacy_time:.2f}s ({len(legacy_result)} strings, {args.size_mb / legacy_time:.1f} MB/s)")
+    if legacy_result != new_result:
+        print("❌ Results differ between implementations")
+        return False
+    print(f"✅ Identical output, speedup x{legacy_time / new_time:.1f}")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
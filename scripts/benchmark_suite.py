@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Performance benchmark suite
+Generates universes of 1 MB, PERFORMANCE_CONFIG['large_file_size'] MB and ten
+times that size with create_test_unv/create_test_unx, runs every converter
+entry point on them in a fresh process, enforces the PERFORMANCE_CONFIG
+limits and compares the results with a JSON baseline
+
+Limits are enforced up to the large file size; bigger stress sizes are only
+compared with the baseline.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from create_test_unv import create_sized_unv
+from create_test_unx import create_sized_unx
+from test_config import PERFORMANCE_CONFIG
+
+DEFAULT_BASELINE = '../benchmarks/baseline.json'
+DEFAULT_TOLERANCE = 0.5  # Allowed relative regression over the baseline
+MIN_REGRESSION_SECONDS = 0.5  # Timing noise below this is never a regression
+MB = 1024 * 1024
+
+def run_unv2qlik(universe_path):
+    import unv2qlik_final
+    output_path = '../output/qlik_script_final.qvs'
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    # UNV2QlikConverter picks the first universe of ../data
+    unv2qlik_final.main()
+    return os.path.exists(output_path)
+
+def run_unx2qlik_converter(universe_path):
+    from unx2qlik_converter import UNX2QlikConverter
+    return UNX2QlikConverter(universe_path).run_conversion()
+
+def run_universal(universe_path):
+    from universal_converter import UniversalBO2QlikConverter, detect_file_type
+    converter = UniversalBO2QlikConverter()
+    converter.file_path = universe_path
+    converter.file_type = detect_file_type(universe_path)
+    converter.output_name = f"benchmark_{converter.file_type}.qvs"
+    return converter.run_conversion()
+
+def run_unx2qlik_parser(universe_path):
+    from unx2qlik import UNX2QlikParser
+    parser = UNX2QlikParser(universe_path)
+    try:
+        parser.extract_unx()
+        parser.parse_datafoundation()
+        parser.parse_businesslayer()
+        return bool(parser.tables)
+    finally:
+        parser.cleanup()
+
+# name -> (universe type, runner)
+ENTRY_POINTS = {
+    'UNV2QlikConverter': ('unv', run_unv2qlik),
+    'UNX2QlikConverter': ('unx', run_unx2qlik_converter),
+    'UniversalBO2QlikConverter[unv]': ('unv', run_universal),
+    'UniversalBO2QlikConverter[unx]': ('unx', run_universal),
+    'UNX2QlikParser': ('unx', run_unx2qlik_parser)
+}
+
+def _max_rss():
+    """Peak resident set size of the current process in bytes (None if unknown)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def measure_entry_point(name, universe_path, work_dir):
+    """Runs one entry point and measures it (called in a fresh worker process)"""
+    os.chdir(work_dir)
+    _, runner = ENTRY_POINTS[name]
+    # Imports are done before the baseline so they are not measured
+    for module in ('unv2qlik_final', 'unx2qlik_converter', 'universal_converter', 'unx2qlik'):
+        __import__(module)
+    rss_before = _max_rss()
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    error = None
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            success = bool(runner(universe_path))
+        except Exception as e:
+            success = False
+            error = str(e)
+    rss_after = _max_rss()
+    return {
+        'success': success,
+        'error': error,
+        'seconds': time.perf_counter() - start,
+        'cpu_seconds': time.process_time() - cpu_start,
+        'memory_mb': (rss_after - rss_before) / MB if rss_before is not None else None
+    }
+
+def check_limits(result, limits=PERFORMANCE_CONFIG):
+    """Returns the PERFORMANCE_CONFIG violations of a result"""
+    violations = []
+    if not result['success']:
+        violations.append(f"conversion failed ({result.get('error') or 'no output'})")
+    if result['seconds'] > limits['max_execution_time']:
+        violations.append(f"{result['seconds']:.2f}s > {limits['max_execution_time']}s")
+    if result.get('memory_mb') is not None and result['memory_mb'] > limits['max_memory_usage']:
+        violations.append(f"{result['memory_mb']:.1f} MB > {limits['max_memory_usage']} MB")
+    return violations
+
+def compare_with_baseline(result, reference, tolerance=DEFAULT_TOLERANCE):
+    """Returns the regressions of a result over its baseline entry"""
+    regressions = []
+    if not reference:
+        return regressions
+    if result['seconds'] > reference['seconds'] * (1 + tolerance) and \
+            result['seconds'] - reference['seconds'] > MIN_REGRESSION_SECONDS:
+        regressions.append(f"time {reference['seconds']:.2f}s -> {result['seconds']:.2f}s")
+    if result.get('memory_mb') is not None and reference.get('memory_mb') is not None and \
+            result['memory_mb'] > max(reference['memory_mb'], 1.0) * (1 + tolerance):
+        regressions.append(f"memory {reference['memory_mb']:.1f} MB -> {result['memory_mb']:.1f} MB")
+    return regressions
+
+def prepare_universe(root, size_mb, file_type):
+    """Generates a universe in <root>/<size>_<type>/data and returns (universe path, work dir)"""
+    base = os.path.join(root, f"{size_mb}mb_{file_type}")
+    data_dir = os.path.join(base, 'data')
+    work_dir = os.path.join(base, 'work')
+    for directory in (data_dir, work_dir, os.path.join(base, 'output')):
+        os.makedirs(directory, exist_ok=True)
+    universe_path = os.path.join(data_dir, f"benchmark_{size_mb}mb.{file_type}")
+    if not os.path.exists(universe_path):
+        create = create_sized_unv if file_type == 'unv' else create_sized_unx
+        create(universe_path, size_mb * MB)
+    return os.path.abspath(universe_path), work_dir
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_baseline(path, results):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    from universal_converter import CONVERTER_VERSION
+    baseline = {
+        'converter_version': CONVERTER_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'limits': PERFORMANCE_CONFIG,
+        'results': results
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+def main():
+    large = PERFORMANCE_CONFIG['large_file_size']
+    parser = argparse.ArgumentParser(description="Benchmark every converter entry point against PERFORMANCE_CONFIG")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1, large, large * 10], help="Universe sizes in MB")
+    parser.add_argument('--entry', action='append', choices=sorted(ENTRY_POINTS), help="Only benchmark these entry points")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help=f"Baseline JSON file (default: {DEFAULT_BASELINE})")
+    parser.add_argument('--update-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="Allowed relative regression")
+    parser.add_argument('--keep-dir', default=None, help="Generate universes in (and reuse) this directory")
+    args = parser.parse_args()
+
+    entries = args.entry or list(ENTRY_POINTS)
+    baseline = load_baseline(args.baseline)
+    reference_results = baseline['results'] if baseline else {}
+    scripts_dir = os.path.dirname(os.path.abspath(__file__))
+    root = args.keep_dir or tempfile.mkdtemp(prefix="bo2qlik_benchmark_")
+    print("=== BO2QLIK BENCHMARK SUITE ===\n")
+    print(f"Limits: {PERFORMANCE_CONFIG['max_execution_time']}s, {PERFORMANCE_CONFIG['max_memory_usage']} MB "
+          f"(enforced up to {large} MB)")
+    print(f"Baseline: {args.baseline if baseline else 'none'}\n")
+    results = {}
+    failures = []
+    try:
+        for size_mb in args.sizes:
+            for name in entries:
+                file_type, _ = ENTRY_POINTS[name]
+                universe_path, work_dir = prepare_universe(root, size_mb, file_type)
+                # A fresh process per run: no warm imports or caches, and a clean peak RSS
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn'),
+                                         initializer=sys.path.insert, initargs=(0, scripts_dir)) as executor:
+                    result = executor.submit(measure_entry_point, name, universe_path, work_dir).result()
+                key = f"{name}@{size_mb}MB"
+                results[key] = result
+                problems = check_limits(result) if size_mb <= large else \
+                    ([] if result['success'] else [f"conversion failed ({result['error'] or 'no output'})"])
+                problems += compare_with_baseline(result, reference_results.get(key), args.tolerance)
+                memory = f"{result['memory_mb']:7.1f} MB" if result['memory_mb'] is not None else "      n/a"
+                print(f"{'❌' if problems else '✅'} {key:40s} {result['seconds']:8.2f}s {memory}"
+                      + (f"  ({'; '.join(problems)})" if problems else ""))
+                if problems:
+                    failures.append(key)
+    finally:
+        if not args.keep_dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if args.update_baseline or not baseline:
+        save_baseline(args.baseline, results)
+        print(f"\n💾 Baseline saved: {args.baseline}")
+    print(f"\n{len(results) - len(failures)}/{len(results)} benchmarks within limits")
+    return not failures
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
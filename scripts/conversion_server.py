@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Persistent conversion server (universal_converter.py --serve)
+Long-running local HTTP server, on a TCP port or a Unix socket, converting
+universes on a thread pool. Parsed models stay in an in-memory LRU keyed by
+the universe fingerprint, so converting an unchanged universe again only
+costs the fingerprint and the script generation.
+
+    POST /convert   {"path": "/data/eFashion.unv"}  (Content-Type: application/json)
+    POST /convert?name=eFashion.unv                 (raw universe upload)
+    GET  /health                                    (cache and request statistics)
+
+/convert returns the .qvs script (text/plain) with X-Cache: hit|miss and
+X-Conversion-Ms headers, or a JSON {"error": ...} with a 4xx status.
+"""
+
+import json
+import os
+import shutil
+import signal
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from field_classifier import KeywordClassifier, load_keywords
+from parse_cache import DEFAULT_MAX_ENTRIES, MemoryParseCache, ParseCache
+from thread_output import captured, install, last_error, uninstall
+from universal_converter import CONVERTER_VERSION, DEFAULT_KEYWORDS, UniversalBO2QlikConverter, detect_file_type
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+class ConversionError(Exception):
+    """A request that cannot be converted; carries the HTTP status to return"""
+
+    def __init__(self, message, status=422):
+        super().__init__(message)
+        self.status = status
+
+class ConversionService:
+    """Converts universes with shared parsed models and a shared keyword classifier"""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, cache_dir=None, keywords_file=None):
+        backing = ParseCache(cache_dir) if cache_dir else None
+        self.cache = MemoryParseCache(max_entries, backing)
+        self.keywords_file = keywords_file
+        # Compiled once: every request reuses the same patterns
+        self.classifier = KeywordClassifier(load_keywords(keywords_file, DEFAULT_KEYWORDS))
+        self.requests = 0
+        self.failures = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def convert(self, file_path):
+        """Converts a universe and returns (script, cache hit)
+
+        Raises ConversionError with the converter error message on failure.
+        """
+        file_type = detect_file_type(file_path)
+        if not file_type:
+            raise ConversionError(f"Unsupported file format: {file_path}", 400)
+        if not os.path.isfile(file_path):
+            raise ConversionError(f"File not found: {file_path}", 404)
+        converter = UniversalBO2QlikConverter()
+        converter.file_path = file_path
+        converter.file_type = file_type
+        converter.keywords_file = self.keywords_file
+        converter.classifier = self.classifier
+        converter.cache = self.cache
+        try:
+            script, log = captured(self._convert, converter)
+        except Exception as e:
+            raise ConversionError(f"Error during conversion: {e}") from e
+        if script is None:
+            raise ConversionError(last_error(log))
+        return script, converter.model_cached
+
+    @staticmethod
+    def _convert(converter):
+        """Returns the script, or None when the universe could not be parsed"""
+        try:
+            if not converter.open_file() or not converter.load_model():
+                return None
+            return converter.generate_qlik_script()
+        finally:
+            converter.cleanup()
+
+    def record(self, success):
+        with self._lock:
+            self.requests += 1
+            if not success:
+                self.failures += 1
+
+    def health(self):
+        with self._lock:
+            requests, failures = self.requests, self.failures
+        return {
+            'status': 'ok',
+            'converter_version': CONVERTER_VERSION,
+            'uptime_seconds': round(time.time() - self.started, 3),
+            'requests': requests,
+            'failures': failures,
+            'cache': self.cache.stats()
+        }
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    server_version = f"BO2Qlik/{CONVERTER_VERSION}"
+    protocol_version = 'HTTP/1.1'
+
+    def address_string(self):
+        # Unix socket clients have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type, headers=None):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload), 'application/json')
+
+    def send_request_error(self, status, message):
+        """Error response to a POST whose body may be left unread: the connection is closed
+        so the unread bytes are not parsed as the next keep-alive request"""
+        self.close_connection = True
+        self.send_body(status, json.dumps({'error': message}), 'application/json', {'Connection': 'close'})
+
+    def do_GET(self):
+        if urlsplit(self.path).path == '/health':
+            self.send_json(200, self.server.service.health())
+        else:
+            self.send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != '/convert':
+            self.send_request_error(404, f"Unknown endpoint: {self.path}")
+            return
+        service = self.server.service
+        start = time.perf_counter()
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if self.headers.get_content_type() == 'application/json':
+                script, hit = service.convert(self.read_path(length))
+            else:
+                name = parse_qs(url.query).get('name', [self.headers.get('X-Universe-Name', '')])[0]
+                script, hit = self.convert_upload(name, length)
+        except ConversionError as e:
+            service.record(False)
+            self.send_request_error(e.status, str(e))
+            return
+        except ValueError as e:
+            service.record(False)
+            self.send_request_error(400, f"Invalid request: {e}")
+            return
+        service.record(True)
+        self.send_body(200, script, 'text/plain; charset=utf-8', {
+            'X-Cache': 'hit' if hit else 'miss',
+            'X-Conversion-Ms': f"{(time.perf_counter() - start) * 1000:.1f}"
+        })
+
+    def read_path(self, length):
+        request = json.loads(self.rfile.read(length) or b'{}')
+        if not isinstance(request, dict) or not request.get('path'):
+            raise ConversionError('Expected a JSON object with a "path"', 400)
+        return request['path']
+
+    def convert_upload(self, name, length):
+        """Converts an uploaded universe, streamed to a temporary file of the upload's name"""
+        name = os.path.basename(name)
+        if not detect_file_type(name):
+            raise ConversionError("Uploads need a .unv or .unx name (?name= or X-Universe-Name)", 400)
+        upload_dir = tempfile.mkdtemp(prefix="upload_", dir=self.server.upload_root)
+        try:
+            path = os.path.join(upload_dir, name)
+            with open(path, 'wb') as f:
+                remaining = length
+                while remaining > 0:
+                    chunk = self.rfile.read(min(remaining, UPLOAD_CHUNK_SIZE))
+                    if not chunk:
+                        raise ConversionError("Truncated upload", 400)
+                    f.write(chunk)
+                    remaining -= len(chunk)
+            return self.server.service.convert(path)
+        finally:
+            shutil.rmtree(upload_dir, ignore_errors=True)
+
+class _WorkerPoolMixIn:
+    """Handles each connection on a bounded thread pool (ThreadingMixIn starts one thread per request)"""
+
+    workers = None
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_thread, request, client_address)
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+        shutil.rmtree(self.upload_root, ignore_errors=True)
+        uninstall()
+
+class ConversionHTTPServer(_WorkerPoolMixIn, HTTPServer):
+    pass
+
+class UnixConversionHTTPServer(_WorkerPoolMixIn, socketserver.UnixStreamServer):
+    def server_bind(self):
+        # An unclean shutdown leaves the socket file behind
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        super().server_bind()
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+def create_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, workers=None, verbose=False):
+    """Creates the conversion server (not started: call serve_forever)"""
+    if unix_socket:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise OSError("Unix sockets are not supported on this platform")
+        server = UnixConversionHTTPServer(unix_socket, ConversionRequestHandler)
+    else:
+        server = ConversionHTTPServer((host, port), ConversionRequestHandler)
+    server.service = service
+    server.verbose = verbose
+    server.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+    server.executor = ThreadPoolExecutor(max_workers=server.workers, thread_name_prefix='bo2qlik')
+    server.upload_root = tempfile.mkdtemp(prefix="bo2qlik_uploads_")
+    # Converter output is captured per request instead of interleaving on stdout
+    install()
+    return server
+
+def serve(host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None, workers=None, max_entries=DEFAULT_MAX_ENTRIES,
+          cache_dir=None, keywords_file=None, verbose=False):
+    """Runs the conversion server until interrupted"""
+    print("=== UNIVERSAL BO2QLIK CONVERTER - SERVER MODE ===\n")
+    service = ConversionService(max_entries, cache_dir, keywords_file)
+    try:
+        server = create_server(service, host, port, unix_socket, workers, verbose)
+    except OSError as e:
+        print(f"❌ Cannot start server: {e}")
+        return False
+    address = unix_socket or f"http://{server.server_address[0]}:{server.server_address[1]}"
+    print(f"🚀 Listening on {address} ({server.workers} workers, {max_entries} cached models)")
+    print("   POST /convert, GET /health - Ctrl+C to stop")
+    # SIGTERM (service managers) stops the server like Ctrl+C
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    health = service.health()
+    print(f"\n🛑 Server stopped ({health['requests']} requests, {health['cache']['hits']} cache hits)")
+    return True
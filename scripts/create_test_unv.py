@@ -102,6 +102,44 @@ def create_test_unv():
     
     return str(test_unv_path)
 
+def create_sized_unv(output_path, target_size):
+    """
+    Create a .unv file whose members add up to about target_size bytes.
+    
+    Tables;, Joins; and Columns; follow the layout of create_test_unv, with
+    numbered tables and columns repeated until the target size is reached.
+    Sizes are uncompressed member sizes, i.e. what the parsers have to read.
+    
+    Args:
+        output_path (str): Path of the .unv file to create
+        target_size (int): Approximate uncompressed size in bytes
+    
+    Returns:
+        str: Path to the created .unv file
+    """
+    padding = b"\x00" * 16
+    # Columns; carries most of the volume, like in real universes
+    shares = {"Tables;": 0.15, "Joins;": 0.25, "Columns;": 0.60}
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as unv_zip:
+        for filename, share in shares.items():
+            budget = int(target_size * share)
+            written = 0
+            index = 0
+            with unv_zip.open(filename, 'w') as member:
+                while written < budget:
+                    if filename == "Tables;":
+                        chunk = f"Table_{index:07d}".encode('ascii') + padding
+                    elif filename == "Joins;":
+                        chunk = (f"Table_{index:07d}.Key_{index % 97}="
+                                 f"Table_{index + 1:07d}.Key_{index % 97}").encode('ascii') + padding
+                    else:
+                        chunk = (" ".join(f"Column_{index:07d}_{kind}" for kind in ("id", "name", "code", "amount"))
+                                 + "\n").encode('utf-8')
+                    member.write(chunk)
+                    written += len(chunk)
+                    index += 1
+    return str(output_path)
+
 def test_unv_file(unv_path):
     """
     Test the created .unv file by extracting and examining its contents.
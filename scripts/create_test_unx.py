@@ -183,6 +183,50 @@ def create_test_unx():
     finally:
         shutil.rmtree(temp_dir, ignore_errors=True)
 
+def create_sized_unx(output_path, target_size):
+    """Creates a .unx file whose XML documents add up to about target_size bytes
+
+    Tables (8 columns each), joins and business objects follow the layout of
+    create_test_unx and are numbered until the target size is reached. Sizes
+    are uncompressed, i.e. what the parsers have to read.
+    """
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        # The data foundation gets two thirds of the volume, the business layer the rest
+        with zip_file.open("datafoundation/datafoundation.xml", 'w') as member:
+            written = member.write(b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                                   b'<dataFoundation xmlns="http://www.sap.com/rws/bip">\n    <tables>\n')
+            table_count = 0
+            # Each table also gets a join of about 150 bytes, written afterwards
+            while written + 150 * table_count < target_size * 2 // 3:
+                columns = "".join(
+                    f'                <column id="C{table_count}_{i}" name="Column_{i}_{kind}" type="VARCHAR"/>\n'
+                    for i, kind in enumerate(("id", "name", "code", "date", "amount", "quantity", "price", "label")))
+                written += member.write((f'        <table id="T{table_count}" name="Table_{table_count:07d}" description="Table {table_count}">\n'
+                                         f'            <columns>\n{columns}            </columns>\n        </table>\n').encode('utf-8'))
+                table_count += 1
+            member.write(b'    </tables>\n    <joins>\n')
+            for i in range(1, table_count):
+                member.write((f'        <join id="J{i}" name="Join_{i}">\n'
+                              f'            <expression>Table_{i - 1:07d}.Column_0_id = Table_{i:07d}.Column_0_id</expression>\n'
+                              f'        </join>\n').encode('utf-8'))
+            member.write(b'    </joins>\n</dataFoundation>')
+        with zip_file.open("businesslayer/businesslayer.xml", 'w') as member:
+            written = member.write(b'<?xml version="1.0" encoding="UTF-8"?>\n'
+                                   b'<businessLayer xmlns="http://www.sap.com/rws/bip">\n    <businessObjects>\n')
+            index = 0
+            types = ("Dimension", "Measure", "Attribute")
+            while written < target_size // 3:
+                table = index % max(table_count, 1)
+                written += member.write((f'        <businessObject id="BO{index}" name="Object_{index:07d}" type="{types[index % 3]}">\n'
+                                         f'            <description>Object {index}</description>\n'
+                                         f'            <dataFoundation>\n'
+                                         f'                <table id="T{table}" name="Table_{table:07d}"/>\n'
+                                         f'            </dataFoundation>\n'
+                                         f'        </businessObject>\n').encode('utf-8'))
+                index += 1
+            member.write(b'    </businessObjects>\n</businessLayer>')
+    return output_path
+
 def test_unx_parser():
     """Test the parser with the created .unx file"""
     print("\n=== UNX PARSER TEST ===")
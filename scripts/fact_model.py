@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Multi-fact models from contexts
+A universe with several contexts usually has one fact table per context, the
+facts sharing some dimensions (eFashion: Shop_facts and product_promotion_facts
+share Article_lookup and Calendar_year_lookup). Loaded as they are, the facts
+close loops through their shared dimensions. This module finds the fact of
+each context and plans how the facts load as a single star:
+
+- 'concatenate' when every fact joins the same dimensions on the same
+  columns: the facts are loaded into one Facts table with a Fact_Type field;
+- 'link' otherwise: each fact gets a %LinkKey of its shared dimension keys,
+  a LinkTable holds the distinct keys with the dimension fields, and the
+  facts drop their own copies of those fields.
+
+The tables, columns and joins of the resulting model are then given to the
+association analysis, which keeps only the intended fields associated.
+"""
+
+from association_analysis import association_loops, field_index, plan_associations, synthetic_keys
+from join_analysis import join_pairs, join_sides, table_references
+from load_script import field_expressions, key_expression, qlik_field, sql_load_lines
+from qvd_load import FACT_NAME_PATTERN
+
+LINK_TABLE = 'LinkTable'
+LINK_KEY = '%LinkKey'
+FACTS_TABLE = 'Facts'
+FACT_TYPE_FIELD = 'Fact_Type'
+
+def context_joins(contexts, joins, join_records=()):
+    """[(context name, [join expressions])] of decoded contexts
+
+    UNV contexts reference the ids of the UNW_Storage joins, UNX contexts the
+    1-based positions of their joins.
+    """
+    expressions = {record['id']: record['expression'] for record in join_records}
+    resolved = []
+    for context in contexts:
+        if expressions:
+            context_expressions = [expressions[join] for join in context['joins'] if join in expressions]
+        else:
+            context_expressions = [joins[join - 1] for join in context['joins'] if 0 < join <= len(joins)]
+        resolved.append((context['name'], context_expressions))
+    return resolved
+
+def context_fact(expressions, table_columns):
+    """Fact table of a context: the unreferenced table referencing the most others through the
+    context joins (named facts first on a tie), None if no table references another"""
+    references = table_references(expressions, table_columns)
+    referenced = set().union(*references.values()) if references else set()
+    candidates = [(len(others), bool(FACT_NAME_PATTERN.search(table)), table)
+                  for table, others in references.items() if table not in referenced]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda candidate: candidate[:2])[2]
+
+def _fact_dimensions(facts, joins):
+    """({fact: {dimension: [(fact column, dimension column)]}}, joins touching a fact)"""
+    fact_set = set(facts)
+    dimensions = {fact: {} for fact in facts}
+    fact_joins = []
+    for expression in joins:
+        sides = join_sides(expression)
+        if sides is None or not fact_set & sides.keys():
+            continue
+        fact_joins.append(expression)
+        if sides.keys() <= fact_set:
+            continue
+        fact, = fact_set & sides.keys()
+        pairs = [(left[1], right[1]) if left[0] == fact else (right[1], left[1])
+                 for left, right in join_pairs(expression)]
+        dimensions[fact].setdefault(next(table for table in sides if table != fact), pairs)
+    return dimensions, fact_joins
+
+def plan_fact_model(tables, table_columns, joins, contexts):
+    """Star schema plan of a universe whose contexts have several facts, None otherwise
+
+    contexts are (name, [join expressions]) pairs (see context_joins). Returns
+    {'strategy': 'link' or 'concatenate', 'facts', 'contexts': {fact: context},
+    'dimensions': shared dimensions, 'tables', 'table_columns', 'joins',
+    'shared_fields': the model to analyse, 'keys': {fact: [(link key, columns)]},
+    'link_fields': {fact: [(column, link field)]}, 'renames': {fact: {column: Facts column}}}.
+    """
+    positions = {table: position for position, table in enumerate(tables)}
+    fact_contexts = {}
+    for name, expressions in contexts:
+        fact = context_fact(expressions, table_columns)
+        if fact in positions and table_columns.get(fact):
+            fact_contexts.setdefault(fact, name)
+    facts = sorted(fact_contexts, key=positions.get)
+    if len(facts) < 2:
+        return None
+    dimensions, fact_joins = _fact_dimensions(facts, joins)
+    shared = []
+    for fact in facts:
+        for dimension in dimensions[fact]:
+            if dimension not in shared and sum(dimension in dimensions[other] for other in facts) > 1:
+                shared.append(dimension)
+    if not shared:
+        return None
+    plan = {'facts': facts, 'contexts': fact_contexts, 'dimensions': shared,
+            'keys': {}, 'link_fields': {}, 'renames': {}}
+    base = dimensions[facts[0]]
+    same_dimensions = all(dimensions[fact].keys() == base.keys() and
+                          all([column for _, column in dimensions[fact][dimension]] ==
+                              [column for _, column in pairs] for dimension, pairs in base.items())
+                          for fact in facts[1:])
+    if same_dimensions:
+        _plan_concatenation(plan, tables, table_columns, joins, dimensions, fact_joins)
+    else:
+        _plan_link_table(plan, tables, table_columns, joins, dimensions, fact_joins)
+    return plan
+
+def _plan_concatenation(plan, tables, table_columns, joins, dimensions, fact_joins):
+    facts = plan['facts']
+    base = dimensions[facts[0]]
+    columns, types = [], {}
+    for fact in facts:
+        renames = {column: base_column for dimension, pairs in dimensions[fact].items()
+                   for (column, _), (base_column, _) in zip(pairs, base[dimension]) if column != base_column}
+        plan['renames'][fact] = renames
+        for name, column_type in table_columns[fact]:
+            name = renames.get(name, name)
+            if name not in types:
+                columns.append(name)
+                types[name] = column_type
+    plan['strategy'] = 'concatenate'
+    plan['tables'] = [FACTS_TABLE if table == facts[0] else table for table in tables if table not in facts[1:]]
+    plan['table_columns'] = dict(table_columns)
+    for fact in facts:
+        plan['table_columns'].pop(fact, None)
+    plan['table_columns'][FACTS_TABLE] = [(name, types[name]) for name in columns] + [(FACT_TYPE_FIELD, 'Character')]
+    plan['joins'] = [expression for expression in joins if expression not in fact_joins]
+    plan['joins'] += [' and '.join(f"{FACTS_TABLE}.{column}={dimension}.{dimension_column}"
+                                   for column, dimension_column in pairs) for dimension, pairs in base.items()]
+    plan['shared_fields'] = {}
+
+def _plan_link_table(plan, tables, table_columns, joins, dimensions, fact_joins):
+    facts, shared = plan['facts'], plan['dimensions']
+    # Link fields are the dimension columns the facts join, in dimension order
+    link_fields, types = [], {}
+    for dimension in shared:
+        for fact in facts:
+            fact_types = dict(table_columns[fact])
+            for column, dimension_column in dimensions[fact].get(dimension, ()):
+                if (dimension, dimension_column) not in link_fields:
+                    link_fields.append((dimension, dimension_column))
+                    types[dimension_column] = fact_types.get(column)
+    # Joins between facts, and from a fact to a shared dimension, go through the link table
+    replaced = {expression for expression in fact_joins
+                if all(table in facts or table in shared for table in join_sides(expression))}
+    for fact in facts:
+        fact_columns = {dimension_column: column for dimension, pairs in dimensions[fact].items() if dimension in shared
+                        for column, dimension_column in pairs}
+        plan['keys'][fact] = [(LINK_KEY, [fact_columns.get(field) for _, field in link_fields])]
+        plan['link_fields'][fact] = [(fact_columns[field], field) for _, field in link_fields if field in fact_columns]
+    plan['strategy'] = 'link'
+    plan['tables'] = list(tables) + [LINK_TABLE]
+    plan['table_columns'] = dict(table_columns)
+    for fact in facts:
+        plan['table_columns'][fact] = list(table_columns[fact]) + [(LINK_KEY, None)]
+    plan['table_columns'][LINK_TABLE] = [(LINK_KEY, None)] + [(field, types[field]) for _, field in link_fields]
+    plan['joins'] = [expression for expression in joins if expression not in replaced]
+    # One join per dimension and set of dimension columns joined by the facts
+    link_joins = []
+    for fact in facts:
+        for dimension, pairs in dimensions[fact].items():
+            expression = ' and '.join(f"{LINK_TABLE}.{column}={dimension}.{column}" for _, column in pairs)
+            if dimension in shared and expression not in link_joins:
+                link_joins.append(expression)
+    plan['joins'] += link_joins
+    plan['shared_fields'] = {LINK_KEY: facts + [LINK_TABLE]}
+
+def plan_star_schema(tables, table_columns, joins, contexts=()):
+    """(fact model plan or None, association plan) of a universe
+
+    With several facts, the association plan is the one of the fact model, with
+    the link keys of the facts; its synthetic keys and loops are still those of
+    the tables loaded as they are.
+    """
+    fact_model = plan_fact_model(tables, table_columns, joins, contexts) if contexts else None
+    if fact_model is None:
+        return None, plan_associations(tables, table_columns, joins)
+    associations = plan_associations(fact_model['tables'], fact_model['table_columns'], fact_model['joins'],
+                                     fact_model['shared_fields'])
+    for fact, keys in fact_model['keys'].items():
+        associations['keys'].setdefault(fact, []).extend(keys)
+    index = field_index(tables, table_columns)
+    associations['synthetic_keys'] = synthetic_keys(tables, table_columns, index)
+    associations['loops'] = association_loops(tables, table_columns, index)
+    return fact_model, associations
+
+def render_fact_load(plan, fact, fields, associations):
+    """Load of a fact into the concatenated Facts table, its columns renamed to the Facts fields"""
+    renames = plan['renames'][fact]
+    aliases = associations['aliases'].get(FACTS_TABLE, {})
+    loaded = {field: aliases.get(renames.get(field, field), renames.get(field, field)) for field in fields}
+    columns = {name: field for field, name in renames.items()}
+    keys = [(name, [columns.get(column, column if column in fields else None) for column in key_columns])
+            for name, key_columns in associations['keys'].get(FACTS_TABLE, ())]
+    expressions = field_expressions(fields, {field: name for field, name in loaded.items() if name != field}, keys)
+    fact_type = fact.replace("'", "''")
+    expressions.append(f"'{fact_type}' AS {qlik_field(aliases.get(FACT_TYPE_FIELD, FACT_TYPE_FIELD))}")
+    first = fact == plan['facts'][0]
+    lines = [f"// Loading table {fact} into {FACTS_TABLE} (context {plan['contexts'][fact]})"]
+    if not first:
+        lines.append(f"Concatenate ({FACTS_TABLE})")
+    lines += sql_load_lines(FACTS_TABLE, fields, fact, label=first, expressions=expressions)
+    return '\n'.join(lines)
+
+def render_link_table(plan, associations):
+    """LinkTable built from the distinct link keys of the facts, then the facts drop their link
+    fields (unless a private dimension is associated on one of them)"""
+    link_aliases = associations['aliases'].get(LINK_TABLE, {})
+    link_keys = associations['keys'].get(LINK_TABLE, ())
+    lines = []
+    for position, fact in enumerate(plan['facts']):
+        aliases = associations['aliases'].get(fact, {})
+        fact_fields = {field: aliases.get(column, column) for column, field in plan['link_fields'][fact]}
+        expressions = [qlik_field(LINK_KEY)]
+        for field, loaded in fact_fields.items():
+            name = link_aliases.get(field, field)
+            expressions.append(qlik_field(loaded) if loaded == name else f"{qlik_field(loaded)} AS {qlik_field(name)}")
+        for name, columns in link_keys:
+            expressions.append(f"{key_expression([fact_fields.get(column) for column in columns])} AS {qlik_field(name)}")
+        lines += [f"// Link fields of {fact} (context {plan['contexts'][fact]})"]
+        lines += [f"{LINK_TABLE}:" if position == 0 else f"Concatenate ({LINK_TABLE})", "LOAD DISTINCT"]
+        lines += [f"    {expression}," for expression in expressions[:-1]] + [f"    {expressions[-1]}"]
+        lines.append(f"RESIDENT {fact};")
+    for fact in plan['facts']:
+        aliases = associations['aliases'].get(fact, {})
+        associated = set(associations['fields'].get(fact, {}).values())
+        dropped = [qlik_field(aliases.get(column, column)) for column, _ in plan['link_fields'][fact]
+                   if column not in associated]
+        if dropped:
+            lines.append(f"DROP FIELDS {', '.join(dropped)} FROM {fact};")
+    return '\n'.join(lines)
+
+def format_fact_model(plan):
+    """Script comment lines describing the fact model"""
+    facts = ', '.join(f"{fact} ({plan['contexts'][fact]})" for fact in plan['facts'])
+    if plan['strategy'] == 'concatenate':
+        lines = [f"// Facts concatenated into {FACTS_TABLE} ({FACT_TYPE_FIELD} tells them apart): {facts}"]
+    else:
+        lines = [f"// Facts linked through {LINK_TABLE} on {LINK_KEY}: {facts}"]
+    lines.append(f"// Shared dimensions: {', '.join(plan['dimensions'])}")
+    return lines
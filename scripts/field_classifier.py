@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Keyword field classifier
+Compiles each keyword category (dimension, measure, ...) once into a single
+regex alternation and classifies a whole batch of field names with C-level
+map() scans instead of a substring test per keyword and field
+"""
+
+import json
+import os
+import re
+
+def _compile(keywords):
+    # Matching is done on lowercased fields, like the historical field.lower() test
+    keywords = [keyword for keyword in dict.fromkeys(keyword.lower() for keyword in keywords) if keyword]
+    if not keywords:
+        return None
+    # Longest first so that the alternation never stops on a shorter prefix
+    keywords.sort(key=len, reverse=True)
+    return re.compile('|'.join(map(re.escape, keywords)))
+
+class KeywordClassifier:
+    def __init__(self, categories):
+        """categories maps a category name to its keywords (substrings, case-insensitive)"""
+        self.categories = {name: list(keywords) for name, keywords in categories.items()}
+        self._patterns = {name: _compile(keywords) for name, keywords in self.categories.items()}
+
+    def matches(self, field, category):
+        """Tells whether a single field contains a keyword of category"""
+        pattern = self._patterns[category]
+        return pattern is not None and pattern.search(field.lower()) is not None
+
+    def classify(self, fields, categories=None):
+        """Classifies a batch of field names
+
+        Returns {category: bytearray} where flags[i] is 1 when fields[i]
+        contains at least one keyword of the category. categories restricts
+        the scan to some categories (all by default). Fields are lowercased
+        once for the whole batch, whatever the number of categories.
+        """
+        lowered = list(map(str.lower, fields))
+        result = {}
+        for name in categories or self._patterns:
+            pattern = self._patterns[name]
+            if pattern is None:
+                result[name] = bytearray(len(lowered))
+            else:
+                result[name] = bytearray(map(bool, map(pattern.search, lowered)))
+        return result
+
+def load_keywords(path=None, defaults=None):
+    """Loads keyword categories from a JSON file ({"dimension": [...], "measure": [...]})
+
+    path defaults to $BO2QLIK_KEYWORDS. Categories missing from the file keep
+    their default keywords; without a file the defaults are returned.
+    """
+    categories = {name: list(keywords) for name, keywords in (defaults or {}).items()}
+    path = path or os.environ.get('BO2QLIK_KEYWORDS')
+    if not path:
+        return categories
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"Keyword file must contain a JSON object: {path}")
+    for name, keywords in config.items():
+        if not isinstance(keywords, list) or not all(isinstance(keyword, str) for keyword in keywords):
+            raise ValueError(f"Keywords of '{name}' must be a list of strings: {path}")
+        categories[name] = keywords
+    return categories
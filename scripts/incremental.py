@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Incremental script generation
+A manifest stored next to the generated script (<script>.manifest.json) records,
+for each script section (header, one LOAD block per table, joins, fields, one
+calculation block per measure, footer), a fingerprint of the model inputs it
+was rendered from and its byte range in the script. The next run diffs the
+parsed model against the manifest: unchanged sections are copied from the
+previous script, only changed ones are rendered, and an unchanged universe
+leaves the script untouched.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+from script_writer import write_script
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIX = '.manifest.json'
+# Always rendered: it carries the generation date
+ALWAYS_RENDERED = ('header',)
+
+def manifest_path(script_path):
+    return f"{script_path}{MANIFEST_SUFFIX}"
+
+def section_fingerprint(inputs, version):
+    """Fingerprint of a section's model inputs (strings, lists and tuples of them)"""
+    data = json.dumps([version, inputs], separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+def unique_sections(sections):
+    """Makes section ids unique (a table listed twice gets 'table:X#2')"""
+    seen = {}
+    for section_id, inputs, render in sections:
+        count = seen.get(section_id, 0) + 1
+        seen[section_id] = count
+        yield (section_id if count == 1 else f"{section_id}#{count}"), inputs, render
+
+def load_manifest(script_path):
+    """Returns the manifest of a script, or None if missing, stale or unreadable"""
+    try:
+        with open(manifest_path(script_path), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        size = os.path.getsize(script_path)
+    except (OSError, ValueError):
+        return None
+    # A script edited or replaced since the manifest was written cannot be patched
+    if manifest.get('manifest_version') != MANIFEST_VERSION or manifest.get('size') != size:
+        return None
+    return manifest
+
+def _write_manifest(script_path, manifest):
+    directory = os.path.dirname(script_path) or '.'
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        os.replace(temp_path, manifest_path(script_path))
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def diff_sections(previous, current):
+    """Compares {section id: fingerprint} mappings; returns added, removed and changed ids"""
+    added = [section_id for section_id in current if section_id not in previous]
+    removed = [section_id for section_id in previous if section_id not in current]
+    changed = [section_id for section_id, fingerprint in current.items()
+               if section_id in previous and previous[section_id] != fingerprint]
+    return added, removed, changed
+
+def write_incremental(script_path, sections, version):
+    """Writes the script from (section id, inputs, render) sections, reusing the previous run
+
+    Returns a report: added, removed and changed section ids, the number of
+    rendered and copied sections and whether the script was written at all.
+    """
+    sections = list(unique_sections(sections))
+    fingerprints = {section_id: section_fingerprint(inputs, version) for section_id, inputs, _ in sections}
+    manifest = load_manifest(script_path)
+    previous = {entry[0]: entry for entry in manifest['sections']} if manifest else {}
+    added, removed, changed = diff_sections({section_id: entry[1] for section_id, entry in previous.items()},
+                                            fingerprints)
+    report = {
+        'full': manifest is None,
+        'added': added,
+        'removed': removed,
+        'changed': changed,
+        'rendered': 0,
+        'copied': 0,
+        'written': False
+    }
+    same_order = manifest is not None and [entry[0] for entry in manifest['sections']] == list(fingerprints)
+    if same_order and not changed:
+        return report
+
+    entries = []
+    offset = 0
+
+    def chunks(old_script):
+        nonlocal offset
+        for section_id, _, render in sections:
+            entry = previous.get(section_id)
+            if entry is not None and entry[1] == fingerprints[section_id] and section_id not in ALWAYS_RENDERED:
+                old_script.seek(entry[2])
+                data = old_script.read(entry[3])
+                text = data.decode('utf-8')
+                report['copied'] += 1
+            else:
+                text = render()
+                data = text.encode('utf-8')
+                report['rendered'] += 1
+            entries.append([section_id, fingerprints[section_id], offset, len(data)])
+            offset += len(data)
+            yield text
+
+    # The previous script stays readable until write_script renames the new one over it
+    old_script = open(script_path, 'rb') if manifest else None
+    try:
+        # newline='\n': the byte ranges must match the file on every platform
+        write_script(script_path, chunks(old_script), newline='\n')
+    finally:
+        if old_script is not None:
+            old_script.close()
+    _write_manifest(script_path, {
+        'manifest_version': MANIFEST_VERSION,
+        'converter_version': version,
+        'size': offset,
+        'sections': entries
+    })
+    report['written'] = True
+    return report
+
+def format_report(report, limit=20):
+    """Human-readable lines describing an incremental run"""
+    if report['full']:
+        return [f"🆕 Full generation: {report['rendered']} sections (manifest created)"]
+    if not report['written']:
+        return ["✅ Universe unchanged: script left untouched"]
+    lines = [f"🔁 Incremental update: {len(report['changed'])} changed, {len(report['added'])} added, "
+             f"{len(report['removed'])} removed ({report['rendered']} sections rendered, {report['copied']} copied)"]
+    changes = [('~', section_id) for section_id in report['changed']] + \
+              [('+', section_id) for section_id in report['added']] + \
+              [('-', section_id) for section_id in report['removed']]
+    for marker, section_id in changes[:limit]:
+        lines.append(f"   {marker} {section_id}")
+    if len(changes) > limit:
+        lines.append(f"   ... and {len(changes) - limit} more")
+    return lines
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Join analysis
+Reads the table.column pairs of join expressions and infers their cardinality
+from the table columns: a side joined on its key (its first column or its own
+id column, or a set of columns containing one) is unique, so a join whose
+other side is not is many-to-one. Shared by the script generators to tell
+facts from lookups and lookups that can be mapped instead of joined.
+"""
+
+import re
+
+_QUALIFIED_COLUMN = re.compile(r'([A-Za-z_]\w*)\.([A-Za-z_]\w*)')
+
+def join_columns(expression):
+    """(table, column) pairs referenced by a join expression"""
+    return _QUALIFIED_COLUMN.findall(expression)
+
+def join_pairs(expression):
+    """[((table, column), (other table, other column))] equalities of a join expression"""
+    columns = join_columns(expression)
+    return list(zip(columns[::2], columns[1::2]))
+
+def join_sides(expression):
+    """{table: [join columns]} of a join between two tables, None for any other expression"""
+    sides = {}
+    for (table, column), (other, other_column) in join_pairs(expression):
+        sides.setdefault(table, []).append(column)
+        sides.setdefault(other, []).append(other_column)
+    return sides if len(sides) == 2 else None
+
+def is_key_column(table, column, table_columns):
+    """True for the first column of a table or its own id column (Shop_facts_id, id)"""
+    columns = table_columns.get(table)
+    if not columns:
+        return False
+    return column == columns[0][0] or column.lower() in (f"{table}_id".lower(), 'id')
+
+def join_cardinality(expression, table_columns):
+    """{table: 'one' or 'many'} of the two sides of a join, None if it does not join two tables
+
+    A side is 'one' when its join columns contain one of its keys (so never for
+    a table whose columns are unknown).
+    """
+    sides = join_sides(expression)
+    if sides is None:
+        return None
+    return {table: 'one' if any(is_key_column(table, column, table_columns) for column in columns) else 'many'
+            for table, columns in sides.items()}
+
+def table_references(joins, table_columns):
+    """{table: set of the tables it references} from join expressions
+
+    The many side of a many-to-one join references the one side.
+    """
+    references = {}
+    for expression in joins:
+        cardinality = join_cardinality(expression, table_columns)
+        if not cardinality:
+            continue
+        (table, side), (other, other_side) = cardinality.items()
+        if side == 'many' and other_side == 'one':
+            references.setdefault(table, set()).add(other)
+        elif side == 'one' and other_side == 'many':
+            references.setdefault(other, set()).add(table)
+    return references
+
+def lookup_join(expression, table, lookup, table_columns):
+    """Join columns [(table column, lookup column)] when the join maps each row of table to
+    at most one lookup row (many-to-one or one-to-one); None otherwise"""
+    sides = join_sides(expression)
+    if sides is None or set(sides) != {table, lookup}:
+        return None
+    cardinality = join_cardinality(expression, table_columns)
+    if cardinality[lookup] != 'one':
+        return None
+    return [(left[1], right[1]) if left[0] == table else (right[1], left[1])
+            for left, right in join_pairs(expression)]
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+LOAD statements of the generated scripts
+Tables whose columns are known (datafoundation.xml, UNW_Storage) are loaded
+with explicit field lists, in the Qlik LOAD and in the SQL SELECT under it,
+so a reload only pulls the columns the universe exposes. Tables without
+known columns keep LOAD *. The Qlik LOAD can rename fields and add composite
+keys (see association_analysis) while the SQL SELECT keeps the source names.
+"""
+
+import re
+
+_IDENTIFIER = re.compile(r'[A-Za-z_]\w*')
+KEY_SEPARATOR = " & '|' & "
+
+def qlik_field(name):
+    """Field name for a Qlik LOAD ([bracketed] unless a plain identifier)"""
+    if _IDENTIFIER.fullmatch(name):
+        return name
+    return '[' + name.replace(']', ']]') + ']'
+
+def sql_column(name):
+    """Column name for a SQL SELECT ("quoted" unless a plain identifier)"""
+    if _IDENTIFIER.fullmatch(name):
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+def _listed(names, indent="    "):
+    return [f"{indent}{name}," for name in names[:-1]] + [f"{indent}{names[-1]}"]
+
+def key_expression(columns):
+    """'|'-separated concatenation of fields (None for an empty part)"""
+    return KEY_SEPARATOR.join(qlik_field(column) if column else "''" for column in columns)
+
+def field_expressions(fields, aliases=None, keys=()):
+    """LOAD expressions of fields: renamed with AS by aliases ({field: loaded name}), then the
+    composite keys [(key field, [fields])] as '|'-separated concatenations (None for an empty part)"""
+    aliases = aliases or {}
+    expressions = [f"{qlik_field(field)} AS {qlik_field(aliases[field])}" if field in aliases else qlik_field(field)
+                   for field in fields]
+    for name, columns in keys:
+        expressions.append(f"{key_expression(columns)} AS {qlik_field(name)}")
+    return expressions
+
+def loaded_fields(fields, aliases=None, keys=()):
+    """Names of the fields a LOAD of field_expressions creates"""
+    aliases = aliases or {}
+    return [aliases.get(field, field) for field in fields] + [name for name, _ in keys]
+
+def load_lines(table, fields, source, where=None, label=True, expressions=None):
+    """LOAD fields (* when empty) FROM a file or QVD source, as script lines
+
+    expressions replaces the plain field list of the LOAD (see field_expressions).
+    """
+    lines = [f"{table}:"] if label else []
+    if fields:
+        lines.append("LOAD")
+        lines.extend(_listed(expressions or [qlik_field(field) for field in fields]))
+    else:
+        lines.append("LOAD *")
+    lines.extend(f"FROM {source}".splitlines())
+    if where:
+        lines.append(f"WHERE {where}")
+    lines[-1] += ";"
+    return lines
+
+def sql_load_lines(table, fields, source, where=None, label=True, expressions=None):
+    """Preceding LOAD (of expressions, if given) over a SQL SELECT of fields from a database table, as script lines"""
+    lines = [f"{table}:"] if label else []
+    lines.append("LOAD")
+    lines.extend(_listed(expressions or [qlik_field(field) for field in fields]))
+    lines[-1] += ";"
+    lines.append("SQL SELECT")
+    lines.extend(_listed([sql_column(field) for field in fields]))
+    lines.append(f"FROM {sql_column(source)}")
+    if where:
+        lines.append(f"WHERE {where}")
+    lines[-1] += ";"
+    return lines
+
+def render_table_load(table, fields, expressions=None):
+    """Loading block of a table with known columns: explicit LOAD over an explicit SQL SELECT"""
+    return '\n'.join([f"// Loading table {table}"] + sql_load_lines(table, fields, table, expressions=expressions))
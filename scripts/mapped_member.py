@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped member files
+Members extracted to disk (Tables, Joins, Columns) are mapped read-only and
+scanned in place by the regex engine, window by window: the page cache serves
+the data and no copy of the member is made. The pages of a scanned window are
+dropped from the process (MADV_DONTNEED, they stay in the page cache) before
+the next one, so resident memory does not grow with the member size.
+"""
+
+import contextlib
+import mmap
+import os
+import re
+
+from string_extractor import MIN_STRING_LENGTH, printable_pattern
+
+WINDOW_SIZE = 4 * 1024 * 1024
+
+# Identifiers of the Columns member; non-ASCII bytes count as word characters,
+# like the accented letters of the text-mode \b[A-Za-z_][A-Za-z0-9_]*\b
+IDENTIFIER_PATTERN = re.compile(rb'(?<![\w\x80-\xff])[A-Za-z_][A-Za-z0-9_]*(?![\w\x80-\xff])')
+IDENTIFIER_SEPARATOR = re.compile(rb'[^\w\x80-\xff]')
+PRINTABLE_SEPARATOR = re.compile(rb'[^\x20-\x7e]')
+
+@contextlib.contextmanager
+def map_file(path):
+    """Maps a file read-only; yields the mmap (b'' for an empty file, which cannot be mapped)"""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b''
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapped
+    finally:
+        mapped.close()
+
+def _release(mapped, start, end):
+    """Drops the pages of [start, end) from the process; returns the new release offset"""
+    end -= end % mmap.PAGESIZE
+    if end > start and hasattr(mapped, 'madvise') and hasattr(mmap, 'MADV_DONTNEED'):
+        mapped.madvise(mmap.MADV_DONTNEED, start, end - start)
+        return end
+    return start
+
+def iter_mapped_matches(mapped, pattern, separator, window_size=WINDOW_SIZE):
+    """Yields the bytes of each match of a (group-less) bytes pattern in a mapped file
+
+    separator matches a byte no match can contain: windows are cut on one, so
+    no match straddles two windows. Lookbehinds still see the bytes before a
+    window (pos is not a slice).
+    """
+    size = len(mapped)
+    start = 0
+    released = 0
+    while start < size:
+        cut = separator.search(mapped, start + window_size) if start + window_size < size else None
+        end = cut.start() if cut else size
+        yield from pattern.findall(mapped, start, end)
+        start = end
+        released = _release(mapped, released, start)
+
+def extract_mapped_strings(mapped, min_length=MIN_STRING_LENGTH, dedup=False, window_size=WINDOW_SIZE):
+    """extract_strings for a mapped file, without materializing every match first"""
+    matches = iter_mapped_matches(mapped, printable_pattern(min_length), PRINTABLE_SEPARATOR, window_size)
+    strings = (match.decode('ascii') for match in matches)
+    if dedup:
+        return list(dict.fromkeys(strings))
+    return list(strings)
+
+def iter_mapped_identifiers(mapped, window_size=WINDOW_SIZE):
+    """Yields the identifiers of a mapped text member, in file order"""
+    for match in iter_mapped_matches(mapped, IDENTIFIER_PATTERN, IDENTIFIER_SEPARATOR, window_size):
+        yield match.decode('ascii')
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Per-member universe parsing
+The members of a universe are independent: Columns;, Tables; and the joins
+(UNW_Storage records, or Joins; strings) of a .unv, datafoundation.xml and
+businesslayer.xml of a .unx. Each one is decoded by a function of an archive
+reader returning a partial result, which the converter applies in a fixed
+order, so the model does not depend on which member finishes first.
+
+With several workers, members are read and decompressed in a thread pool
+(zlib releases the GIL) and decoded in a process pool; a universe then
+parses in about the time of its largest member.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from string_extractor import extract_strings
+from unv_reader import UniverseArchiveReader
+from unv_storage import StorageFormatError, decode_universe_storage
+from unx_parser import BUSINESSLAYER_MEMBER, DATAFOUNDATION_MEMBER, parse_businesslayer, parse_datafoundation
+
+def parse_columns(archive):
+    with archive.open_text('Columns;') as f:
+        # Line by line: the member is never held in memory as a whole
+        fields = []
+        for line in f:
+            fields.extend(line.split())
+    return fields
+
+def parse_tables(archive):
+    return [s for s in extract_strings(archive.read_member('Tables;')) if len(s) > 3]
+
+def parse_joins(archive):
+    """Decoded UNW_Storage, or the raw strings of Joins; when it is missing or undecodable
+
+    Returns {'storage': dict or None, 'error': message or None, 'joins': strings or None}.
+    """
+    result = {'storage': None, 'error': None, 'joins': None}
+    try:
+        result['storage'] = decode_universe_storage(archive)
+    except StorageFormatError as e:
+        result['error'] = str(e)
+    if not result['storage'] and archive.has_member('Joins;'):
+        result['joins'] = [s for s in extract_strings(archive.read_member('Joins;')) if len(s) > 3]
+    return result
+
+def parse_datafoundation_member(archive):
+    with archive.open_member(DATAFOUNDATION_MEMBER) as f:
+        return parse_datafoundation(f)
+
+def parse_businesslayer_member(archive):
+    with archive.open_member(BUSINESSLAYER_MEMBER) as f:
+        return parse_businesslayer(f)
+
+def unv_member_tasks(archive):
+    """(key, decoder, member names) of the members of an open .unv"""
+    tasks = []
+    if archive.has_member('Columns;'):
+        tasks.append(('columns', parse_columns, ['Columns;']))
+    if archive.has_member('Tables;'):
+        tasks.append(('tables', parse_tables, ['Tables;']))
+    joins_members = archive.storage_members() + (['Joins;'] if archive.has_member('Joins;') else [])
+    tasks.append(('joins', parse_joins, joins_members))
+    return tasks
+
+def unx_member_tasks(archive):
+    """(key, decoder, member names) of the members of an open .unx"""
+    tasks = []
+    if archive.has_member(DATAFOUNDATION_MEMBER):
+        tasks.append(('datafoundation', parse_datafoundation_member, [DATAFOUNDATION_MEMBER]))
+    if archive.has_member(BUSINESSLAYER_MEMBER):
+        tasks.append(('businesslayer', parse_businesslayer_member, [BUSINESSLAYER_MEMBER]))
+    return tasks
+
+def _decode(decoder, members):
+    """Runs a decoder over decompressed members (in a worker process)"""
+    return decoder(UniverseArchiveReader.from_members(members))
+
+def run_member_tasks(archive, tasks, workers=1):
+    """Runs (key, decoder, member names) tasks; returns {key: result}
+
+    With workers > 1 and several tasks, a thread per task decompresses its
+    members and hands them to a process pool as soon as they are ready.
+    """
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        return {key: decoder(archive) for key, decoder, _ in tasks}
+    with ProcessPoolExecutor(max_workers=workers) as decoders, ThreadPoolExecutor(max_workers=workers) as readers:
+        # Start the worker processes before any reader thread: forking next to running threads is unsafe
+        decoders.submit(int).result()
+
+        def submit(task):
+            _, decoder, names = task
+            members = {name: archive.read_member(name) for name in names}
+            return decoders.submit(_decode, decoder, members)
+
+        futures = list(readers.map(submit, tasks))
+        return {key: future.result() for (key, _, _), future in zip(tasks, futures)}
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+SQLite metadata catalog of converted universes
+Each conversion run with --catalog stores the parsed model of its universe
+(the relations of model_export: tables, columns, joins, objects with their
+classification, contexts) in a local SQLite database, so questions spanning
+thousands of universes ("which universes use Shop_facts?") are answered by
+an indexed query instead of re-parsing anything.
+
+A universe is one row of `universes`, keyed by its content fingerprint, and
+`universe_paths` maps every recorded path to it: copies of a universe share
+its rows, recording an unchanged universe again is a no-op, and a path whose
+content changed is moved to the new fingerprint (the old rows are dropped
+once no path uses them). Each universe is written in a single transaction
+with one executemany per relation.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from model_export import SCHEMA, model_relations
+
+DEFAULT_CATALOG_PATH = os.environ.get('BO2QLIK_CATALOG', '../catalog/universes.db')
+CATALOG_VERSION = 2
+_SQL_TYPES = {'str': 'TEXT', 'int': 'INTEGER'}
+# Lookup columns of each relation (universe_id is always indexed)
+INDEXED_COLUMNS = {
+    'tables': ('name',),
+    'columns': ('name', 'table'),
+    'joins': ('left_table', 'right_table'),
+    'objects': ('name', 'kind'),
+    'object_tables': ('table',),
+    'object_columns': ('table', 'column'),
+    'contexts': ('name',)
+}
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+def schema_statements():
+    """CREATE statements of the catalog"""
+    statements = ["""CREATE TABLE IF NOT EXISTS universes (
+        id INTEGER PRIMARY KEY,
+        fingerprint TEXT NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        file_type TEXT,
+        converter_version TEXT,
+        recorded_at REAL NOT NULL,
+        tables INTEGER NOT NULL,
+        joins INTEGER NOT NULL,
+        objects INTEGER NOT NULL)""",
+                  "CREATE INDEX IF NOT EXISTS universes_name ON universes (name)",
+                  """CREATE TABLE IF NOT EXISTS universe_paths (
+        path TEXT PRIMARY KEY,
+        universe_id INTEGER NOT NULL REFERENCES universes (id),
+        recorded_at REAL NOT NULL)""",
+                  "CREATE INDEX IF NOT EXISTS universe_paths_universe ON universe_paths (universe_id)"]
+    for relation, columns in SCHEMA.items():
+        definitions = ', '.join(f"{_quote(column)} {_SQL_TYPES[column_type]}" for column, column_type in columns)
+        statements.append(f"CREATE TABLE IF NOT EXISTS {_quote(relation)} "
+                          f"(universe_id INTEGER NOT NULL REFERENCES universes (id), {definitions})")
+        statements.append(f"CREATE INDEX IF NOT EXISTS {relation}_universe ON {_quote(relation)} (universe_id)")
+        for column in INDEXED_COLUMNS.get(relation, ()):
+            statements.append(f"CREATE INDEX IF NOT EXISTS {relation}_{column} "
+                              f"ON {_quote(relation)} ({_quote(column)})")
+    return statements
+
+class MetadataCatalog:
+    def __init__(self, path, timeout=60.0):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Batch workers record their universes from several processes: WAL lets readers
+        # run alongside the single writer, and the timeout makes writers wait their turn
+        self.connection = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, 1, CATALOG_VERSION):
+            self.connection.close()
+            raise sqlite3.DatabaseError(f"{path}: unsupported catalog version {version}")
+        if version != CATALOG_VERSION:
+            with self.transaction():
+                # Version 1 was keyed by path: its rows are dropped, the next conversions record them again
+                for table in ('universes',) + tuple(SCHEMA):
+                    self.connection.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+                for statement in schema_statements():
+                    self.connection.execute(statement)
+                self.connection.execute(f"PRAGMA user_version={CATALOG_VERSION}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def transaction(self):
+        return _Transaction(self.connection)
+
+    def record(self, path, fingerprint, model, file_type=None, converter_version=None):
+        """Stores the model of a universe under its fingerprint and maps the path to it
+
+        The relation rows are only inserted when no universe has that fingerprint
+        (or it was recorded by another converter version). Returns False if the
+        path was already recorded with that content.
+        """
+        path = os.path.abspath(path)
+        with self.transaction():
+            row = self.connection.execute("SELECT id, converter_version FROM universes WHERE fingerprint = ?",
+                                          (fingerprint,)).fetchone()
+            unchanged = row is not None and row[1] == converter_version
+            if unchanged:
+                universe_id = row[0]
+            else:
+                if row is not None:
+                    self._delete_rows(row[0])
+                summary = model.summary()
+                universe_id = self.connection.execute(
+                    "INSERT OR REPLACE INTO universes (id, fingerprint, name, file_type, converter_version, "
+                    "recorded_at, tables, joins, objects) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (row[0] if row else None, fingerprint, os.path.basename(path), file_type, converter_version,
+                     time.time(), summary['tables'], summary['joins'], summary['objects'])).lastrowid
+                for relation, values in model_relations(model).items():
+                    columns = [column for column, _ in SCHEMA[relation]]
+                    self.connection.executemany(
+                        f"INSERT INTO {_quote(relation)} (universe_id, {', '.join(map(_quote, columns))}) "
+                        f"VALUES (?, {', '.join('?' * len(columns))})",
+                        ((universe_id,) + record for record in zip(*(values[column] for column in columns))))
+            previous = self.connection.execute("SELECT universe_id FROM universe_paths WHERE path = ?",
+                                               (path,)).fetchone()
+            if unchanged and previous == (universe_id,):
+                return False
+            self.connection.execute("INSERT OR REPLACE INTO universe_paths (path, universe_id, recorded_at) "
+                                    "VALUES (?, ?, ?)", (path, universe_id, time.time()))
+            if previous is not None and previous[0] != universe_id:
+                self._delete_unused(previous[0])
+        return True
+
+    def is_recorded(self, path, fingerprint, converter_version=None):
+        """True if the path is recorded with that fingerprint and converter version"""
+        row = self.connection.execute(
+            """SELECT u.fingerprint, u.converter_version FROM universe_paths p
+               JOIN universes u ON u.id = p.universe_id WHERE p.path = ?""", (os.path.abspath(path),)).fetchone()
+        return row == (fingerprint, converter_version)
+
+    def remove(self, path):
+        """Removes a path, and its universe rows once no other path uses them; returns False if it was not recorded"""
+        path = os.path.abspath(path)
+        with self.transaction():
+            row = self.connection.execute("SELECT universe_id FROM universe_paths WHERE path = ?",
+                                          (path,)).fetchone()
+            if row is None:
+                return False
+            self.connection.execute("DELETE FROM universe_paths WHERE path = ?", (path,))
+            self._delete_unused(row[0])
+        return True
+
+    def _delete_unused(self, universe_id):
+        """Deletes a universe and its rows if no path maps to it any more"""
+        if self.connection.execute("SELECT 1 FROM universe_paths WHERE universe_id = ? LIMIT 1",
+                                   (universe_id,)).fetchone() is None:
+            self._delete_rows(universe_id)
+            self.connection.execute("DELETE FROM universes WHERE id = ?", (universe_id,))
+
+    def _delete_rows(self, universe_id):
+        for relation in SCHEMA:
+            self.connection.execute(f"DELETE FROM {_quote(relation)} WHERE universe_id = ?", (universe_id,))
+
+    # Queries
+
+    def universes(self):
+        """(path, file type, tables, joins, objects) of every recorded path"""
+        return self.connection.execute(
+            """SELECT p.path, u.file_type, u.tables, u.joins, u.objects FROM universe_paths p
+               JOIN universes u ON u.id = p.universe_id ORDER BY p.path""").fetchall()
+
+    def universes_using_table(self, table):
+        """Paths of the universes with a table of that name, or joining on it"""
+        return [row[0] for row in self.connection.execute(
+            """SELECT path FROM universe_paths WHERE universe_id IN (
+                   SELECT universe_id FROM "tables" WHERE name = ?1
+                   UNION SELECT universe_id FROM "joins" WHERE left_table = ?1 OR right_table = ?1)
+               ORDER BY path""", (table,))]
+
+    def universes_using_object(self, name):
+        """(path, kind) of the universes defining a business object of that name"""
+        return self.connection.execute(
+            """SELECT p.path, o.kind FROM "objects" o JOIN universe_paths p ON p.universe_id = o.universe_id
+               WHERE o.name = ? ORDER BY p.path""", (name,)).fetchall()
+
+    def universes_using_column(self, column):
+        """(path, table) of the universes with a column of that name"""
+        return self.connection.execute(
+            """SELECT p.path, c."table" FROM "columns" c JOIN universe_paths p ON p.universe_id = c.universe_id
+               WHERE c.name = ? ORDER BY 1, 2""", (column,)).fetchall()
+
+    def stats(self):
+        """Row counts of every catalog table"""
+        counts = {table: self.connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                  for table in ('universes', 'universe_paths')}
+        for relation in SCHEMA:
+            counts[relation] = self.connection.execute(f"SELECT COUNT(*) FROM {_quote(relation)}").fetchone()[0]
+        return counts
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error) on an autocommit connection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        # IMMEDIATE takes the write lock up front, so concurrent writers wait instead of failing on upgrade
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the metadata catalog of converted universes")
+    parser.add_argument('catalog', nargs='?', default=DEFAULT_CATALOG_PATH,
+                        help="Catalog database written by universal_converter.py --catalog (default: ../catalog/universes.db)")
+    parser.add_argument('--table', help="Universes using a table")
+    parser.add_argument('--object', help="Universes defining a business object")
+    parser.add_argument('--column', help="Universes with a column")
+    parser.add_argument('--list', action='store_true', help="List the recorded universes")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.catalog):
+        print(f"❌ Catalog not found: {args.catalog}")
+        return False
+    with MetadataCatalog(args.catalog) as catalog:
+        if args.table:
+            for path in catalog.universes_using_table(args.table):
+                print(path)
+        elif args.object:
+            for path, kind in catalog.universes_using_object(args.object):
+                print(f"{path}\t{kind or ''}")
+        elif args.column:
+            for path, table in catalog.universes_using_column(args.column):
+                print(f"{path}\t{table}")
+        elif args.list:
+            for path, file_type, tables, joins, objects in catalog.universes():
+                print(f"{path}\t{file_type}\t{tables} tables\t{joins} joins\t{objects} objects")
+        else:
+            for name, count in catalog.stats().items():
+                print(f"{name}: {count}")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Columnar export of the parsed universe model
+Writes the tables, columns, joins, objects and contexts of a UniverseModel as
+relations of typed columns, so lineage tooling no longer has to re-parse the
+comments of the generated .qvs.
+
+The 'columnar' format only needs the standard library: a JSON directory
+followed by raw little-endian arrays, every string being stored once in a
+shared dictionary (UTF-8 data delimited by a u32 offsets array, so any string,
+NUL characters included, round-trips) and referenced by a u32 index (0 is
+null). Loading it is one read, one decode of the dictionary and one
+array.frombytes per column.
+With pyarrow installed, the 'parquet' format writes the same relations as
+Parquet files with dictionary-encoded string columns.
+"""
+
+import json
+import os
+import struct
+import sys
+from array import array
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+PYARROW_AVAILABLE = pyarrow is not None
+
+MAGIC = b'BQCM'
+FORMAT_VERSION = 2
+EXPORT_FORMATS = ('columnar', 'parquet')
+NULL_INT = -2 ** 63
+_HEADER = struct.Struct('<4sI')
+# array typecode of an unsigned 32-bit integer on this platform
+_U32 = 'I' if array('I').itemsize == 4 else 'L'
+_TYPECODES = {'str': _U32, 'int': 'q'}
+
+# relation -> ((column, type), ...); join_pairs.join is a row index of 'joins', context_joins.join_id a join id
+SCHEMA = {
+    'tables': (('id', 'int'), ('name', 'str')),
+    'columns': (('table', 'str'), ('name', 'str'), ('type', 'str')),
+    'joins': (('id', 'int'), ('expression', 'str'), ('left_table', 'str'), ('right_table', 'str'),
+              ('operator', 'str')),
+    'join_pairs': (('join', 'int'), ('left', 'str'), ('right', 'str')),
+    'objects': (('id', 'int'), ('name', 'str'), ('kind', 'str')),
+    'object_tables': (('object', 'str'), ('table', 'str')),
+    'object_columns': (('object', 'str'), ('table', 'str'), ('column', 'str')),
+    'contexts': (('id', 'int'), ('name', 'str')),
+    'context_joins': (('context', 'str'), ('join_id', 'int'))
+}
+
+class ExportFormatError(Exception):
+    """Raised when a columnar export file is invalid or unsupported"""
+
+def model_relations(model):
+    """Flattens a UniverseModel into {relation: {column: list of values}}"""
+    relations = {relation: {column: [] for column, _ in columns} for relation, columns in SCHEMA.items()}
+
+    def append(relation, *values):
+        for (column, _), value in zip(SCHEMA[relation], values):
+            relations[relation][column].append(value)
+
+    for table in model.tables.values():
+        append('tables', table.id, table.name)
+        for column in table.columns.values():
+            append('columns', table.name, column.name, column.type)
+    for row, join in enumerate(model.joins):
+        append('joins', join.id, join.expression, join.left_table, join.right_table, join.operator)
+        for left, right in join.pairs:
+            append('join_pairs', row, left, right)
+    for obj in model.objects.values():
+        append('objects', obj.id, obj.name, obj.kind)
+        for table in obj.tables:
+            append('object_tables', obj.name, table.name)
+        for column in obj.columns:
+            append('object_columns', obj.name, column.table.name, column.name)
+    for context in model.contexts.values():
+        append('contexts', context.id, context.name)
+        for join_id in context.joins:
+            append('context_joins', context.name, join_id)
+    return relations
+
+def _little_endian(values):
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values
+
+def write_columnar(relations, path):
+    """Writes relations in the standard library columnar format; returns the path"""
+    strings = {None: 0}
+    blobs = []
+    offset = 0
+    directory = {'format_version': FORMAT_VERSION, 'relations': {}}
+
+    def add_blob(data):
+        nonlocal offset
+        blobs.append(data)
+        offset += len(data)
+        return [offset - len(data), len(data)]
+
+    for relation, columns in SCHEMA.items():
+        values = relations[relation]
+        entry = {'rows': len(values[columns[0][0]]), 'columns': []}
+        for column, column_type in columns:
+            if column_type == 'str':
+                indexes = array(_U32, (strings.setdefault(value, len(strings)) for value in values[column]))
+            else:
+                indexes = array('q', (NULL_INT if value is None else value for value in values[column]))
+            entry['columns'].append([column, column_type] + add_blob(_little_endian(indexes).tobytes()))
+        directory['relations'][relation] = entry
+    encoded = [value.encode('utf-8') for value in list(strings)[1:]]
+    ends = array(_U32, [0])
+    for value in encoded:
+        ends.append(ends[-1] + len(value))
+    directory['strings'] = [len(encoded)] + add_blob(_little_endian(ends).tobytes()) + add_blob(b''.join(encoded))
+    header = json.dumps(directory, separators=(',', ':')).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, len(header)))
+        f.write(header)
+        for blob in blobs:
+            f.write(blob)
+    return path
+
+def read_columnar(path, relations=None):
+    """Reads a columnar export; returns {relation: {column: list of values}}
+
+    relations restricts the result to some relations (the others are not decoded).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ExportFormatError(f"{path}: truncated file")
+    magic, header_length = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ExportFormatError(f"{path}: not a columnar model export")
+    start = _HEADER.size + header_length
+    directory = json.loads(data[_HEADER.size:start].decode('utf-8'))
+    if directory.get('format_version') != FORMAT_VERSION:
+        raise ExportFormatError(f"{path}: unsupported format version {directory.get('format_version')}")
+    view = memoryview(data)
+    count, ends_offset, ends_length, offset, length = directory['strings']
+    ends = array(_U32)
+    ends.frombytes(view[start + ends_offset:start + ends_offset + ends_length])
+    _little_endian(ends)
+    dictionary = view[start + offset:start + offset + length].tobytes()
+    text = dictionary.decode('utf-8')
+    strings = [None]
+    if len(text) == len(dictionary):
+        # ASCII only: the byte offsets are character offsets, the dictionary is decoded once
+        strings.extend(text[ends[position]:ends[position + 1]] for position in range(count))
+    else:
+        strings.extend(dictionary[ends[position]:ends[position + 1]].decode('utf-8') for position in range(count))
+    result = {}
+    for relation, entry in directory['relations'].items():
+        if relations is not None and relation not in relations:
+            continue
+        columns = {}
+        for column, column_type, offset, length in entry['columns']:
+            values = array(_TYPECODES[column_type])
+            values.frombytes(view[start + offset:start + offset + length])
+            _little_endian(values)
+            if column_type == 'str':
+                columns[column] = list(map(strings.__getitem__, values))
+            elif NULL_INT in values:
+                columns[column] = [None if value == NULL_INT else value for value in values]
+            else:
+                columns[column] = values.tolist()
+        result[relation] = columns
+    return result
+
+def write_parquet(relations, directory):
+    """Writes one <relation>.parquet file per relation with pyarrow; returns the directory"""
+    if not PYARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required for the parquet export format")
+    os.makedirs(directory, exist_ok=True)
+    for relation, columns in SCHEMA.items():
+        arrays = []
+        for column, column_type in columns:
+            values = relations[relation][column]
+            if column_type == 'str':
+                arrays.append(pyarrow.array(values, pyarrow.string()).dictionary_encode())
+            else:
+                arrays.append(pyarrow.array(values, pyarrow.int64()))
+        table = pyarrow.Table.from_arrays(arrays, names=[column for column, _ in columns])
+        pyarrow.parquet.write_table(table, os.path.join(directory, f"{relation}.parquet"))
+    return directory
+
+def export_path(script_path, export_format='columnar'):
+    """Export next to the script: qlik_script_x.qvs -> qlik_script_x.model.bqm (or .model/ for parquet)"""
+    base = os.path.splitext(script_path)[0]
+    return f"{base}.model.bqm" if export_format == 'columnar' else f"{base}.model"
+
+def export_model(model, path, export_format='columnar'):
+    """Exports a UniverseModel; returns the written file (or directory for parquet)"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    relations = model_relations(model)
+    if export_format == 'parquet':
+        return write_parquet(relations, path)
+    return write_columnar(relations, path)
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+On-disk parse cache for universes
+Stores the parsed model of a universe as JSON, keyed by a content fingerprint
+(ZIP central directory CRCs and BO_checksum) plus the converter version, with
+size-bounded LRU eviction; MemoryParseCache keeps models in process (server mode)
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.environ.get('BO2QLIK_CACHE_DIR', '../cache')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 64
+
+# UniverseModel.to_lists fields stored in the cache
+MODEL_FIELDS = ('tables', 'joins', 'objects', 'dimensions', 'measures', 'attributes', 'join_records', 'contexts',
+                'table_columns', 'object_tables', 'table_ids', 'object_ids')
+
+def universe_fingerprint(zip_file):
+    """Hashes an open universe ZipFile without decompressing its members
+
+    The central directory already carries the CRC32 and size of every member;
+    UNV archives also embed a BO_checksum member, which is mixed in as well.
+    """
+    digest = hashlib.sha256()
+    for info in sorted(zip_file.infolist(), key=lambda info: info.filename):
+        digest.update(f"{info.filename}\0{info.CRC:08x}\0{info.file_size}\n".encode('utf-8'))
+    if 'BO_checksum' in zip_file.NameToInfo:
+        digest.update(zip_file.read('BO_checksum'))
+    return digest.hexdigest()
+
+def file_fingerprint(path):
+    """Fingerprint of a universe file, hashing the raw bytes if it is not a ZIP"""
+    try:
+        with zipfile.ZipFile(path, 'r') as zip_file:
+            return universe_fingerprint(zip_file)
+    except zipfile.BadZipFile:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+class ParseCache:
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(fingerprint, version):
+        return f"{version}-{fingerprint}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Returns the cached model for key, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                model = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Touch the entry: modification time is the LRU clock
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return model
+
+    def put(self, key, model):
+        """Stores a model atomically, then evicts least recently used entries"""
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(model, f, separators=(',', ':'))
+            os.replace(temp_path, self._path(key))
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.evict()
+
+    def entries(self):
+        """Lists (mtime, size, path) of cache entries, oldest first"""
+        entries = []
+        for file in os.listdir(self.cache_dir):
+            if not file.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, file)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        return removed
+
+class MemoryParseCache:
+    """In-process LRU of parsed models, with the get/put interface of ParseCache
+
+    Models are shared, not copied: callers must treat them as read-only. An
+    optional backing ParseCache is read on misses and written on puts, so a
+    restarted server warms up from disk. Thread-safe.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, backing=None):
+        self.max_entries = max_entries
+        self.backing = backing
+        self.hits = 0
+        self.misses = 0
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._models)
+
+    def get(self, key):
+        """Returns the cached model for key, or None"""
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+            self.misses += 1
+        if self.backing is not None:
+            model = self.backing.get(key)
+            if model is not None:
+                self._store(key, model)
+        return model
+
+    def put(self, key, model):
+        """Stores a model, evicting the least recently used ones beyond max_entries"""
+        self._store(key, model)
+        if self.backing is not None:
+            self.backing.put(key, model)
+
+    def _store(self, key, model):
+        with self._lock:
+            self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_entries:
+                self._models.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._models), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
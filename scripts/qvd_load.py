@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+QVD-buffered incremental loads
+Plans, from the datafoundation column types and the joins, how each table of
+the generated script is reloaded. Fact tables with an incremental key (a
+modification date/timestamp column, or their own integer id) get the standard
+QVD pattern: the max key is read from the stored QVD, only the newer rows are
+pulled from the source, the stored rows are concatenated with an optimized QVD
+load and the result is stored back. Lookups, and facts without a usable key,
+keep their full load.
+"""
+
+import re
+from functools import partial
+
+from join_analysis import join_columns, table_references
+from load_script import field_expressions, load_lines, loaded_fields, qlik_field, sql_column, sql_load_lines
+
+QVD_PATH_VARIABLE = 'BO2QLIK_QVD_PATH'  # Enables the incremental mode of unv2qlik_final and unx2qlik_converter
+DEFAULT_QVD_PATH = 'lib://QVD/'
+
+# Type and name patterns are matched case-insensitively on the datafoundation columns
+DATE_TYPE_PATTERN = re.compile(r'date|time', re.IGNORECASE)
+INTEGER_TYPE_PATTERN = re.compile(r'int|numeric|number|serial', re.IGNORECASE)
+CHANGE_NAME_PATTERN = re.compile(r'modif|update|change|last|load|insert|creat', re.IGNORECASE)
+FACT_NAME_PATTERN = re.compile(r'fact', re.IGNORECASE)
+LOOKUP_NAME_PATTERN = re.compile(r'lookup|lkp|dim|ref', re.IGNORECASE)
+def is_fact_table(table, referenced=(), referenced_by=()):
+    """Fact tables are named so, or reference several tables without being referenced or named as a lookup"""
+    if FACT_NAME_PATTERN.search(table):
+        return True
+    if LOOKUP_NAME_PATTERN.search(table):
+        return False
+    return len(referenced) >= 2 and not referenced_by
+
+def own_id_column(table, columns, foreign_keys=()):
+    """The integer id column of the table itself (Shop_facts_id, id), not a foreign key"""
+    names = {f"{table}_id".lower(), 'id'}
+    for name, column_type in columns:
+        if name.lower() in names and column_type and INTEGER_TYPE_PATTERN.search(column_type):
+            return name
+    for name, column_type in columns[:1]:
+        if (name.lower().endswith('_id') and name not in foreign_keys
+                and column_type and INTEGER_TYPE_PATTERN.search(column_type)):
+            return name
+    return None
+
+def incremental_key(table, columns, foreign_keys=()):
+    """(key column, 'date' or 'id') of a table, or None
+
+    A modification date/timestamp also picks up updated rows, so it wins over the
+    table's own id (new rows only), which wins over any other date column.
+    """
+    dates = [name for name, column_type in columns if column_type and DATE_TYPE_PATTERN.search(column_type)]
+    for name in dates:
+        if CHANGE_NAME_PATTERN.search(name):
+            return name, 'date'
+    primary_key = own_id_column(table, columns, foreign_keys)
+    if primary_key:
+        return primary_key, 'id'
+    if dates:
+        return dates[0], 'date'
+    return None
+
+def plan_loads(tables, table_columns, joins):
+    """{table: load plan} of the script tables
+
+    A plan is {'kind': 'fact' or 'lookup', 'key': column or None, 'key_type': 'date',
+    'id' or None, 'primary_key': column or None}; only facts with a key load incrementally.
+    """
+    references = table_references(joins, table_columns)
+    referenced_by = {}
+    for table, referenced in references.items():
+        for other in referenced:
+            referenced_by.setdefault(other, set()).add(table)
+    foreign_keys = {}
+    for expression in joins:
+        for table, column in join_columns(expression):
+            foreign_keys.setdefault(table, set()).add(column)
+    plans = {}
+    for table in tables:
+        columns = table_columns.get(table, [])
+        plan = {'kind': 'lookup', 'key': None, 'key_type': None, 'primary_key': None}
+        if is_fact_table(table, references.get(table, ()), referenced_by.get(table, ())):
+            plan['kind'] = 'fact'
+            key = incremental_key(table, columns, foreign_keys.get(table, ()))
+            if key:
+                plan['key'], plan['key_type'] = key
+                plan['primary_key'] = own_id_column(table, columns, foreign_keys.get(table, ()))
+        plans[table] = plan
+    return plans
+
+def is_incremental(plan):
+    return bool(plan and plan['kind'] == 'fact' and plan['key'])
+
+def qvd_path_setting(qvd_path):
+    """Script line defining the QVD folder variable"""
+    return f"SET vQvdPath = '{qvd_path}';"
+
+def _variable_name(table):
+    return 'vMaxKey_' + re.sub(r'\W', '_', table)
+
+def _indent(lines, indent="    "):
+    return [indent + line if line else line for line in lines]
+
+def render_incremental_load(table, plan, source, fields=None, sql=False, aliases=None, keys=()):
+    """QVD incremental load of a fact table (plan from plan_loads)
+
+    source is the FROM clause of a file load, or with sql the database table of a
+    LOAD over a SQL SELECT of fields. fields lists the loaded fields (LOAD * when
+    empty, file loads only); the key is added if missing. aliases and keys rename
+    fields and add composite keys to the source load (see field_expressions): the
+    QVD stores, and is read back with, the loaded names.
+    """
+    key = plan['key']
+    if fields and key not in fields:
+        fields = list(fields) + [key]
+    aliases = aliases or {}
+    expressions = field_expressions(fields, aliases, keys) if fields and (aliases or keys) else None
+    stored_fields = loaded_fields(fields, aliases, keys) if fields else fields
+    qvd = f"[$(vQvdPath){table}.qvd]"
+    variable = _variable_name(table)
+    max_table = f"{table}_MaxKey"
+    # Max and Exists read the QVD, whose fields have their loaded names
+    field = qlik_field(aliases.get(key, key))
+    if plan['key_type'] != 'date':
+        max_expression = f"Max({field})"
+        compared = sql_column(key) if sql else qlik_field(key)
+        bound = f"$({variable})"
+    elif sql:
+        # Compared in the database as a timestamp literal
+        max_expression = f"Timestamp(Max({field}), 'YYYY-MM-DD hh:mm:ss')"
+        compared, bound = sql_column(key), f"'$({variable})'"
+    else:
+        # Dates are compared as numbers, formatted so the expansion does not depend on the locale
+        max_expression = f"Num(Max({field}), '0.##########', '.', '')"
+        compared, bound = f"Num({qlik_field(key)})", f"$({variable})"
+    if plan['key_type'] == 'date' and plan['primary_key']:
+        # Rows changed since the last reload replace their stored version
+        primary_key = aliases.get(plan['primary_key'], plan['primary_key'])
+        where, stored_where = f"{compared} >= {bound}", f"NOT Exists({qlik_field(primary_key)})"
+    else:
+        where, stored_where = f"{compared} > {bound}", None
+    source_lines = partial(sql_load_lines if sql else load_lines, table, fields, source, expressions=expressions)
+    first_load = ["// First reload: full load"] + source_lines()
+    reload = [f"{max_table}:",
+              f"LOAD {max_expression} AS MaxKey",
+              f"FROM {qvd} (qvd);",
+              f"LET {variable} = Peek('MaxKey', 0, '{max_table}');",
+              f"DROP TABLE {max_table};",
+              "",
+              "// New and changed rows from the source"]
+    reload += source_lines(where)
+    reload += ["", "// Stored rows (optimized QVD load)", f"Concatenate ({table})"]
+    reload += load_lines(table, stored_fields, f"{qvd} (qvd)", stored_where, label=False)
+    lines = [f"// Loading table {table} (incremental on {key})",
+             f"IF IsNull(FileTime('$(vQvdPath){table}.qvd')) THEN"]
+    lines += _indent(first_load) + ["ELSE"] + _indent(reload)
+    lines += ["END IF", f"STORE {table} INTO {qvd} (qvd);"]
+    return '\n'.join(lines)
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""
+Streaming Qlik script writer
+Writes a script given as an iterable of text chunks straight to disk through
+a large write buffer, so generators never hold the whole .qvs in memory
+"""
+
+import os
+
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+def write_script(filepath, chunks, buffer_size=DEFAULT_BUFFER_SIZE, newline=None):
+    """Writes chunks (a string or an iterable of strings) to filepath
+
+    The script is streamed to a temporary file of the same directory and
+    renamed when complete: a generator failing halfway never leaves a
+    truncated script behind. newline is passed to open(). Returns filepath.
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    # Same directory (atomic rename) and default permissions, unlike mkstemp
+    temp_path = f"{filepath}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8', buffering=buffer_size, newline=newline) as f:
+            f.writelines(chunks)
+        os.replace(temp_path, filepath)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return filepath
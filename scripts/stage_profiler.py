@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Stage profiler for conversions
+Records per-stage wall time, CPU time, tracemalloc peak and bytes read, and
+optionally a cProfile of the whole run, written next to the generated script
+"""
+
+import contextlib
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+
+class StageProfiler:
+    def __init__(self, trace_memory=True, cprofile=False):
+        self.trace_memory = trace_memory
+        self.stages = []  # Finished stages, in start order
+        self.read_counter = None  # Callable returning the cumulative bytes read
+        self._stack = []
+        self._profile = cProfile.Profile() if cprofile else None
+        self._started_tracemalloc = False
+        self._start = None
+        self.total = None
+        self.running = False
+
+    def start(self):
+        """Starts the run (tracemalloc and cProfile if enabled)"""
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self._start = (time.perf_counter(), time.process_time())
+        self.running = True
+        if self._profile is not None:
+            self._profile.enable()
+
+    def stop(self):
+        """Stops the run; stages still open are closed"""
+        if not self.running:
+            return
+        self.running = False
+        if self._profile is not None:
+            self._profile.disable()
+        while self._stack:
+            self._end_stage()
+        self.total = {
+            'wall_seconds': time.perf_counter() - self._start[0],
+            'cpu_seconds': time.process_time() - self._start[1]
+        }
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def _bytes_read(self):
+        return self.read_counter() if self.read_counter else 0
+
+    def _fold_peak(self):
+        """Carries the current tracemalloc peak into every open stage before a reset"""
+        if tracemalloc.is_tracing():
+            peak = tracemalloc.get_traced_memory()[1]
+            for stage in self._stack:
+                stage['_peak'] = max(stage['_peak'], peak)
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """Times the enclosed block as a stage; stages may be nested"""
+        self._fold_peak()
+        current = 0
+        if tracemalloc.is_tracing():
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        stage = {
+            'name': name,
+            'depth': len(self._stack),
+            '_start': (time.perf_counter(), time.process_time(), self._bytes_read(), current),
+            '_peak': current
+        }
+        self.stages.append(stage)
+        self._stack.append(stage)
+        try:
+            yield stage
+        finally:
+            if self._stack and self._stack[-1] is stage:
+                self._end_stage()
+
+    def _end_stage(self):
+        self._fold_peak()
+        stage = self._stack.pop()
+        wall, cpu, bytes_read, current = stage.pop('_start')
+        peak = stage.pop('_peak')
+        stage['wall_seconds'] = time.perf_counter() - wall
+        stage['cpu_seconds'] = time.process_time() - cpu
+        stage['bytes_read'] = self._bytes_read() - bytes_read
+        if tracemalloc.is_tracing():
+            # Peak allocated above what was already allocated when the stage started
+            stage['peak_memory_bytes'] = max(0, peak - current)
+
+    def report(self):
+        return {
+            'tracemalloc': self.trace_memory,
+            'total': self.total,
+            'bytes_read': self._bytes_read(),
+            'stages': self.stages
+        }
+
+    def write(self, base_path, extra=None):
+        """Writes <base_path>.profile.json (and <base_path>.pstats with cProfile)
+
+        Returns the list of written paths.
+        """
+        report = dict(extra or {})
+        report.update(self.report())
+        json_path = f"{base_path}.profile.json"
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        paths = [json_path]
+        if self._profile is not None:
+            pstats_path = f"{base_path}.pstats"
+            self._profile.dump_stats(pstats_path)
+            paths.append(pstats_path)
+        return paths
+
+def profile_base_path(script_path):
+    """Profile files are named after the script: qlik_script_x.qvs -> qlik_script_x"""
+    return os.path.splitext(script_path)[0]
@@ -7,6 +7,7 @@ Validates Qlik script generation from a .unv and a .unx file
 import os
 import shutil
 import sys
+import tempfile
 import time
 import importlib.util
 
@@ -16,6 +17,7 @@ module = importlib.util.module_from_spec(spec)
 sys.modules["UniversalBO2QlikConverter"] = module
 spec.loader.exec_module(module)
 UniversalBO2QlikConverter = module.UniversalBO2QlikConverter
+run_batch = module.run_batch
 
 def run_test_unv():
     print("\n=== UNIVERSAL CONVERTER TEST - UNV MODE ===")
@@ -51,11 +53,37 @@ def run_test_unx():
     print(f"✅ Script generated for UNX: {files[-1]}")
     return True
 
+def run_test_batch():
+    print("\n=== UNIVERSAL CONVERTER TEST - BATCH MODE ===")
+    data_dir = os.path.abspath("../data")
+    # Outputs go to ../output of the working directory: run from a temporary one
+    temp_dir = tempfile.mkdtemp(prefix="bo2qlik_batch_test_")
+    work_dir = os.path.join(temp_dir, "work")
+    os.makedirs(work_dir)
+    original_cwd = os.getcwd()
+    os.chdir(work_dir)
+    try:
+        success = run_batch(data_dir, jobs=2)
+        assert success, "Batch conversion failed"
+        # Check one named output per universe
+        output_dir = os.path.join(temp_dir, "output")
+        for file in os.listdir(data_dir):
+            if file.endswith(('.unv', '.unx')):
+                stem, ext = os.path.splitext(file)
+                expected = f"qlik_script_{stem}_{ext[1:]}.qvs"
+                assert os.path.exists(os.path.join(output_dir, expected)), f"No batch output for {file}"
+                print(f"✅ Batch script generated: {expected}")
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return True
+
 def main():
     print("=== AUTOMATED TEST FOR UNIVERSAL CONVERTER ===")
     ok_unv = run_test_unv()
     ok_unx = run_test_unx()
-    if ok_unv and ok_unx:
+    ok_batch = run_test_batch()
+    if ok_unv and ok_unx and ok_batch:
         print("\n🎉 All universal converter tests PASSED!")
         sys.exit(0)
     else:
@@ -11,12 +11,40 @@ import shutil
 from unittest.mock import patch, MagicMock
 import sys
 import io
+import json
+import struct
+import threading
+import http.client
 
 # Ajouter le répertoire courant au path pour importer les modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 # Import de la classe principale
 from unv2qlik_final import UNV2QlikConverter
+from string_extractor import extract_strings, extract_strings_legacy
+from mapped_member import extract_mapped_strings, iter_mapped_identifiers, map_file
+from unv_reader import UniverseArchiveReader
+from parse_cache import MemoryParseCache, ParseCache, file_fingerprint
+from unv_storage import StorageFormatError, decode_contexts, decode_joins, decode_universe_storage
+from universe_model import UniverseModel
+from field_classifier import KeywordClassifier, load_keywords
+from script_writer import write_script
+from stage_profiler import StageProfiler
+from benchmark_suite import check_limits, compare_with_baseline
+from create_test_unv import create_sized_unv
+from conversion_server import ConversionService, create_server
+from async_pipeline import run_pipeline
+from universal_converter import UniversalBO2QlikConverter, convert_universe, main as universal_converter_main, run_batch
+from incremental import load_manifest, write_incremental
+from member_parser import unv_member_tasks
+from metadata_catalog import MetadataCatalog
+from join_analysis import join_cardinality, lookup_join, table_references
+from association_analysis import association_loops, field_index, plan_associations, synthetic_keys
+from fact_model import LINK_KEY, context_fact, context_joins, plan_star_schema, render_fact_load, render_link_table
+from qvd_load import incremental_key, plan_loads, render_incremental_load
+from model_export import PYARROW_AVAILABLE, ExportFormatError, export_model, model_relations, read_columnar, write_columnar
+from universe_generator import UniverseGenerator, generate_universe
+from unx_parser import BUSINESSLAYER_MEMBER, DATAFOUNDATION_MEMBER, parse_businesslayer, parse_datafoundation
 
 class TestUNV2QlikConverter(unittest.TestCase):
     """Tests unitaires pour la classe UNV2QlikConverter"""
@@ -282,6 +310,1221 @@ class TestFileOperations(unittest.TestCase):
             self.assertIn('Tables;', file_list)
             self.assertIn('Joins;', file_list)
 
+class TestUniverseArchiveReader(unittest.TestCase):
+    """Tests pour la lecture directe dans l'archive UNV"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.unv_path = os.path.join(self.temp_dir, 'test.unv')
+        with zipfile.ZipFile(self.unv_path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr('Columns;', 'Shop_id Shop_name Sales_revenue\n')
+            zip_file.writestr('Columns Id;', b'\x00\x01')
+            zip_file.writestr('Tables;', b'\x00\x01\x02Shop_facts\x03\x04\x05Article_lookup')
+            zip_file.writestr('Joins;', b'\x00\x01\x02Week_id\x03\x04\x05Shop_id')
+            zip_file.writestr('UNW_Storage/', b'')
+            zip_file.writestr('UNW_Storage/Hierarchies/Hierarchies', b'\x00\x00\x00\x00')
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_members(self):
+        """Les membres sont trouvés sans extraction"""
+        with UniverseArchiveReader(self.unv_path) as reader:
+            self.assertEqual(reader.find_member('Columns', ('Id;', 'References;')), 'Columns;')
+            self.assertEqual(reader.storage_members(), ['UNW_Storage/Hierarchies/Hierarchies'])
+            self.assertEqual(reader.storage_member('Hierarchies'), 'UNW_Storage/Hierarchies/Hierarchies')
+            self.assertIsNone(reader.storage_member('Joins'))
+            with reader.open_member('Tables;') as f:
+                self.assertIn(b'Shop_facts', f.read())
+    
+    def test_converter_reads_from_archive(self):
+        """Le convertisseur parse l'archive sans écrire sur disque"""
+        converter = UNV2QlikConverter()
+        converter.archive = UniverseArchiveReader(self.unv_path)
+        try:
+            self.assertIn('Sales_revenue', converter.parse_columns_file())
+            self.assertIn('Shop_facts', converter.parse_tables_file())
+            self.assertIn('Week_id', converter.parse_joins_file())
+        finally:
+            converter.close_archive()
+        self.assertEqual(os.listdir(self.temp_dir), ['test.unv'])
+
+class TestUNWStorageDecoder(unittest.TestCase):
+    """Tests pour le décodeur des enregistrements binaires UNW_Storage"""
+    
+    EFASHION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+    
+    @staticmethod
+    def string(value):
+        return struct.pack('<I', len(value)) + value
+    
+    def join_record(self, join_id, template, references):
+        body = struct.pack('<I4I2I', join_id, 0, 0, 0, 0, references[0][0], references[1][0])
+        body += self.string(template) + struct.pack('<I', 0x88) + b'\x00' * 10
+        body += struct.pack('<I', len(references))
+        for table_id, column in references:
+            body += struct.pack('<I', table_id) + self.string(column)
+        return struct.pack('<I', len(body) + 4) + body
+    
+    def test_decode_joins(self):
+        """Les jointures simples et composées sont décodées avec leurs colonnes"""
+        data = struct.pack('<I', 2)
+        data += self.join_record(112, b'=', [(1, b'Week_id'), (2, b'Week_id')])
+        data += self.join_record(121, b'\x01=\x01 and \x01=\x01', [(1, b'A_id'), (2, b'A_id'), (1, b'C_id'), (2, b'C_id')])
+        joins = decode_joins(data, {1: 'Shop_facts', 2: 'Calendar_year_lookup'})
+        self.assertEqual(joins[0]['expression'], 'Shop_facts.Week_id=Calendar_year_lookup.Week_id')
+        self.assertEqual(joins[0]['operator'], '=')
+        self.assertEqual(joins[1]['expression'], 'Shop_facts.A_id=Calendar_year_lookup.A_id and Shop_facts.C_id=Calendar_year_lookup.C_id')
+        self.assertEqual(joins[1]['pairs'][1], ('Shop_facts.C_id', 'Calendar_year_lookup.C_id'))
+        self.assertEqual(decode_joins(data)[0]['left_table'], '#1')
+    
+    def test_decode_contexts(self):
+        """Les contextes sont décodés avec la liste de leurs jointures"""
+        body = struct.pack('<I', 45) + self.string(b'Promotions') + struct.pack('<I', 0) + struct.pack('<3I', 2, 112, 113)
+        data = struct.pack('<I', 1) + struct.pack('<I', len(body) + 4) + body
+        self.assertEqual(decode_contexts(data), [{'id': 45, 'name': 'Promotions', 'joins': [112, 113]}])
+    
+    def test_truncated_member(self):
+        """Un membre tronqué lève StorageFormatError"""
+        data = struct.pack('<I', 1) + self.join_record(112, b'=', [(1, b'Week_id'), (2, b'Week_id')])[:-5]
+        with self.assertRaises(StorageFormatError):
+            decode_joins(data)
+    
+    def test_efashion_storage(self):
+        """Les jointures et contextes réels d'eFashion sont décodés"""
+        with UniverseArchiveReader(self.EFASHION) as reader:
+            storage = decode_universe_storage(reader)
+        expressions = [join['expression'] for join in storage['joins']]
+        self.assertEqual(len(expressions), 9)
+        self.assertIn('Shop_facts.Week_id=Calendar_year_lookup.Week_id', expressions)
+        contexts = {context['name']: context['joins'] for context in storage['contexts']}
+        self.assertEqual(sorted(contexts), ['Promotions', 'Shop facts'])
+        self.assertEqual(len(contexts['Shop facts']), 5)
+
+class TestParseCache(unittest.TestCase):
+    """Tests pour le cache de parsing sur disque"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = ParseCache(os.path.join(self.temp_dir, 'cache'))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def write_unv(self, name, tables):
+        path = os.path.join(self.temp_dir, name)
+        with zipfile.ZipFile(path, 'w') as zip_file:
+            zip_file.writestr('Tables;', tables)
+            zip_file.writestr('BO_checksum', b'\x01\x02')
+        return path
+    
+    def test_get_put(self):
+        """Un modèle stocké est relu à l'identique"""
+        model = {'tables': ['Shop_facts'], 'joins': [], 'objects': ['Shop_id']}
+        self.assertIsNone(self.cache.get('k1'))
+        self.cache.put('k1', model)
+        self.assertEqual(self.cache.get('k1'), model)
+    
+    def test_fingerprint_follows_content(self):
+        """L'empreinte change avec le contenu, pas avec le nom du fichier"""
+        first = file_fingerprint(self.write_unv('a.unv', b'Shop_facts'))
+        self.assertEqual(first, file_fingerprint(self.write_unv('b.unv', b'Shop_facts')))
+        self.assertNotEqual(first, file_fingerprint(self.write_unv('c.unv', b'Article_lookup')))
+    
+    def test_lru_eviction(self):
+        """Les entrées les moins récemment utilisées sont évincées"""
+        self.cache.max_bytes = 150
+        payload = {'tables': ['x' * 40]}
+        self.cache.put('old', payload)
+        self.cache.put('recent', payload)
+        # Rendre 'old' plus ancien puis utiliser 'recent'
+        os.utime(self.cache._path('old'), (1, 1))
+        self.cache.get('recent')
+        self.cache.put('new', payload)
+        self.assertIsNone(self.cache.get('old'))
+        self.assertIsNotNone(self.cache.get('recent'))
+        self.assertIsNotNone(self.cache.get('new'))
+    
+    def test_memory_cache(self):
+        """Le cache mémoire évince le moins récemment utilisé et se réchauffe depuis le disque"""
+        memory = MemoryParseCache(max_entries=2, backing=self.cache)
+        memory.put('a', {'tables': ['A']})
+        memory.put('b', {'tables': ['B']})
+        memory.get('a')
+        memory.put('c', {'tables': ['C']})
+        self.assertEqual(len(memory), 2)
+        self.assertEqual(memory.stats()['hits'], 1)
+        # 'b' n'est plus en mémoire mais reste sur disque
+        self.assertEqual(memory.get('b'), {'tables': ['B']})
+        self.assertIsNone(MemoryParseCache().get('b'))
+
+class TestStringExtractor(unittest.TestCase):
+    """Tests pour l'extracteur de chaînes binaires"""
+    
+    def test_matches_legacy_loop(self):
+        """Le résultat est identique à l'ancienne boucle octet par octet"""
+        data = b'abc\x00Shop_facts\x01\x02Week_id\x7fWeek_id\x80\xffTail'
+        self.assertEqual(extract_strings(data), extract_strings_legacy(data))
+        self.assertEqual(extract_strings(data), ['Shop_facts', 'Week_id', 'Week_id', 'Tail'])
+    
+    def test_offsets_and_dedup(self):
+        """Les offsets sont retournés et les doublons supprimés dans l'ordre"""
+        data = memoryview(b'\x00\x00Week_id\x00Week_id\x00Shop_id')
+        result = extract_strings(data, dedup=True, with_offsets=True)
+        self.assertEqual(result, [(2, 'Week_id'), (18, 'Shop_id')])
+        self.assertEqual(extract_strings(data, dedup=True), ['Week_id', 'Shop_id'])
+
+class TestUniverseModel(unittest.TestCase):
+    """Tests pour le modèle indexé de l'univers"""
+    
+    def setUp(self):
+        self.model = UniverseModel.from_lists(
+            tables=['Shop_facts', 'Outlet_Lookup'],
+            joins=['Outlet_Lookup.Shop_id=Shop_facts.Shop_id'],
+            objects=['Shop_id', 'Shop_name', 'Sales_revenue', 'Shop_id'],
+            dimensions=['Shop_id', 'Shop_name'],
+            measures=['Sales_revenue'],
+            table_columns={
+                'Shop_facts': [('Shop_id', 'Numeric'), ('Sales_revenue', 'Numeric')],
+                'Outlet_Lookup': [('Shop_id', 'Numeric'), ('Shop_name', 'Character')]
+            },
+            contexts=[{'id': 46, 'name': 'Shop facts', 'joins': [114]}]
+        )
+    
+    def test_indexes(self):
+        """Les tables et objets sont indexés par nom, sans doublons"""
+        self.assertEqual(list(self.model.tables), ['Shop_facts', 'Outlet_Lookup'])
+        self.assertEqual(list(self.model.objects), ['Shop_id', 'Shop_name', 'Sales_revenue'])
+        self.assertEqual(self.model.object('Sales_revenue').kind, 'Measure')
+        self.assertTrue(self.model.has_table('Outlet_Lookup'))
+        self.assertFalse(self.model.has_object('Unknown'))
+        self.assertEqual(self.model.contexts['Shop facts'].joins, [114])
+        self.assertEqual(self.model.summary()['columns'], 4)
+    
+    def test_adjacency(self):
+        """Les objets sont reliés aux colonnes qui portent leur nom"""
+        self.assertEqual([t.name for t in self.model.tables_with_column('Shop_id')], ['Shop_facts', 'Outlet_Lookup'])
+        self.assertEqual([o.name for o in self.model.objects_of_table('Outlet_Lookup')], ['Shop_id', 'Shop_name'])
+        shop_id = self.model.object('Shop_id')
+        self.assertEqual(len(shop_id.columns), 2)
+        self.assertIs(shop_id.columns[0].table, self.model.table('Shop_facts'))
+    
+    def test_join_records(self):
+        """Les jointures décodées sont indexées par identifiant"""
+        model = UniverseModel.from_lists(join_records=[{
+            'id': 112, 'expression': 'A.x=B.x', 'left_table': 'A', 'right_table': 'B',
+            'operator': '=', 'pairs': [['A.x', 'B.x']]
+        }])
+        self.assertEqual(model.joins_by_id[112].pairs, (('A.x', 'B.x'),))
+        self.assertEqual(model.joins[0].left_table, 'A')
+
+class TestFieldClassifier(unittest.TestCase):
+    """Tests pour le classificateur de champs par mots-clés"""
+    
+    def test_matches_keyword_loop(self):
+        """Le résultat est identique au test any(keyword in field.lower())"""
+        categories = {'dimension': ['id', 'Country', 'city'], 'measure': ['count', 'Sales']}
+        fields = ['Shop_ID', 'Country_name', 'Store_count', 'SALES_revenue', 'Margin', 'Velocity']
+        flags = KeywordClassifier(categories).classify(fields)
+        for name, keywords in categories.items():
+            expected = [int(any(k.lower() in f.lower() for k in keywords)) for f in fields]
+            self.assertEqual(list(flags[name]), expected)
+    
+    def test_selected_and_empty_categories(self):
+        """Seules les catégories demandées sont calculées, une catégorie vide ne trouve rien"""
+        classifier = KeywordClassifier({'dimension': [], 'measure': ['cost']})
+        flags = classifier.classify(['Promotion_cost', 'Week_id'], ('measure',))
+        self.assertEqual(list(flags), ['measure'])
+        self.assertEqual(list(flags['measure']), [1, 0])
+        self.assertEqual(list(classifier.classify(['Week_id'])['dimension']), [0])
+        self.assertTrue(classifier.matches('PROMOTION_COST', 'measure'))
+    
+    def test_keywords_from_config(self):
+        """Les mots-clés d'un fichier JSON remplacent ceux par défaut, catégorie par catégorie"""
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            f.write('{"measure": ["margin"]}')
+        try:
+            categories = load_keywords(f.name, {'dimension': ['id'], 'measure': ['cost']})
+            self.assertEqual(categories, {'dimension': ['id'], 'measure': ['margin']})
+        finally:
+            os.unlink(f.name)
+
+class TestScriptWriter(unittest.TestCase):
+    """Tests pour l'écriture en flux du script Qlik"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'script.qvs')
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_streamed_script_is_identical(self):
+        """Le fichier écrit en flux est identique au script généré en mémoire"""
+        converter = UNV2QlikConverter()
+        converter.tables = ['Shop_facts', 'Article_lookup']
+        converter.fields = ['Shop_id', 'Sales_revenue', 'Libellé']
+        converter.dimensions = ['Shop_id']
+        converter.measures = ['Sales_revenue']
+        converter.joins = ['Shop_facts.Shop_id=Outlet_Lookup.Shop_id']
+        write_script(self.path, converter.iter_qlik_script(), buffer_size=16)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), converter.generate_qlik_script().encode('utf-8'))
+    
+    def test_failed_generation_leaves_no_file(self):
+        """Une erreur pendant la génération ne laisse ni script tronqué ni fichier temporaire"""
+        def chunks():
+            yield "// début\n"
+            raise RuntimeError("génération interrompue")
+        with self.assertRaises(RuntimeError):
+            write_script(self.path, chunks())
+        self.assertEqual(os.listdir(self.temp_dir), [])
+
+class TestStageProfiler(unittest.TestCase):
+    """Tests pour le profilage par étape"""
+    
+    def test_nested_stages(self):
+        """Les étapes imbriquées sont mesurées et écrites en JSON"""
+        counter = [0]
+        profiler = StageProfiler()
+        profiler.read_counter = lambda: counter[0]
+        profiler.start()
+        with profiler.stage('parse'):
+            counter[0] += 100
+            with profiler.stage('categorize'):
+                data = [str(i) for i in range(10000)]
+        profiler.stop()
+        names = [(stage['name'], stage['depth']) for stage in profiler.stages]
+        self.assertEqual(names, [('parse', 0), ('categorize', 1)])
+        parse, categorize = profiler.stages
+        self.assertEqual(parse['bytes_read'], 100)
+        self.assertGreater(categorize['peak_memory_bytes'], 0)
+        self.assertGreaterEqual(parse['peak_memory_bytes'], categorize['peak_memory_bytes'])
+        self.assertIsNotNone(profiler.total)
+        temp_dir = tempfile.mkdtemp()
+        try:
+            paths = profiler.write(os.path.join(temp_dir, 'script'), {'file': 'x.unv'})
+            self.assertEqual([os.path.basename(path) for path in paths], ['script.profile.json'])
+            with open(paths[0], 'r', encoding='utf-8') as f:
+                self.assertIn('"categorize"', f.read())
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+class TestBenchmarkSuite(unittest.TestCase):
+    """Tests pour la suite de benchmarks"""
+    
+    def test_limits_and_regressions(self):
+        """Les limites de PERFORMANCE_CONFIG et les régressions sont détectées"""
+        limits = {'max_execution_time': 30, 'max_memory_usage': 100, 'large_file_size': 10}
+        ok = {'success': True, 'seconds': 2.0, 'memory_mb': 50.0}
+        self.assertEqual(check_limits(ok, limits), [])
+        self.assertEqual(len(check_limits({'success': False, 'seconds': 31.0, 'memory_mb': 120.0}, limits)), 3)
+        self.assertEqual(compare_with_baseline(ok, None), [])
+        self.assertEqual(compare_with_baseline(ok, {'seconds': 1.8, 'memory_mb': 48.0}), [])
+        self.assertEqual(len(compare_with_baseline(ok, {'seconds': 1.0, 'memory_mb': 20.0})), 2)
+    
+    def test_sized_universe(self):
+        """Un univers de taille donnée est lisible par le convertisseur"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = create_sized_unv(os.path.join(temp_dir, 'sized.unv'), 64 * 1024)
+            with zipfile.ZipFile(path) as zip_file:
+                size = sum(info.file_size for info in zip_file.infolist())
+                self.assertGreaterEqual(size, 64 * 1024)
+                self.assertLess(size, 70 * 1024)
+                self.assertIn('Column_0000000_id', zip_file.read('Columns;').decode('utf-8'))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+class TestUniverseGenerator(unittest.TestCase):
+    """Tests pour le générateur d'univers synthétiques"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_generated_unv(self):
+        """Les tables, jointures et contextes générés sont décodés depuis UNW_Storage"""
+        path = generate_universe(os.path.join(self.temp_dir, 'synthetic.unv'), tables=20, columns_per_table=6,
+                                 joins=25, contexts=3, objects=50)
+        with UniverseArchiveReader(path) as reader:
+            storage = decode_universe_storage(reader)
+            columns = reader.read_member('Columns;').decode('utf-8').split()
+        self.assertEqual(len(storage['tables']), 20)
+        self.assertEqual(len(storage['tables'][0]['columns']), 6)
+        self.assertEqual(len(storage['joins']), 25)
+        self.assertEqual(storage['joins'][0]['expression'], 'Table_0000000.Table_0000000_id=Table_0000001.Table_0000000_id')
+        self.assertEqual(len(storage['joins'][-1]['pairs']), 2)
+        self.assertEqual(sorted(len(context['joins']) for context in storage['contexts']), [8, 8, 9])
+        self.assertEqual(len(columns), 50)
+    
+    def test_generated_unx(self):
+        """Les membres XML générés sont lus par le parseur UNX"""
+        path = generate_universe(os.path.join(self.temp_dir, 'synthetic.unx'), tables=10, joins=12, objects=30)
+        with UniverseArchiveReader(path) as reader:
+            datafoundation = parse_datafoundation(reader.open_member(DATAFOUNDATION_MEMBER))
+            businesslayer = parse_businesslayer(reader.open_member(BUSINESSLAYER_MEMBER))
+        self.assertEqual(len(datafoundation['tables']), 10)
+        self.assertEqual(len(datafoundation['joins']), 12)
+        self.assertEqual(len(datafoundation['columns']['Table_0000003']), 10)
+        self.assertEqual(len(businesslayer['objects']), 30)
+        name, _ = businesslayer['objects'][3]
+        self.assertEqual(businesslayer['bindings'][name], ['Table_0000003'])
+    
+    def test_deterministic(self):
+        """Un même seed produit la même topologie de jointures"""
+        self.assertEqual(UniverseGenerator(50, seed=7).parents, UniverseGenerator(50, seed=7).parents)
+        self.assertNotEqual(UniverseGenerator(50, seed=7).parents, UniverseGenerator(50, seed=8).parents)
+        with self.assertRaises(ValueError):
+            generate_universe(os.path.join(self.temp_dir, 'synthetic.txt'))
+
+class TestConversionServer(unittest.TestCase):
+    """Tests pour le serveur de conversion (--serve)"""
+    
+    EFASHION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+    
+    def setUp(self):
+        self.server = create_server(ConversionService(), port=0, workers=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+    
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+    
+    def request(self, method, path, body=None, headers=None):
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=30)
+        try:
+            connection.request(method, path, body, headers or {})
+            response = connection.getresponse()
+            return response.status, response.getheader('X-Cache'), response.read().decode('utf-8')
+        finally:
+            connection.close()
+    
+    def convert_path(self, path):
+        return self.request('POST', '/convert', json.dumps({'path': path}), {'Content-Type': 'application/json'})
+    
+    def test_cached_conversion(self):
+        """La deuxième conversion d'un univers utilise le modèle en mémoire"""
+        status, cache, script = self.convert_path(self.EFASHION)
+        self.assertEqual((status, cache), (200, 'miss'))
+        self.assertIn('Shop_facts', script)
+        status, cache, cached_script = self.convert_path(self.EFASHION)
+        self.assertEqual((status, cache), (200, 'hit'))
+        self.assertEqual(cached_script.split('\n')[3:], script.split('\n')[3:])
+    
+    def test_upload(self):
+        """Un univers envoyé dans le corps de la requête est converti"""
+        with open(self.EFASHION, 'rb') as f:
+            status, _, script = self.request('POST', '/convert?name=eFashion.unv', f.read())
+        self.assertEqual(status, 200)
+        self.assertIn('Shop_facts', script)
+    
+    def test_errors_and_health(self):
+        """Les erreurs renvoient un statut 4xx et sont comptées"""
+        self.assertEqual(self.convert_path('/missing/universe.unv')[0], 404)
+        self.assertEqual(self.request('POST', '/convert?name=bad.unv', b'not a zip')[0], 422)
+        self.assertEqual(self.request('POST', '/convert?name=bad.txt', b'')[0], 400)
+        status, _, body = self.request('GET', '/health')
+        health = json.loads(body)
+        self.assertEqual(status, 200)
+        self.assertEqual((health['requests'], health['failures']), (3, 3))
+
+    def test_error_closes_connection(self):
+        """Une erreur envoyée avant la lecture du corps ferme la connexion: la requête suivante reste valide"""
+        connection = http.client.HTTPConnection('127.0.0.1', self.server.server_address[1], timeout=30)
+        try:
+            for path in ('/convert?name=bad.txt', '/unknown'):
+                connection.request('POST', path, b'x' * 4096)
+                response = connection.getresponse()
+                response.read()
+                self.assertEqual(response.getheader('Connection'), 'close')
+                connection.request('GET', '/health')
+                response = connection.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertEqual(json.loads(response.read())['status'], 'ok')
+        finally:
+            connection.close()
+
+class TestAsyncPipeline(unittest.TestCase):
+    """Tests pour le pipeline asyncio du mode batch"""
+    
+    EFASHION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.work_dir = os.path.join(self.temp_dir, 'work')
+        os.makedirs(self.work_dir)
+        self.original_cwd = os.getcwd()
+        os.chdir(self.work_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def read_script(self, name):
+        with open(os.path.join(self.temp_dir, 'output', name), 'r', encoding='utf-8') as f:
+            return [line for line in f if not line.startswith('// Generation date:')]
+    
+    def test_preloaded_reader(self):
+        """Un lecteur sur des membres décompressés se comporte comme le lecteur ZIP"""
+        with UniverseArchiveReader(self.EFASHION) as reader:
+            members = reader.preload()
+            self.assertEqual(reader.read_member('Columns;'), members['Columns;'])
+        memory_reader = UniverseArchiveReader.from_members(members)
+        self.assertTrue(memory_reader.has_member('Tables;'))
+        self.assertEqual(len(decode_universe_storage(memory_reader)['joins']), 9)
+    
+    def test_pipeline(self):
+        """Le pipeline produit les mêmes scripts que la conversion séquentielle et isole les échecs"""
+        synthetic = generate_universe(os.path.join(self.temp_dir, 'synthetic.unx'), tables=30)
+        universes = [(self.EFASHION, 'efashion.qvs'), (synthetic, 'synthetic.qvs'),
+                     (os.path.join(self.temp_dir, 'missing.unv'), 'missing.qvs')]
+        results, stage_seconds = run_pipeline(universes, workers=1)
+        self.assertEqual(sorted(stage_seconds), sorted(['read', 'decompress', 'parse', 'generate', 'write']))
+        status = {os.path.basename(result['file']): result['success'] for result in results}
+        self.assertEqual(status, {'eFashion.unv': True, 'synthetic.unx': True, 'missing.unv': False})
+        pipelined = self.read_script('efashion.qvs')
+        self.assertTrue(convert_universe(self.EFASHION, 'efashion_sequential.qvs')['success'])
+        self.assertEqual(pipelined, self.read_script('efashion_sequential.qvs'))
+    
+    def test_process_workers(self):
+        """Avec plusieurs workers, l'analyse se fait dans des processus"""
+        results, _ = run_pipeline([(self.EFASHION, 'a.qvs'), (self.EFASHION, 'b.qvs')], workers=2)
+        self.assertTrue(all(result['success'] for result in results))
+        self.assertEqual(self.read_script('a.qvs'), self.read_script('b.qvs'))
+    
+    def test_unsupported_options(self):
+        """Le profilage n'est pas ignoré en silence avec --pipeline: la commande est refusée"""
+        for option in ('--profile', '--pstats'):
+            log = io.StringIO()
+            argv = ['universal_converter.py', '--batch', self.temp_dir, '--pipeline', option]
+            with patch('sys.argv', argv), patch('sys.stdout', log):
+                self.assertFalse(universal_converter_main())
+            self.assertIn("--profile and --pstats are not supported with --pipeline", log.getvalue())
+
+class TestIncrementalGeneration(unittest.TestCase):
+    """Tests pour la génération incrémentale par sections"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.script_path = os.path.join(self.temp_dir, 'script.qvs')
+        self.converter = UniversalBO2QlikConverter()
+        self.converter.file_path = 'eFashion.unv'
+        self.converter.file_type = 'unv'
+        self.lists = {'tables': ['Shop_facts', 'Article_lookup', 'Calendar_year_lookup'],
+                      'joins': ['Shop_facts.Week_id=Calendar_year_lookup.Week_id'],
+                      'dimensions': ['Article_label'], 'measures': ['Sales_revenue', 'Margin']}
+        self.converter.build_model(**self.lists)
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def write(self):
+        return write_incremental(self.script_path, self.converter.script_sections(), 'test')
+    
+    def read_script(self):
+        with open(self.script_path, 'r', encoding='utf-8') as f:
+            return [line for line in f if not line.startswith('// Generation date:')]
+    
+    def full_script(self):
+        script = self.converter.generate_qlik_script()
+        return [line for line in script.splitlines(True) if not line.startswith('// Generation date:')]
+    
+    def test_full_then_unchanged(self):
+        """La première exécution génère tout, la suivante ne réécrit rien"""
+        report = self.write()
+        self.assertTrue(report['full'])
+        self.assertEqual(self.read_script(), self.full_script())
+        self.assertEqual(len(load_manifest(self.script_path)['sections']), 9)
+        report = self.write()
+        self.assertFalse(report['written'])
+        self.assertEqual((report['added'], report['removed'], report['changed']), ([], [], []))
+    
+    def test_changed_sections(self):
+        """Seules les sections modifiées sont régénérées, le script reste identique à une génération complète"""
+        self.write()
+        self.lists['tables'][1] = 'Article_color_lookup'
+        self.lists['measures'].append('Quantity_sold')
+        self.converter.build_model(**self.lists)
+        report = self.write()
+        self.assertEqual(report['added'], ['table:Article_color_lookup', 'measure:Quantity_sold'])
+        self.assertEqual(report['removed'], ['table:Article_lookup'])
+        # L'en-tête compte les objets, dont la nouvelle mesure
+        self.assertEqual(report['changed'], ['header', 'fields'])
+        # Tables, joins, measures and footer left unchanged are copied from the previous script
+        self.assertEqual((report['rendered'], report['copied']), (4, 6))
+        self.assertEqual(self.read_script(), self.full_script())
+    
+    def test_renamed_context(self):
+        """Renommer le contexte d'un fait concaténé régénère sa section"""
+        lists = {'tables': TestFactModel.TABLES, 'table_columns': TestFactModel.COLUMNS, 'joins': TestFactModel.JOINS,
+                 'contexts': [{'id': 1, 'name': 'Sales', 'joins': [1, 2]}, {'id': 2, 'name': 'Budget', 'joins': [3, 4]}]}
+        self.converter.build_model(**lists)
+        self.write()
+        lists['contexts'][1]['name'] = 'Forecast'
+        self.converter.build_model(**lists)
+        report = self.write()
+        self.assertEqual(report['changed'], ['table:Budget', 'associations'])
+        self.assertEqual(self.read_script(), self.full_script())
+        self.assertIn("// Loading table Budget into Facts (context Forecast)\n", self.read_script())
+    
+    def test_edited_script(self):
+        """Un script modifié à la main invalide le manifeste"""
+        self.write()
+        with open(self.script_path, 'a', encoding='utf-8') as f:
+            f.write('// manual edit\n')
+        self.assertIsNone(load_manifest(self.script_path))
+        self.assertTrue(self.write()['full'])
+        self.assertEqual(self.read_script(), self.full_script())
+
+class TestMappedMember(unittest.TestCase):
+    """Tests pour la lecture par mmap des fichiers extraits"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.original_cwd = os.getcwd()
+        os.chdir(self.temp_dir)
+    
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def write(self, name, data):
+        with open(name, 'wb') as f:
+            f.write(data)
+    
+    def test_windows_match_whole_buffer(self):
+        """Le découpage en fenêtres ne coupe ni ne perd aucune chaîne"""
+        data = b'\x00Shop_facts\x01Week_id\x02\x03Article_lookup_table\x00ab\x7fTail' * 50
+        self.write('Tables', data)
+        with map_file('Tables') as mapped:
+            for window_size in (1, 5, 64, 1 << 20):
+                self.assertEqual(extract_mapped_strings(mapped, window_size=window_size), extract_strings(data))
+            self.assertEqual(extract_mapped_strings(mapped, dedup=True),
+                             ['Shop_facts', 'Week_id', 'Article_lookup_table', 'Tail'])
+    
+    def test_identifiers_match_text_regex(self):
+        """Les identifiants sont ceux de la regex texte, accents compris"""
+        text = 'Shop_id Prénom été_2 Week_id\n9abc _x Café Sales_revenue\n'
+        self.write('Columns', text.encode('utf-8'))
+        with map_file('Columns') as mapped:
+            for window_size in (1, 7, 1 << 20):
+                self.assertEqual(list(iter_mapped_identifiers(mapped, window_size)),
+                                 ['Shop_id', 'Week_id', '_x', 'Sales_revenue'])
+    
+    def test_empty_file(self):
+        """Un fichier vide (non mappable) ne donne aucune chaîne"""
+        self.write('Tables', b'')
+        with map_file('Tables') as mapped:
+            self.assertEqual(extract_mapped_strings(mapped), [])
+    
+    def test_converter_same_result_with_and_without_mmap(self):
+        """Le convertisseur donne le même résultat sur les fichiers extraits, avec ou sans mmap"""
+        self.write('Columns', 'Shop_id Shop_name Sales_revenue Week_id\n'.encode('utf-8'))
+        self.write('Tables', b'\x00Shop_facts\x01Calendar_year_lookup\x02Shop_facts\x00')
+        self.write('Joins', b'\x00Shop_facts.Week_id=Calendar_year_lookup.Week_id\x00')
+        results = []
+        for memory_map in (True, False):
+            converter = UNV2QlikConverter()
+            converter.memory_map = memory_map
+            results.append((converter.parse_columns_file(), converter.parse_tables_file(),
+                            converter.parse_joins_file()))
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][1], ['Shop_facts', 'Calendar_year_lookup'])
+
+class TestMemberParser(unittest.TestCase):
+    """Tests pour l'analyse parallèle des membres d'un univers"""
+    
+    EFASHION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def parse(self, file_path, member_workers):
+        converter = UniversalBO2QlikConverter()
+        converter.file_path = file_path
+        converter.file_type = file_path.rsplit('.', 1)[1]
+        converter.member_workers = member_workers
+        log = io.StringIO()
+        with patch('sys.stdout', log):
+            converter.open_file()
+            converter.load_model()
+        converter.cleanup()
+        return converter.model.to_lists(), log.getvalue()
+    
+    def test_tasks(self):
+        """Chaque membre présent donne une tâche, avec les membres à décompresser"""
+        with UniverseArchiveReader(self.EFASHION) as reader:
+            tasks = {key: names for key, _, names in unv_member_tasks(reader)}
+        self.assertEqual(sorted(tasks), ['columns', 'joins', 'tables'])
+        self.assertIn('UNW_Storage/Joins/Joins', tasks['joins'])
+    
+    def test_concurrent_matches_sequential(self):
+        """Le modèle et la sortie sont identiques en séquentiel et en parallèle"""
+        synthetic = generate_universe(os.path.join(self.temp_dir, 'synthetic.unx'), tables=40)
+        for file_path in (self.EFASHION, synthetic):
+            self.assertEqual(self.parse(file_path, 1), self.parse(file_path, 2))
+    
+    def test_rejected_with_batch_or_serve(self):
+        """--member-jobs n'est pas ignoré en silence avec --batch ou --serve: la commande est refusée"""
+        for mode in (['--batch', self.temp_dir], ['--serve']):
+            log = io.StringIO()
+            with patch('sys.argv', ['universal_converter.py', '--member-jobs', '4'] + mode), patch('sys.stdout', log):
+                self.assertFalse(universal_converter_main())
+            self.assertIn("--member-jobs is only supported for a single universe", log.getvalue())
+
+class TestModelExport(unittest.TestCase):
+    """Tests pour l'export colonnaire du modèle"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.model = UniverseModel.from_lists(
+            tables=['Shop_facts', 'Calendar'],
+            table_columns={'Shop_facts': [('Week_id', 'Numeric'), ('Sales_revenue', None)],
+                           'Calendar': [('Week_id', 'Numeric')]},
+            objects=['Week_id', 'Sales_revenue'], measures=['Sales_revenue'],
+            join_records=[{'id': 7, 'expression': 'Shop_facts.Week_id=Calendar.Week_id', 'left_table': 'Shop_facts',
+                           'right_table': 'Calendar', 'operator': '=',
+                           'pairs': [('Shop_facts.Week_id', 'Calendar.Week_id')]}],
+            contexts=[{'id': 1, 'name': 'Sales', 'joins': [7]}], table_ids={'Shop_facts': 3},
+            object_ids={'Week_id': 1, 'Sales_revenue': 2})
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_round_trip(self):
+        """Le fichier relu redonne exactement les relations du modèle, valeurs nulles comprises"""
+        path = export_model(self.model, os.path.join(self.temp_dir, 'model.bqm'))
+        relations = read_columnar(path)
+        self.assertEqual(relations, model_relations(self.model))
+        self.assertEqual(relations['columns']['type'], ['Numeric', None, 'Numeric'])
+        self.assertEqual(relations['tables']['id'], [3, None])
+        self.assertEqual(relations['objects']['id'], [1, 2])
+        self.assertEqual(relations['objects']['kind'], [None, 'Measure'])
+        self.assertEqual(relations['join_pairs'], {'join': [0], 'left': ['Shop_facts.Week_id'],
+                                                   'right': ['Calendar.Week_id']})
+        self.assertEqual(relations['context_joins'], {'context': ['Sales'], 'join_id': [7]})
+        self.assertEqual(list(read_columnar(path, ['objects'])), ['objects'])
+    
+    def test_nul_strings(self):
+        """Les chaînes contenant des caractères NUL (noms d'objets UNV) sont relues à l'identique"""
+        relations = model_relations(self.model)
+        relations['objects']['name'] = ['Week\0id', '']
+        path = os.path.join(self.temp_dir, 'nul.bqm')
+        write_columnar(relations, path)
+        self.assertEqual(read_columnar(path)['objects']['name'], ['Week\0id', ''])
+    
+    def test_invalid_file(self):
+        """Un fichier qui n'est pas un export est refusé"""
+        path = os.path.join(self.temp_dir, 'bad.bqm')
+        with open(path, 'wb') as f:
+            f.write(b'PK\x03\x04 not an export')
+        with self.assertRaises(ExportFormatError):
+            read_columnar(path)
+    
+    @unittest.skipUnless(PYARROW_AVAILABLE, "pyarrow n'est pas installé")
+    def test_parquet(self):
+        """Avec pyarrow, chaque relation devient un fichier Parquet"""
+        import pyarrow.parquet
+        directory = export_model(self.model, os.path.join(self.temp_dir, 'model'), 'parquet')
+        table = pyarrow.parquet.read_table(os.path.join(directory, 'columns.parquet'))
+        self.assertEqual(table.column('type').to_pylist(), ['Numeric', None, 'Numeric'])
+    
+    def test_converter_export(self):
+        """Le convertisseur écrit l'export à côté du script"""
+        work_dir = os.path.join(self.temp_dir, 'work')
+        os.makedirs(work_dir)
+        original_cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            synthetic = generate_universe(os.path.join(self.temp_dir, 'synthetic.unv'), tables=20)
+            result = convert_universe(synthetic, 'synthetic.qvs', export_format='columnar')
+        finally:
+            os.chdir(original_cwd)
+        self.assertTrue(result['success'], result['error'])
+        relations = read_columnar(os.path.join(self.temp_dir, 'output', 'synthetic.model.bqm'))
+        self.assertEqual(len(relations['tables']['name']), 20)
+        self.assertNotIn(None, relations['tables']['id'])
+    
+    def test_converter_export_efashion(self):
+        """L'export de l'univers d'exemple eFashion réussit malgré ses noms d'objets binaires"""
+        efashion = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+        work_dir = os.path.join(self.temp_dir, 'work')
+        os.makedirs(work_dir)
+        original_cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            result = convert_universe(efashion, 'efashion.qvs', export_format='columnar')
+        finally:
+            os.chdir(original_cwd)
+        self.assertTrue(result['success'], result['error'])
+        relations = read_columnar(os.path.join(self.temp_dir, 'output', 'efashion.model.bqm'))
+        self.assertIn('Shop_facts', relations['tables']['name'])
+        self.assertTrue(any('\0' in name for name in relations['objects']['name']))
+        # UNW_Storage tables keep their ids, objects get their position in Columns
+        table_ids = dict(zip(relations['tables']['name'], relations['tables']['id']))
+        self.assertEqual(table_ids['Shop_facts'], 4)
+        self.assertNotIn(None, [table_ids[name] for name in relations['columns']['table']])
+        self.assertNotIn(None, relations['objects']['id'])
+        self.assertEqual(len(set(relations['objects']['id'])), len(relations['objects']['id']))
+
+class TestMetadataCatalog(unittest.TestCase):
+    """Tests pour le catalogue SQLite des univers convertis"""
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.catalog = MetadataCatalog(os.path.join(self.temp_dir, 'catalog', 'universes.db'))
+        self.sales = UniverseModel.from_lists(tables=['Shop_facts', 'Calendar'], objects=['Sales_revenue'],
+                                              measures=['Sales_revenue'], joins=['Shop_facts.Week_id=Calendar.Week_id'])
+        self.stock = UniverseModel.from_lists(tables=['Stock_facts'], objects=['Quantity'])
+    
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def test_record_and_query(self):
+        """Les requêtes couvrent tous les univers enregistrés"""
+        self.assertTrue(self.catalog.record('a.unv', 'f1', self.sales, 'unv', 'v1'))
+        self.assertTrue(self.catalog.record('b.unx', 'f2', self.stock, 'unx', 'v1'))
+        self.assertEqual(self.catalog.universes_using_table('Shop_facts'), [os.path.abspath('a.unv')])
+        self.assertEqual(self.catalog.universes_using_object('Sales_revenue'), [(os.path.abspath('a.unv'), 'Measure')])
+        self.assertEqual(self.catalog.stats()['universes'], 2)
+        self.assertEqual(self.catalog.stats()['tables'], 3)
+    
+    def test_upsert_by_fingerprint(self):
+        """Un univers inchangé n'est pas réinséré, un univers modifié remplace ses lignes"""
+        self.assertTrue(self.catalog.record('a.unv', 'f1', self.sales, 'unv', 'v1'))
+        self.assertFalse(self.catalog.record('a.unv', 'f1', self.sales, 'unv', 'v1'))
+        self.assertTrue(self.catalog.is_recorded('a.unv', 'f1', 'v1'))
+        self.assertTrue(self.catalog.record('a.unv', 'f2', self.stock, 'unv', 'v1'))
+        self.assertEqual(self.catalog.universes_using_table('Shop_facts'), [])
+        self.assertEqual(self.catalog.stats()['tables'], 1)
+        self.assertTrue(self.catalog.remove('a.unv'))
+        self.assertEqual(self.catalog.stats()['objects'], 0)
+    
+    def test_copies_share_rows(self):
+        """Les copies d'un univers partagent une seule ligne par empreinte, supprimée avec le dernier chemin"""
+        self.assertTrue(self.catalog.record('a.unv', 'f1', self.sales, 'unv', 'v1'))
+        self.assertTrue(self.catalog.record('copy/a.unv', 'f1', self.sales, 'unv', 'v1'))
+        self.assertTrue(self.catalog.is_recorded('copy/a.unv', 'f1', 'v1'))
+        stats = self.catalog.stats()
+        self.assertEqual((stats['universes'], stats['universe_paths'], stats['tables']), (1, 2, 2))
+        self.assertEqual(self.catalog.universes_using_table('Shop_facts'),
+                         sorted([os.path.abspath('a.unv'), os.path.abspath('copy/a.unv')]))
+        self.assertTrue(self.catalog.remove('a.unv'))
+        self.assertEqual(self.catalog.stats()['tables'], 2)
+        self.assertTrue(self.catalog.remove('copy/a.unv'))
+        self.assertEqual(self.catalog.stats()['universes'], 0)
+        self.assertEqual(self.catalog.stats()['tables'], 0)
+    
+    def test_batch_records_universes(self):
+        """Le mode batch enregistre chaque univers dans le catalogue"""
+        data_dir = os.path.join(self.temp_dir, 'data')
+        work_dir = os.path.join(self.temp_dir, 'work')
+        os.makedirs(data_dir)
+        os.makedirs(work_dir)
+        generate_universe(os.path.join(data_dir, 'one.unv'), tables=10)
+        generate_universe(os.path.join(data_dir, 'two.unx'), tables=12)
+        original_cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            with patch('sys.stdout', io.StringIO()):
+                self.assertTrue(run_batch(data_dir, jobs=2, catalog_path=self.catalog.path))
+        finally:
+            os.chdir(original_cwd)
+        self.assertEqual([row[1:3] for row in self.catalog.universes()], [('unv', 10), ('unx', 12)])
+        self.assertEqual(len(self.catalog.universes_using_table('Table_0000003')), 2)
+
+class TestQvdIncrementalLoad(unittest.TestCase):
+    """Tests pour le chargement incrémental des faits via QVD"""
+    
+    EFASHION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+    
+    def test_incremental_key(self):
+        """Une date de modification l'emporte sur l'identifiant propre de la table, les clés étrangères sont ignorées"""
+        columns = [('Sales_id', 'INTEGER'), ('Shop_id', 'INTEGER'), ('Order_date', 'DATE'), ('Last_update', 'TIMESTAMP')]
+        self.assertEqual(incremental_key('Sales', columns), ('Last_update', 'date'))
+        self.assertEqual(incremental_key('Sales', columns[:3]), ('Sales_id', 'id'))
+        self.assertEqual(incremental_key('Sales', columns[1:3], {'Shop_id'}), ('Order_date', 'date'))
+        self.assertIsNone(incremental_key('Sales', [('Shop_id', 'VARCHAR')]))
+    
+    def test_plan_loads(self):
+        """Seuls les faits avec une clé sont incrémentaux, les lookups restent en chargement complet"""
+        plans = plan_loads(['Shop_facts', 'Calendar', 'Outlet', 'Sales'],
+                           {'Shop_facts': [('Shop_facts_id', 'Numeric'), ('Week_id', 'Numeric')],
+                            'Calendar': [('Week_id', 'Numeric')],
+                            'Outlet': [('Shop_id', 'Numeric'), ('Shop_name', 'Character')],
+                            'Sales': [('Sales_id', 'Numeric'), ('Week_id', 'Numeric'), ('Shop_id', 'Numeric')]},
+                           ['Shop_facts.Week_id=Calendar.Week_id', 'Sales.Week_id=Calendar.Week_id',
+                            'Sales.Shop_id=Outlet.Shop_id'])
+        self.assertEqual(plans['Shop_facts'], {'kind': 'fact', 'key': 'Shop_facts_id', 'key_type': 'id',
+                                               'primary_key': 'Shop_facts_id'})
+        self.assertEqual(plans['Calendar']['kind'], 'lookup')
+        self.assertEqual(plans['Outlet']['kind'], 'lookup')
+        # References several tables without being referenced: a fact even without the name
+        self.assertEqual((plans['Sales']['kind'], plans['Sales']['key']), ('fact', 'Sales_id'))
+    
+    def test_render_changed_rows(self):
+        """Avec une date de modification, les lignes modifiées remplacent leur version stockée"""
+        plan = {'kind': 'fact', 'key': 'Last_update', 'key_type': 'date', 'primary_key': 'Sales_id'}
+        script = render_incremental_load('Sales', plan, '[Sales]', ['Sales_id', 'Amount'])
+        self.assertIn("LOAD Num(Max(Last_update), '0.##########', '.', '') AS MaxKey", script)
+        self.assertIn("WHERE Num(Last_update) >= $(vMaxKey_Sales);", script)
+        self.assertIn("Concatenate (Sales)\n    LOAD\n        Sales_id,\n        Amount,\n        Last_update\n"
+                      "    FROM [$(vQvdPath)Sales.qvd] (qvd)\n    WHERE NOT Exists(Sales_id);", script)
+        self.assertTrue(script.endswith("END IF\nSTORE Sales INTO [$(vQvdPath)Sales.qvd] (qvd);"))
+    
+    def test_render_sql_source(self):
+        """Depuis la base, la date maximale est comparée comme horodatage dans le SQL SELECT"""
+        plan = {'kind': 'fact', 'key': 'Last update', 'key_type': 'date', 'primary_key': None}
+        script = render_incremental_load('Sales', plan, 'Sales', ['Amount'], sql=True)
+        self.assertIn("LOAD Timestamp(Max([Last update]), 'YYYY-MM-DD hh:mm:ss') AS MaxKey", script)
+        self.assertIn("    SQL SELECT\n        Amount,\n        \"Last update\"\n    FROM Sales\n"
+                      "    WHERE \"Last update\" > '$(vMaxKey_Sales)';", script)
+        self.assertIn("    Concatenate (Sales)\n    LOAD\n        Amount,\n        [Last update]\n"
+                      "    FROM [$(vQvdPath)Sales.qvd] (qvd);", script)
+    
+    def test_universal_converter(self):
+        """Le convertisseur universel charge Shop_facts en incrémental et les lookups en entier"""
+        converter = UniversalBO2QlikConverter()
+        converter.file_path = self.EFASHION
+        converter.file_type = 'unv'
+        converter.qvd_path = 'lib://QVD/'
+        with patch('sys.stdout', io.StringIO()):
+            converter.open_file()
+            converter.load_model()
+        try:
+            script = converter.generate_qlik_script()
+        finally:
+            converter.cleanup()
+        self.assertIn("SET vQvdPath = 'lib://QVD/';", script)
+        self.assertIn("    FROM Shop_facts\n    WHERE Shop_facts_id > $(vMaxKey_Shop_facts);", script)
+        self.assertIn("STORE product_promotion_facts INTO", script)
+        self.assertIn("    Holiday_Flag\nFROM Calendar_year_lookup;", script)
+        self.assertNotIn("Calendar_year_lookup.qvd", script)
+    
+    def test_unv2qlik_converter(self):
+        """UNV2QlikConverter lit la clé de Shop_facts dans UNW_Storage"""
+        converter = UNV2QlikConverter()
+        converter.archive = UniverseArchiveReader(self.EFASHION)
+        converter.qvd_path = 'lib://QVD/'
+        converter.fields = ['Article_id', 'Amount_sold']
+        try:
+            converter.parse_joins_file()
+            script = converter.generate_qlik_script()
+        finally:
+            converter.close_archive()
+        self.assertIn("        Amount_sold,\n        Quantity_sold\n    FROM [lib://DataConnection/Shop_facts.csv]\n"
+                      "    (utf8, txt, delimiter is ',', embedded labels)\n"
+                      "    WHERE Shop_facts_id > $(vMaxKey_Shop_facts);", script)
+        self.assertIn("// Table de lookup: Calendar_year_lookup", script)
+
+class TestLookupMapping(unittest.TestCase):
+    """Tests pour la cardinalité des jointures et les correspondances ApplyMap"""
+    
+    EFASHION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+    COLUMNS = {'Shop_facts': [('Shop_facts_id', 'Numeric'), ('Article_id', 'Numeric'), ('Color_code', 'Numeric')],
+               'Article_lookup': [('Article_id', 'Numeric'), ('Article_label', 'Character')],
+               'Article_Color_Lookup': [('Article_color_lookup_id', 'Numeric'), ('Article_id', 'Numeric'),
+                                        ('Color_code', 'Numeric')]}
+    
+    def test_cardinality(self):
+        """Le côté joint sur sa clé est 'one', une table sans colonnes connues reste 'many'"""
+        self.assertEqual(join_cardinality('Article_lookup.Article_id=Shop_facts.Article_id', self.COLUMNS),
+                         {'Article_lookup': 'one', 'Shop_facts': 'many'})
+        self.assertEqual(join_cardinality('Article_Color_Lookup.Article_id=Shop_facts.Article_id and '
+                                          'Article_Color_Lookup.Color_code=Shop_facts.Color_code', self.COLUMNS),
+                         {'Article_Color_Lookup': 'many', 'Shop_facts': 'many'})
+        self.assertEqual(join_cardinality('Outlet.Shop_id=Shop_facts.Shop_id', self.COLUMNS)['Outlet'], 'many')
+        self.assertIsNone(join_cardinality('Shop_facts.Week_id > 10', self.COLUMNS))
+        self.assertEqual(table_references(['Article_lookup.Article_id=Shop_facts.Article_id'], self.COLUMNS),
+                         {'Shop_facts': {'Article_lookup'}})
+    
+    def test_lookup_join(self):
+        """Seule une jointure many-to-one vers le lookup donne des colonnes de correspondance"""
+        self.assertEqual(lookup_join('Article_lookup.Article_id=Shop_facts.Article_id', 'Shop_facts',
+                                     'Article_lookup', self.COLUMNS), [('Article_id', 'Article_id')])
+        self.assertIsNone(lookup_join('Article_lookup.Article_id=Shop_facts.Article_id', 'Article_lookup',
+                                      'Shop_facts', self.COLUMNS))
+        self.assertIsNone(lookup_join('Article_Color_Lookup.Article_id=Shop_facts.Article_id', 'Shop_facts',
+                                      'Article_Color_Lookup', self.COLUMNS))
+    
+    def test_applymap_script(self):
+        """Les lookups d'eFashion passent par MAPPING LOAD + ApplyMap, sans LEFT JOIN ni relecture des CSV"""
+        converter = UNV2QlikConverter()
+        converter.archive = UniverseArchiveReader(self.EFASHION)
+        converter.fields = ['Week_id', 'Month_Name', 'Article_id', 'Article_label', 'Sales_revenue']
+        converter.dimensions = ['Month_Name', 'Article_label', 'Article_id']
+        try:
+            converter.parse_joins_file()
+            script = converter.generate_qlik_script()
+        finally:
+            converter.close_archive()
+        self.assertIn("Map_Calendar_year_lookup_Month_Name:\nMAPPING LOAD\n    Week_id,\n    Month_Name\n"
+                      "RESIDENT Calendar_year_lookup;", script)
+        self.assertIn("    ApplyMap('Map_Article_lookup_Article_label', Article_id, Null()) AS Article_label\n"
+                      "RESIDENT Shop_facts;\nDROP TABLE Shop_facts;", script)
+        # promotion_lookup n'est joint qu'à product_promotion_facts dans l'univers
+        self.assertIn("// Pas de jointure entre Shop_facts et promotion_lookup", script)
+        self.assertNotIn("LEFT JOIN", script)
+        self.assertEqual(script.count("FROM [lib://DataConnection/Article_lookup.csv]"), 1)
+    
+    @staticmethod
+    def resident_fields(script):
+        """{table: champs} des tables résidentes en fin de script (LOAD, RESIDENT, DROP et RENAME)"""
+        tables = {}
+        for statement in script.split(';'):
+            lines = [line.strip() for line in statement.splitlines()
+                     if line.strip() and not line.strip().startswith('//')]
+            if not lines:
+                continue
+            if lines[0].startswith('DROP TABLE '):
+                tables.pop(lines[0][len('DROP TABLE '):], None)
+            elif lines[0].startswith('RENAME TABLE '):
+                old, new = lines[0][len('RENAME TABLE '):].split(' TO ')
+                tables[new] = tables.pop(old)
+            elif len(lines) > 2 and lines[0].endswith(':') and 'MAPPING LOAD' not in lines:
+                body = [line for line in lines[1:] if line not in ('LOAD', 'NOCONCATENATE')]
+                fields = set()
+                for line in body:
+                    if line.startswith(('FROM ', 'RESIDENT ')):
+                        break
+                    field = line.rstrip(',').split(' AS ')[-1]
+                    fields.update(tables[body[-1][len('RESIDENT '):]] if field == '*' else {field})
+                tables[lines[0][:-1]] = fields
+        return tables
+    
+    def test_applymap_resident_model(self):
+        """Après ApplyMap, les lookups correspondants sont supprimés: aucune table ne partage plus que la clé"""
+        converter = UNV2QlikConverter()
+        converter.archive = UniverseArchiveReader(self.EFASHION)
+        try:
+            with patch('sys.stdout', io.StringIO()):
+                converter.parse_columns_file()
+                converter.parse_tables_file()
+                converter.parse_joins_file()
+                converter.categorize_fields()
+            script = converter.generate_qlik_script()
+        finally:
+            converter.close_archive()
+        self.assertIn("DROP TABLE Calendar_year_lookup;", script)
+        tables = self.resident_fields(script)
+        self.assertEqual(set(tables), {'Shop_facts', 'promotion_lookup'})
+        self.assertIn('Month_Name', tables['Shop_facts'])
+        names = sorted(tables)
+        for position, table in enumerate(names):
+            for other in names[position + 1:]:
+                self.assertLessEqual(len(tables[table] & tables[other]), 1, (table, other))
+    
+    def test_left_join_without_columns(self):
+        """Sans UNW_Storage, la cardinalité est inconnue: les LEFT JOIN sont conservés"""
+        converter = UNV2QlikConverter()
+        converter.fields = ['Week_id']
+        converter.joins = ['Shop_facts.Week_id=Calendar_year_lookup.Week_id']
+        script = converter.generate_qlik_script()
+        self.assertEqual(script.count("LEFT JOIN (Shop_facts)"), 3)
+        self.assertNotIn("ApplyMap", script)
+
+class TestAssociationAnalysis(unittest.TestCase):
+    """Tests pour la détection des clés synthétiques et des boucles d'association"""
+    
+    EFASHION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+    TABLES = ['Sales', 'Shop', 'Calendar', 'Article', 'Article_Color', 'Budget']
+    COLUMNS = {'Sales': [('Shop_id', 'Numeric'), ('Week_id', 'Numeric'), ('Article_id', 'Numeric'),
+                         ('Color_code', 'Numeric'), ('City', 'Character')],
+               'Shop': [('Shop_code', 'Numeric'), ('City', 'Character'), ('Region', 'Character')],
+               'Calendar': [('Week_id', 'Numeric'), ('Yr', 'Character')],
+               'Article': [('Article_id', 'Numeric'), ('Label', 'Character')],
+               'Article_Color': [('Article_id', 'Numeric'), ('Color_code', 'Numeric'), ('Label', 'Character')],
+               'Budget': [('Shop_id', 'Numeric'), ('Week_id', 'Numeric'), ('Yr', 'Character')]}
+    JOINS = ['Sales.Shop_id=Shop.Shop_code', 'Sales.Week_id=Calendar.Week_id', 'Sales.Article_id=Article.Article_id',
+             'Article_Color.Article_id=Sales.Article_id and Article_Color.Color_code=Sales.Color_code',
+             'Budget.Shop_id=Sales.Shop_id', 'Budget.Week_id=Calendar.Week_id']
+    
+    @staticmethod
+    def loaded_columns(plan, tables, table_columns):
+        """Colonnes telles que chargées: alias appliqués et clés composites ajoutées"""
+        loaded = {}
+        for table in tables:
+            aliases = plan['aliases'].get(table, {})
+            loaded[table] = [(aliases.get(name, name), column_type) for name, column_type in table_columns[table]]
+            loaded[table] += [(name, None) for name, _ in plan['keys'].get(table, ())]
+        return loaded
+    
+    def test_naive_model(self):
+        """L'index des champs révèle les clés synthétiques et les boucles du chargement tel quel"""
+        index = field_index(self.TABLES, self.COLUMNS)
+        self.assertEqual(index['Article_id'], ['Sales', 'Article', 'Article_Color'])
+        self.assertNotIn('Region', [name for name, tables in index.items() if len(tables) > 1])
+        keys = synthetic_keys(self.TABLES, self.COLUMNS, index)
+        self.assertIn((('Sales', 'Article_Color'), ('Article_id', 'Color_code')), keys)
+        self.assertIn((('Sales', 'Budget'), ('Shop_id', 'Week_id')), keys)
+        self.assertIn(('Article_Color', 'Label'), association_loops(self.TABLES, self.COLUMNS, index))
+    
+    def test_plan(self):
+        """Seuls les champs de jointure restent associés: renommage, clé composite, qualification"""
+        plan = plan_associations(self.TABLES, self.COLUMNS, self.JOINS)
+        self.assertEqual(plan['aliases']['Shop'], {'Shop_code': 'Shop_id', 'City': 'Shop.City'})
+        self.assertEqual(plan['keys']['Sales'], [('%Key_Article_Color_Sales', ['Article_id', 'Color_code'])])
+        self.assertEqual(plan['keys']['Article_Color'], [('%Key_Article_Color_Sales', ['Article_id', 'Color_code'])])
+        self.assertEqual(plan['aliases']['Article_Color'], {'Article_id': 'Article_Color.Article_id',
+                                                            'Color_code': 'Article_Color.Color_code',
+                                                            'Label': 'Article_Color.Label'})
+        # Budget rejoint Calendar par Sales: la jointure directe fermerait une boucle
+        self.assertEqual(plan['broken_joins'], ['Budget.Week_id=Calendar.Week_id'])
+        self.assertEqual(plan['aliases']['Budget'], {'Week_id': 'Budget.Week_id', 'Yr': 'Budget.Yr'})
+        loaded = self.loaded_columns(plan, self.TABLES, self.COLUMNS)
+        self.assertEqual(synthetic_keys(self.TABLES, loaded), [])
+        self.assertEqual(association_loops(self.TABLES, loaded), [])
+    
+    def test_generated_universe(self):
+        """Sur un univers généré, le modèle résolu n'a plus ni clé synthétique ni boucle"""
+        generator = UniverseGenerator(2000, joins=2200)
+        tables = [generator.table_name(table) for table in range(2000)]
+        table_columns = {generator.table_name(table): generator.columns(table) for table in range(2000)}
+        joins = [generator.join_expression(join) for join in range(generator.join_count)]
+        plan = plan_associations(tables, table_columns, joins)
+        self.assertTrue(plan['synthetic_keys'])
+        self.assertTrue(plan['loops'])
+        loaded = self.loaded_columns(plan, tables, table_columns)
+        self.assertEqual(synthetic_keys(tables, loaded), [])
+        self.assertEqual(association_loops(tables, loaded), [])
+        # Les clés de l'arbre de jointures restent partagées sous leur nom
+        self.assertNotIn('Table_0000000_id', plan['aliases'].get('Table_0000001', {}))
+    
+    def test_incremental_aliases(self):
+        """Le QVD stocke les noms chargés: Max et Exists les utilisent, le SQL garde les colonnes sources"""
+        plan = {'kind': 'fact', 'key': 'Updated', 'key_type': 'date', 'primary_key': 'Sales_id'}
+        script = render_incremental_load('Sales', plan, 'Sales', ['Sales_id', 'Shop_code', 'Updated'], sql=True,
+                                         aliases={'Shop_code': 'Shop_id', 'Updated': 'Sales.Updated'},
+                                         keys=[('%Key_Sales_Shop', ['Sales_id', 'Shop_code'])])
+        self.assertIn("LOAD Timestamp(Max([Sales.Updated]), 'YYYY-MM-DD hh:mm:ss') AS MaxKey", script)
+        self.assertIn("        Shop_code AS Shop_id,\n        Updated AS [Sales.Updated],\n"
+                      "        Sales_id & '|' & Shop_code AS [%Key_Sales_Shop];", script)
+        self.assertIn("    WHERE Updated >= '$(vMaxKey_Sales)';", script)
+        self.assertIn("        Shop_id,\n        [Sales.Updated],\n        [%Key_Sales_Shop]\n"
+                      "    FROM [$(vQvdPath)Sales.qvd] (qvd)\n    WHERE NOT Exists(Sales_id);", script)
+    
+    def test_universal_converter(self):
+        """Le script d'eFashion associe ses tables par clé composite et signale les boucles résolues"""
+        converter = UniversalBO2QlikConverter()
+        converter.file_path = self.EFASHION
+        converter.file_type = 'unv'
+        with patch('sys.stdout', io.StringIO()):
+            converter.open_file()
+            converter.load_model()
+        try:
+            script = converter.generate_qlik_script()
+        finally:
+            converter.cleanup()
+        self.assertIn("    Article_id & '|' & Color_code AS [%Key_Article_Color_Lookup_Shop_facts];", script)
+        self.assertIn("    Week_id AS [Shop_facts.Week_id],", script)
+        # Les contextes relient les deux faits par une table de liens: aucune jointure n'est écartée
+        self.assertNotIn("// Joins left out to avoid a loop", script)
+        self.assertIn("// Synthetic keys found: ", script)
+
+class TestFactModel(unittest.TestCase):
+    """Tests pour le schéma en étoile des univers multi-faits (contextes)"""
+    
+    EFASHION = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'eFashion.unv')
+    TABLES = ['Sales', 'Budget', 'Shop', 'Calendar']
+    COLUMNS = {'Sales': [('Sales_id', 'Numeric'), ('Shop_id', 'Numeric'), ('Week_id', 'Numeric'), ('Amount', 'Numeric')],
+               'Budget': [('Budget_id', 'Numeric'), ('Store_id', 'Numeric'), ('Week_id', 'Numeric'),
+                          ('Amount', 'Numeric')],
+               'Shop': [('Shop_id', 'Numeric'), ('Shop_name', 'Character')],
+               'Calendar': [('Week_id', 'Numeric'), ('Yr', 'Character')]}
+    JOINS = ['Sales.Shop_id=Shop.Shop_id', 'Sales.Week_id=Calendar.Week_id',
+             'Budget.Store_id=Shop.Shop_id', 'Budget.Week_id=Calendar.Week_id']
+    CONTEXTS = [('Sales', JOINS[:2]), ('Budget', JOINS[2:])]
+    
+    def efashion_model(self):
+        converter = UniversalBO2QlikConverter()
+        converter.file_path = self.EFASHION
+        converter.file_type = 'unv'
+        with patch('sys.stdout', io.StringIO()):
+            converter.open_file()
+            converter.load_model()
+        self.addCleanup(converter.cleanup)
+        return converter
+    
+    def test_context_joins(self):
+        """Les contextes UNV référencent les id des jointures, les contextes UNX leur position"""
+        records = [{'id': 112, 'expression': 'A.x=B.x'}, {'id': 113, 'expression': 'B.y=C.y'}]
+        self.assertEqual(context_joins([{'name': 'P', 'joins': [113, 999]}], ['A.x=B.x', 'B.y=C.y'], records),
+                         [('P', ['B.y=C.y'])])
+        self.assertEqual(context_joins([{'name': 'P', 'joins': [2]}], ['A.x=B.x', 'B.y=C.y']), [('P', ['B.y=C.y'])])
+        self.assertEqual(context_fact(self.JOINS[:2], self.COLUMNS), 'Sales')
+        self.assertIsNone(context_fact([], self.COLUMNS))
+    
+    def test_unx_contexts(self):
+        """Les <joinRef> des contextes UNX sont résolus en positions de jointures"""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        path = generate_universe(os.path.join(temp_dir, 'synthetic.unx'), tables=10, joins=12, contexts=2, objects=5)
+        with UniverseArchiveReader(path) as reader:
+            datafoundation = parse_datafoundation(reader.open_member(DATAFOUNDATION_MEMBER))
+        self.assertEqual([context['name'] for context in datafoundation['contexts']], ['Context_0000', 'Context_0001'])
+        self.assertEqual(datafoundation['contexts'][1]['joins'], [2, 4, 6, 8, 10, 12])
+    
+    def test_concatenated_facts(self):
+        """Des faits joignant les mêmes dimensions sont concaténés dans Facts, leurs clés renommées"""
+        fact_model, associations = plan_star_schema(self.TABLES, self.COLUMNS, self.JOINS, self.CONTEXTS)
+        self.assertEqual(fact_model['strategy'], 'concatenate')
+        self.assertEqual(fact_model['renames'], {'Sales': {}, 'Budget': {'Store_id': 'Shop_id'}})
+        self.assertNotIn('Facts', associations['aliases'])
+        script = render_fact_load(fact_model, 'Budget', [name for name, _ in self.COLUMNS['Budget']], associations)
+        self.assertIn("Concatenate (Facts)\nLOAD\n    Budget_id,\n    Store_id AS Shop_id,\n    Week_id,\n"
+                      "    Amount,\n    'Budget' AS Fact_Type;\nSQL SELECT", script)
+        self.assertTrue(render_fact_load(fact_model, 'Sales', ['Sales_id'], associations).startswith(
+            "// Loading table Sales into Facts (context Sales)\nFacts:\nLOAD"))
+    
+    def test_link_table(self):
+        """Des faits aux dimensions différentes sont reliés par une table de liens à clés précalculées"""
+        columns = dict(self.COLUMNS, Budget=self.COLUMNS['Budget'] + [('Scenario_id', 'Numeric')],
+                       Scenario=[('Scenario_id', 'Numeric')])
+        joins = self.JOINS + ['Budget.Scenario_id=Scenario.Scenario_id']
+        contexts = [('Sales', joins[:2]), ('Budget', joins[2:])]
+        fact_model, associations = plan_star_schema(self.TABLES + ['Scenario'], columns, joins, contexts)
+        self.assertEqual(fact_model['strategy'], 'link')
+        self.assertEqual(fact_model['dimensions'], ['Shop', 'Calendar'])
+        self.assertEqual(associations['keys']['Budget'], [(LINK_KEY, ['Store_id', 'Week_id'])])
+        script = render_link_table(fact_model, associations)
+        self.assertIn("Concatenate (LinkTable)\nLOAD DISTINCT\n    [%LinkKey],\n    Store_id AS Shop_id,\n"
+                      "    [Budget.Week_id] AS Week_id\nRESIDENT Budget;", script)
+        self.assertIn("DROP FIELDS Store_id, [Budget.Week_id] FROM Budget;", script)
+        # Scenario reste joint directement à Budget
+        self.assertNotIn('Scenario_id', associations['aliases'].get('Budget', {}))
+    
+    def test_efashion_star_schema(self):
+        """eFashion: Shop_facts et product_promotion_facts partagent articles et calendrier par LinkTable, sans boucle"""
+        converter = self.efashion_model()
+        fact_model, associations = converter.star_schema()
+        self.assertEqual(fact_model['facts'], ['Shop_facts', 'product_promotion_facts'])
+        self.assertEqual(fact_model['contexts'], {'Shop_facts': 'Shop facts', 'product_promotion_facts': 'Promotions'})
+        self.assertEqual(fact_model['dimensions'], ['Article_lookup', 'Calendar_year_lookup'])
+        self.assertEqual(associations['broken_joins'], [])
+        # Modèle final: alias et clés appliqués, champs de liens retirés des faits
+        loaded = {}
+        for table in fact_model['tables']:
+            aliases = associations['aliases'].get(table, {})
+            dropped = {column for column, _ in fact_model['link_fields'].get(table, ())}
+            loaded[table] = [(aliases.get(name, name), None) for name, _ in fact_model['table_columns'].get(table, ())
+                             if name not in dropped]
+            loaded[table] += [(name, None) for name, _ in associations['keys'].get(table, ())]
+        self.assertEqual(synthetic_keys(fact_model['tables'], loaded), [])
+        self.assertEqual(association_loops(fact_model['tables'], loaded), [])
+        script = converter.generate_qlik_script()
+        self.assertIn("    Article_id & '|' & Week_id AS [%LinkKey];", script)
+        self.assertIn("LinkTable:\nLOAD DISTINCT\n    [%LinkKey],\n    [Shop_facts.Article_id] AS Article_id,", script)
+        self.assertNotIn("LEFT JOIN", script)
+
 def run_tests():
     """Fonction pour exécuter tous les tests"""
     print("=== Tests unitaires BO2Qlik ===")
@@ -293,6 +1536,27 @@ def run_tests():
     # Ajouter les tests
     suite.addTests(loader.loadTestsFromTestCase(TestUNV2QlikConverter))
     suite.addTests(loader.loadTestsFromTestCase(TestFileOperations))
+    suite.addTests(loader.loadTestsFromTestCase(TestUniverseArchiveReader))
+    suite.addTests(loader.loadTestsFromTestCase(TestUNWStorageDecoder))
+    suite.addTests(loader.loadTestsFromTestCase(TestParseCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestStringExtractor))
+    suite.addTests(loader.loadTestsFromTestCase(TestMappedMember))
+    suite.addTests(loader.loadTestsFromTestCase(TestUniverseModel))
+    suite.addTests(loader.loadTestsFromTestCase(TestFieldClassifier))
+    suite.addTests(loader.loadTestsFromTestCase(TestScriptWriter))
+    suite.addTests(loader.loadTestsFromTestCase(TestStageProfiler))
+    suite.addTests(loader.loadTestsFromTestCase(TestBenchmarkSuite))
+    suite.addTests(loader.loadTestsFromTestCase(TestUniverseGenerator))
+    suite.addTests(loader.loadTestsFromTestCase(TestConversionServer))
+    suite.addTests(loader.loadTestsFromTestCase(TestAsyncPipeline))
+    suite.addTests(loader.loadTestsFromTestCase(TestIncrementalGeneration))
+    suite.addTests(loader.loadTestsFromTestCase(TestMemberParser))
+    suite.addTests(loader.loadTestsFromTestCase(TestModelExport))
+    suite.addTests(loader.loadTestsFromTestCase(TestMetadataCatalog))
+    suite.addTests(loader.loadTestsFromTestCase(TestQvdIncrementalLoad))
+    suite.addTests(loader.loadTestsFromTestCase(TestLookupMapping))
+    suite.addTests(loader.loadTestsFromTestCase(TestAssociationAnalysis))
+    suite.addTests(loader.loadTestsFromTestCase(TestFactModel))
     
     # Exécuter les tests
     runner = unittest.TextTestRunner(verbosity=2)
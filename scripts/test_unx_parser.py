@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the incremental UNX parser
+"""
+
+import unittest
+import contextlib
+import os
+import io
+import sys
+import shutil
+import tempfile
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_script import render_table_load
+from unx2qlik_converter import UNX2QlikConverter
+from unx_parser import (BUSINESSLAYER_MEMBER, DATAFOUNDATION_MEMBER, UnxUniverse, iterparse_elements,
+                        parse_businesslayer, parse_datafoundation)
+
+NAMESPACED_DATAFOUNDATION = b'''<?xml version="1.0" encoding="UTF-8"?>
+<dataFoundation xmlns="http://www.sap.com/rws/bip">
+    <tables>
+        <table id="T1" name="Sales_Facts">
+            <columns><column id="C1" name="Shop_id" type="VARCHAR"/></columns>
+        </table>
+        <table id="T2" name="Shop_Lookup"/>
+    </tables>
+    <joins>
+        <join id="J1"><expression>Sales_Facts.Shop_id = Shop_Lookup.Shop_id</expression></join>
+    </joins>
+</dataFoundation>'''
+
+PLAIN_BUSINESSLAYER = b'''<businessLayer>
+    <businessObjects>
+        <businessObject id="BO1" name="Shop_id" type="Dimension"/>
+        <businessObject id="BO2" name="Sales_revenue" type="Measure"/>
+        <businessObject id="BO3" type="Attribute"/>
+    </businessObjects>
+</businessLayer>'''
+
+class TestUNXParser(unittest.TestCase):
+    """Tests for the single-pass iterparse engine"""
+
+    def test_datafoundation_namespaced(self):
+        """Namespaced tables and joins are found in one pass"""
+        result = parse_datafoundation(io.BytesIO(NAMESPACED_DATAFOUNDATION))
+        self.assertEqual(result['tables'], ['Sales_Facts', 'Shop_Lookup'])
+        self.assertEqual(result['joins'], ['Sales_Facts.Shop_id = Shop_Lookup.Shop_id'])
+        self.assertTrue(result['namespaced']['tables'])
+
+    def test_businesslayer_without_namespace(self):
+        """Non-namespaced documents fall back to plain tags"""
+        result = parse_businesslayer(io.BytesIO(PLAIN_BUSINESSLAYER))
+        self.assertFalse(result['namespaced'])
+        self.assertEqual(result['objects'], [('Shop_id', 'Dimension'), ('Sales_revenue', 'Measure'), ('BO3', 'Attribute')])
+
+    def test_mixed_namespaces(self):
+        """Namespaced and plain tags are reported in the same pass, other namespaces are ignored"""
+        document = (b'<root xmlns:bip="http://www.sap.com/rws/bip" xmlns:o="urn:other">'
+                    b'<bip:table name="A"/><table name="B"/><o:table name="C"/></root>')
+        found = [(tag, namespaced, elem.get('name')) for tag, namespaced, elem in iterparse_elements(io.BytesIO(document), ('table',))]
+        self.assertEqual(found, [('table', True, 'A'), ('table', False, 'B')])
+
+    def test_elements_are_complete_then_released(self):
+        """Matched elements keep their children until consumed, then are detached"""
+        seen = []
+        for tag, namespaced, elem in iterparse_elements(io.BytesIO(NAMESPACED_DATAFOUNDATION), ('table',)):
+            seen.append((elem.get('name'), len(list(elem.iter()))))
+        self.assertEqual(seen, [('Sales_Facts', 3), ('Shop_Lookup', 1)])
+
+class TestUnxUniverse(unittest.TestCase):
+    """Tests for the lazy, memoized UNX universe"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'universe.unx')
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr(DATAFOUNDATION_MEMBER, NAMESPACED_DATAFOUNDATION)
+            zip_file.writestr(BUSINESSLAYER_MEMBER, PLAIN_BUSINESSLAYER)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_tables_only_parse_datafoundation(self):
+        """Reading the tables decompresses datafoundation.xml and nothing else"""
+        with UnxUniverse(self.path) as universe:
+            self.assertEqual(universe.tables, ['Sales_Facts', 'Shop_Lookup'])
+            self.assertEqual(universe.joins, ['Sales_Facts.Shop_id = Shop_Lookup.Shop_id'])
+            self.assertNotIn('businesslayer', universe.__dict__)
+            with zipfile.ZipFile(self.path) as zip_file:
+                self.assertEqual(universe.bytes_read, zip_file.getinfo(DATAFOUNDATION_MEMBER).compress_size)
+
+    def test_business_objects_are_memoized(self):
+        """Each document is parsed once, whatever the number of properties read"""
+        with UnxUniverse(self.path) as universe:
+            self.assertEqual(universe.dimensions, ['Shop_id'])
+            self.assertEqual(universe.measures, ['Sales_revenue'])
+            bytes_read = universe.bytes_read
+            self.assertEqual(universe.objects, ['Shop_id', 'Sales_revenue', 'BO3'])
+            self.assertEqual(universe.attributes, ['BO3'])
+            self.assertEqual(universe.bytes_read, bytes_read)
+            self.assertNotIn('datafoundation', universe.__dict__)
+
+    def test_missing_member(self):
+        """A missing document gives empty lists"""
+        path = os.path.join(self.temp_dir, 'empty.unx')
+        with zipfile.ZipFile(path, 'w') as zip_file:
+            zip_file.writestr('other.xml', b'<root/>')
+        with UnxUniverse(path) as universe:
+            self.assertIsNone(universe.datafoundation)
+            self.assertEqual((universe.tables, universe.business_objects, universe.table_columns), ([], [], {}))
+
+class TestColumnProjection(unittest.TestCase):
+    """Tests for the explicit field lists of tables with datafoundation columns"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'universe.unx')
+        with zipfile.ZipFile(self.path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+            zip_file.writestr(DATAFOUNDATION_MEMBER, NAMESPACED_DATAFOUNDATION)
+            zip_file.writestr(BUSINESSLAYER_MEMBER, PLAIN_BUSINESSLAYER)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_render_table_load(self):
+        """Fields are listed in the LOAD and the SQL SELECT, quoted when they are not identifiers"""
+        self.assertEqual(render_table_load('Sales Facts', ['Shop_id', 'Sales revenue']),
+                         '// Loading table Sales Facts\nSales Facts:\nLOAD\n    Shop_id,\n    [Sales revenue];\n'
+                         'SQL SELECT\n    Shop_id,\n    "Sales revenue"\nFROM "Sales Facts";')
+
+    def test_converter_projects_known_columns(self):
+        """Tables with columns get an explicit SQL load, the others keep LOAD *"""
+        converter = UNX2QlikConverter(self.path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            converter.extract_unx()
+            converter.parse_datafoundation()
+            converter.parse_businesslayer()
+            try:
+                script = converter.generate_qlik_script()
+            finally:
+                converter.cleanup()
+        self.assertIn("Sales_Facts:\nLOAD\n    Shop_id;\nSQL SELECT\n    Shop_id\nFROM Sales_Facts;", script)
+        self.assertIn("Shop_Lookup:\nLOAD *\nFROM [Shop_Lookup]\n;", script)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
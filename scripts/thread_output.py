@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Per-thread stdout capture
+The converters report progress with print(); when several conversions run on
+threads of one process (server, async pipeline), each thread captures its own
+output instead of interleaving on the terminal.
+"""
+
+import io
+import sys
+import threading
+
+class ThreadOutput(io.TextIOBase):
+    """sys.stdout replacement capturing the output of threads that asked for it
+
+    contextlib.redirect_stdout swaps the process-wide sys.stdout and is not
+    safe with concurrent conversions; threads without a capture buffer write
+    to the original stream.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def capture(self):
+        """Starts capturing the current thread's output; returns the buffer"""
+        self.local.buffer = io.StringIO()
+        return self.local.buffer
+
+    def release(self):
+        self.local.buffer = None
+
+    def write(self, text):
+        buffer = getattr(self.local, 'buffer', None)
+        return (buffer or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+def install():
+    """Installs a ThreadOutput as sys.stdout (once) and returns it"""
+    if not isinstance(sys.stdout, ThreadOutput):
+        sys.stdout = ThreadOutput(sys.stdout)
+    return sys.stdout
+
+def uninstall():
+    """Restores the original sys.stdout"""
+    if isinstance(sys.stdout, ThreadOutput):
+        sys.stdout = sys.stdout.stream
+
+def captured(func, *args):
+    """Calls func with the current thread's output captured; returns (result, output text)"""
+    output = sys.stdout
+    if not isinstance(output, ThreadOutput):
+        return func(*args), ''
+    log = output.capture()
+    try:
+        return func(*args), log.getvalue()
+    finally:
+        output.release()
+
+def last_error(text, default="Conversion failed"):
+    """Last ❌ line of a captured output, without its marker"""
+    errors = [line for line in text.splitlines() if line.startswith('❌')]
+    return errors[-1][1:].strip() if errors else default
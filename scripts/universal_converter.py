@@ -4,25 +4,63 @@ Universal BO2Qlik Converter
 Automatically processes .unv and .unx files and generates Qlik Cloud scripts
 """
 
+import argparse
+import contextlib
+import hashlib
+import io
+import json
 import os
 import sys
-import zipfile
 import tempfile
-import shutil
-import xml.etree.ElementTree as ET
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
+from functools import partial
+
+from association_analysis import format_associations
+from fact_model import (FACTS_TABLE, LINK_TABLE, context_joins, format_fact_model, plan_star_schema, render_fact_load,
+                        render_link_table)
+from field_classifier import KeywordClassifier, load_keywords
+from incremental import format_report, write_incremental
+from load_script import field_expressions, render_table_load
+from member_parser import run_member_tasks, unv_member_tasks, unx_member_tasks
+from metadata_catalog import DEFAULT_CATALOG_PATH, MetadataCatalog
+from model_export import EXPORT_FORMATS, PYARROW_AVAILABLE, export_model, export_path
+from parse_cache import DEFAULT_CACHE_DIR, MODEL_FIELDS, ParseCache, universe_fingerprint
+from qvd_load import DEFAULT_QVD_PATH, is_incremental, plan_loads, qvd_path_setting, render_incremental_load
+from script_writer import write_script
+from stage_profiler import StageProfiler, profile_base_path
+from string_extractor import extract_strings
+from universe_model import UniverseModel, position_ids
+from unv_reader import UniverseArchiveReader
+
+# Bump whenever parsing changes the model, to invalidate cached models
+CONVERTER_VERSION = '2.6'
+
+# Default field categorization keywords (override with --keywords or $BO2QLIK_KEYWORDS)
+DEFAULT_KEYWORDS = {
+    'dimension': ['id', 'name', 'code', 'type', 'category', 'region', 'city', 'country', 'date', 'year', 'month', 'day'],
+    'measure': ['revenue', 'sales', 'amount', 'quantity', 'count', 'sum', 'total', 'price', 'cost', 'margin', 'profit']
+}
 
 class UniversalBO2QlikConverter:
     def __init__(self):
         self.file_path = None
         self.file_type = None  # 'unv' or 'unx'
-        self.extract_dir = None
-        self.tables = []
-        self.joins = []
-        self.objects = []
-        self.dimensions = []
-        self.measures = []
-        self.attributes = []
+        self.archive = None
+        self.output_name = None  # Fixed output file name (batch mode), timestamped otherwise
+        self.incremental = False  # Regenerate only the script sections whose model inputs changed
+        self.incremental_report = None
+        self.qvd_path = None  # QVD folder of the incremental fact loads (--qvd-incremental), full loads when None
+        self.export_format = None  # Columnar export of the parsed model next to the script ('columnar' or 'parquet')
+        self.cache = None  # Optional ParseCache (or MemoryParseCache)
+        self.catalog = None  # Optional MetadataCatalog recording the parsed model (--catalog)
+        self.model_cached = False  # True when the parsed model came from the cache
+        self.keywords_file = None  # JSON keyword categories for categorize_fields
+        self.classifier = None
+        self.profiler = None  # Optional StageProfiler (--profile)
+        self.member_workers = 1  # Members of the universe parsed concurrently (--member-jobs)
+        self.model = UniverseModel()  # Indexed model of the universe, built once after parsing or a cache hit
         
     def find_business_objects_file(self):
         """Automatically finds a .unv or .unx file in the data/ folder"""
@@ -51,150 +89,222 @@ class UniversalBO2QlikConverter:
         else:
             print("❌ No .unv or .unx file found in data/")
             return False
-    def extract_file(self):
-        """Extracts the file (UNV or UNX)"""
-        print(f"Extracting {self.file_type.upper()} file: {self.file_path}")
-        self.extract_dir = tempfile.mkdtemp(prefix=f"{self.file_type}_extract_")
-        with zipfile.ZipFile(self.file_path, 'r') as zip_ref:
-            zip_ref.extractall(self.extract_dir)
-        print(f"✅ {self.file_type.upper()} file extracted successfully")
+    def open_file(self):
+        """Opens the file (UNV or UNX) for direct in-archive reading"""
+        print(f"Opening {self.file_type.upper()} file: {self.file_path}")
+        self.archive = UniverseArchiveReader(self.file_path)
+        print(f"✅ {self.file_type.upper()} file opened ({len(self.archive.members)} members)")
         return True
+    def parse_members(self, tasks):
+        """Runs member parsing tasks, concurrently with member_workers > 1; returns {key: result}"""
+        return run_member_tasks(self.archive, tasks, self.member_workers)
     def parse_unv_file(self):
         """Parse a UNV file (legacy format)"""
         print("1. Parsing UNV file...")
+        results = self.parse_members(unv_member_tasks(self.archive))
+        parsed = {}
         # Parse Columns file (readable)
-        columns_file = os.path.join(self.extract_dir, 'Columns;')
-        if os.path.exists(columns_file):
-            with open(columns_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                fields = []
-                for line in content.split('\n'):
-                    if line.strip():
-                        fields.extend(line.split())
-                self.objects = [field for field in fields if field]
-                print(f"   📊 {len(self.objects)} fields found in Columns")
+        objects = results.get('columns', [])
+        if 'columns' in results:
+            print(f"   📊 {len(objects)} fields found in Columns")
         # Parse binary files for tables and joins
-        tables_file = os.path.join(self.extract_dir, 'Tables;')
-        if os.path.exists(tables_file):
-            with open(tables_file, 'rb') as f:
-                data = f.read()
-                strings = self.extract_strings(data)
-                self.tables = [s for s in strings if len(s) > 3]
-                print(f"   📋 {len(self.tables)} tables found")
-        joins_file = os.path.join(self.extract_dir, 'Joins;')
-        if os.path.exists(joins_file):
-            with open(joins_file, 'rb') as f:
-                data = f.read()
-                strings = self.extract_strings(data)
-                self.joins = [s for s in strings if len(s) > 3]
-                print(f"   🔗 {len(self.joins)} joins found")
-        self.categorize_fields()
+        if 'tables' in results:
+            parsed['tables'] = results['tables']
+            print(f"   📋 {len(parsed['tables'])} tables found")
+        # Prefer the typed join records of UNW_Storage over raw strings
+        joins = results['joins']
+        if joins['error']:
+            print(f"   ⚠️  UNW_Storage not decoded: {joins['error']}")
+        storage = joins['storage']
+        if storage:
+            parsed['join_records'] = storage['joins']
+            parsed['contexts'] = storage['contexts']
+            parsed['table_ids'] = {table['name']: table['id'] for table in storage['tables']}
+            parsed['table_columns'] = {table['name']: [(column['name'], column['type']) for column in table['columns']]
+                                       for table in storage['tables']}
+            print(f"   🔗 {len(storage['joins'])} joins found")
+            print(f"   🧭 {len(storage['contexts'])} contexts found")
+        elif joins['joins'] is not None:
+            parsed['joins'] = joins['joins']
+            print(f"   🔗 {len(joins['joins'])} joins found")
+        with self.stage('categorize'):
+            parsed['dimensions'], parsed['measures'] = self.categorize_fields(objects)
+        # Columns has no object ids: objects are numbered by their position in it
+        self.build_model(objects=objects, object_ids=position_ids(objects), **parsed)
         return True
     def parse_unx_file(self):
         """Parse a UNX file (new format)"""
         print("1. Parsing UNX file...")
+        results = self.parse_members(unx_member_tasks(self.archive))
+        parsed = {}
         # Parse datafoundation.xml
-        df_path = os.path.join(self.extract_dir, 'datafoundation', 'datafoundation.xml')
-        if os.path.exists(df_path):
-            tree = ET.parse(df_path)
-            root = tree.getroot()
-            ns = {'bip': 'http://www.sap.com/rws/bip'}
-            for table in root.findall('.//bip:table', ns):
-                name = table.get('name') or table.get('id')
-                if name:
-                    self.tables.append(name)
-                    print(f"   📋 Table found: {name}")
-            if not self.tables:
-                for table in root.findall('.//table'):
-                    name = table.get('name') or table.get('id')
-                    if name:
-                        self.tables.append(name)
-                        print(f"   📋 Table found (no namespace): {name}")
-            for join in root.findall('.//bip:join', ns):
-                expr = join.get('expression') or join.get('id')
-                if expr:
-                    self.joins.append(expr)
-                    print(f"   🔗 Join found: {expr}")
-            if not self.joins:
-                for join in root.findall('.//join'):
-                    expr = join.get('expression') or join.get('id')
-                    if expr:
-                        self.joins.append(expr)
-                        print(f"   🔗 Join found (no namespace): {expr}")
+        if 'datafoundation' in results:
+            datafoundation = results['datafoundation']
+            suffix = "" if datafoundation['namespaced']['tables'] else " (no namespace)"
+            for name in datafoundation['tables']:
+                print(f"   📋 Table found{suffix}: {name}")
+            suffix = "" if datafoundation['namespaced']['joins'] else " (no namespace)"
+            for expr in datafoundation['joins']:
+                print(f"   🔗 Join found{suffix}: {expr}")
+            # The XML ids are strings: tables and objects are numbered by their position, like the context joins
+            parsed.update(tables=datafoundation['tables'], joins=datafoundation['joins'],
+                          table_columns=datafoundation['columns'], contexts=datafoundation['contexts'],
+                          table_ids=position_ids(datafoundation['tables']))
         # Parse businesslayer.xml
-        bl_path = os.path.join(self.extract_dir, 'businesslayer', 'businesslayer.xml')
-        if os.path.exists(bl_path):
-            tree = ET.parse(bl_path)
-            root = tree.getroot()
-            ns = {'bip': 'http://www.sap.com/rws/bip'}
-            for obj in root.findall('.//bip:businessObject', ns):
-                name = obj.get('name') or obj.get('id')
+        if 'businesslayer' in results:
+            businesslayer = results['businesslayer']
+            suffix = "" if businesslayer['namespaced'] else " (no namespace)"
+            objects, dimensions, measures, attributes = [], [], [], []
+            for name, typ in businesslayer['objects']:
                 if name:
-                    self.objects.append(name)
-                    print(f"   📊 Object found: {name}")
-                typ = obj.get('type')
+                    objects.append(name)
+                    print(f"   📊 Object found{suffix}: {name}")
                 if typ == 'Dimension':
-                    self.dimensions.append(name)
-                    print(f"   📏 Dimension found: {name}")
+                    dimensions.append(name)
+                    print(f"   📏 Dimension found{suffix}: {name}")
                 elif typ == 'Measure':
-                    self.measures.append(name)
-                    print(f"   📈 Measure found: {name}")
+                    measures.append(name)
+                    print(f"   📈 Measure found{suffix}: {name}")
                 elif typ == 'Attribute':
-                    self.attributes.append(name)
-                    print(f"   🏷️  Attribute found: {name}")
-            if not self.objects:
-                for obj in root.findall('.//businessObject'):
-                    name = obj.get('name') or obj.get('id')
-                    if name:
-                        self.objects.append(name)
-                        print(f"   📊 Object found (no namespace): {name}")
-                    typ = obj.get('type')
-                    if typ == 'Dimension':
-                        self.dimensions.append(name)
-                        print(f"   📏 Dimension found (no namespace): {name}")
-                    elif typ == 'Measure':
-                        self.measures.append(name)
-                        print(f"   📈 Measure found (no namespace): {name}")
-                    elif typ == 'Attribute':
-                        self.attributes.append(name)
-                        print(f"   🏷️  Attribute found (no namespace): {name}")
+                    attributes.append(name)
+                    print(f"   🏷️  Attribute found{suffix}: {name}")
+            parsed.update(objects=objects, dimensions=dimensions, measures=measures, attributes=attributes,
+                          object_tables=businesslayer['bindings'], object_ids=position_ids(objects))
+        self.build_model(**parsed)
+        return True
+    def build_model(self, **lists):
+        """Builds the indexed UniverseModel of the universe from parsed (or cached) lists"""
+        with self.stage('model'):
+            self.model = UniverseModel.from_lists(**lists)
+        return self.model
+    def model_version(self):
+        """Version of the parsed model: converter version, file type and categorization keywords"""
+        # Keywords change the categorization of UNV fields, so they are part of the version
+        keywords = json.dumps(self.get_classifier().categories, sort_keys=True).encode('utf-8')
+        return f"{CONVERTER_VERSION}-{self.file_type}-{hashlib.sha1(keywords).hexdigest()[:12]}"
+    def cache_key(self):
+        """Cache key of the open universe: content fingerprint plus model version"""
+        return ParseCache.make_key(universe_fingerprint(self.archive.zip_file), self.model_version())
+    def load_cached_model(self):
+        """Loads the parsed model from the cache; returns False on a miss"""
+        if self.cache is None:
+            return False
+        lists = self.cache.get(self.cache_key())
+        if lists is None:
+            return False
+        self.build_model(**{field: lists[field] for field in MODEL_FIELDS if field in lists})
+        self.model_cached = True
+        print("1. ⚡ Parsed model loaded from cache")
+        return True
+    def store_cached_model(self):
+        """Stores the parsed model in the cache"""
+        if self.cache is None:
+            return
+        self.cache.put(self.cache_key(), self.model.to_lists())
+    def load_model(self):
+        """Loads the parsed model from the cache, or parses the open universe and caches it"""
+        with self.stage('cache_load'):
+            if self.load_cached_model():
+                return True
+        with self.stage('parse'):
+            if self.file_type == 'unx':
+                if not self.parse_unx_file():
+                    return False
+            else:
+                if not self.parse_unv_file():
+                    return False
+        with self.stage('cache_store'):
+            self.store_cached_model()
         return True
     def extract_strings(self, data):
         """Extracts readable strings from a binary file"""
-        strings = []
-        current_string = ""
-        for byte in data:
-            if 32 <= byte <= 126:
-                current_string += chr(byte)
-            else:
-                if len(current_string) > 3:
-                    strings.append(current_string)
-                current_string = ""
-        if len(current_string) > 3:
-            strings.append(current_string)
-        return strings
-    def categorize_fields(self):
-        """Categorizes fields into dimensions and measures"""
-        dimension_keywords = ['id', 'name', 'code', 'type', 'category', 'region', 'city', 'country', 'date', 'year', 'month', 'day']
-        measure_keywords = ['revenue', 'sales', 'amount', 'quantity', 'count', 'sum', 'total', 'price', 'cost', 'margin', 'profit']
-        for field in self.objects:
-            field_lower = field.lower()
-            is_dimension = any(keyword in field_lower for keyword in dimension_keywords)
-            is_measure = any(keyword in field_lower for keyword in measure_keywords)
-            if is_dimension and not is_measure:
-                self.dimensions.append(field)
-            elif is_measure:
-                self.measures.append(field)
-            else:
-                self.dimensions.append(field)
-    def generate_qlik_script(self):
-        """Generates the Qlik Cloud script"""
+        return extract_strings(data)
+    def get_classifier(self):
+        """Returns the keyword classifier, compiled once from the configured keywords"""
+        if self.classifier is None:
+            self.classifier = KeywordClassifier(load_keywords(self.keywords_file, DEFAULT_KEYWORDS))
+        return self.classifier
+    def categorize_fields(self, fields):
+        """Categorizes fields into (dimensions, measures)"""
+        # Fields with a measure keyword are measures, every other field is a dimension
+        is_measure = self.get_classifier().classify(fields, ('measure',))['measure']
+        dimensions, measures = [], []
+        for field, measure in zip(fields, is_measure):
+            (measures if measure else dimensions).append(field)
+        return dimensions, measures
+    def iter_qlik_script(self):
+        """Starts generating the Qlik Cloud script and returns its text chunks as an iterator"""
         print("2. Generating Qlik Cloud script...")
-        script = f"""// Qlik Cloud script generated from {self.file_type.upper()} Business Objects
+        return self._script_chunks()
+    def _script_chunks(self):
+        for _, _, render in self.script_sections():
+            yield render()
+    def script_sections(self):
+        """Yields the (section id, fingerprint inputs, render) of each script section, in order
+
+        The inputs are everything the section text depends on but the generation
+        date, so an incremental run only renders the sections whose inputs changed.
+        """
+        model = self.model
+        yield 'header', (self.file_type, os.path.basename(self.file_path), len(model.tables), len(model.objects),
+                         self.qvd_path), self._header_section
+        plans = self.load_plans() if self.qvd_path else {}
+        fact_model, associations = self.star_schema()
+        concatenated = fact_model['facts'] if fact_model and fact_model['strategy'] == 'concatenate' else ()
+        for table in model.tables:
+            plan = plans.get(table)
+            fields = self.table_fields(table)
+            if table in concatenated:
+                # Loaded into the Facts table (in full: the QVD pattern stores one table per fact)
+                inputs = (table, fields, fact_model['contexts'][table], fact_model['renames'][table],
+                          fact_model['facts'], associations['aliases'].get(FACTS_TABLE, {}),
+                          associations['keys'].get(FACTS_TABLE, []))
+                yield f"table:{table}", inputs, partial(self._fact_section, fact_model, table, associations)
+                continue
+            # Renamed fields and composite keys keeping only the join fields associated
+            resolution = (associations['aliases'].get(table, {}), associations['keys'].get(table, []))
+            inputs = (table,) + ((fields,) if fields else ()) + ((plan,) if is_incremental(plan) else ()) + \
+                ((resolution,) if any(resolution) else ())
+            if is_incremental(plan):
+                yield f"table:{table}", inputs, partial(self._incremental_table_section, table, plan, *resolution)
+            else:
+                yield f"table:{table}", inputs, partial(self._table_section, table, *resolution)
+        if fact_model and fact_model['strategy'] == 'link':
+            inputs = (fact_model['contexts'], fact_model['link_fields'],
+                      {table: (associations['aliases'].get(table, {}), associations['fields'].get(table, {}))
+                       for table in fact_model['facts'] + [LINK_TABLE]}, associations['keys'].get(LINK_TABLE, []))
+            yield 'link_table', inputs, partial(self._link_table_section, fact_model, associations)
+        if model.joins:
+            yield 'joins', model.join_expressions(), self._joins_section
+        report = (format_fact_model(fact_model) if fact_model else []) + format_associations(associations)
+        if report:
+            yield 'associations', report, partial(self._associations_section, report)
+        yield 'fields', [model.object_names(kind) for kind in ('Dimension', 'Measure', 'Attribute')], \
+            self._fields_section
+        for measure in model.object_names('Measure'):
+            yield f"measure:{measure}", (measure,), partial(self._measure_section, measure)
+        yield 'footer', (), self._footer_section
+    def table_fields(self, table):
+        """Column names of a table from the datafoundation (or UNW_Storage), empty if unknown"""
+        table = self.model.table(table)
+        return list(table.columns) if table else []
+    def load_plans(self):
+        """{table: load plan} of the QVD incremental mode (facts with a key reload incrementally)"""
+        return plan_loads(self.model.table_names(), self.model.table_columns(), self.model.join_expressions())
+    def star_schema(self):
+        """(fact model, association plan) of the tables: facts of the contexts linked or concatenated,
+        synthetic keys and loops found, renamed fields and composite keys"""
+        model = self.model
+        joins = model.join_expressions()
+        return plan_star_schema(model.table_names(), model.table_columns(), joins,
+                                context_joins(model.context_records(), joins, model.join_records()))
+    def _header_section(self):
+        qvd_setting = f"{qvd_path_setting(self.qvd_path)}\n" if self.qvd_path else ""
+        return f"""// Qlik Cloud script generated from {self.file_type.upper()} Business Objects
 // Source file: {os.path.basename(self.file_path)}
 // Generation date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-// Extracted tables: {len(self.tables)}
-// Extracted objects: {len(self.objects)}
+// Extracted tables: {len(self.model.tables)}
+// Extracted objects: {len(self.model.objects)}
 
 // ========================================
 // CONNECTION CONFIGURATION
@@ -204,7 +314,7 @@ LET vServer = 'your_db_server';
 LET vDatabase = 'your_database';
 LET vUsername = 'your_user';
 LET vPassword = 'your_password';
-
+{qvd_setting}
 // ========================================
 // DATABASE CONNECTION
 // ========================================
@@ -215,43 +325,68 @@ LET vPassword = 'your_password';
 // TABLE LOADING
 // ========================================
 """
-        for table in self.tables:
-            script += f"""
+    def _table_section(self, table, aliases=None, keys=()):
+        fields = self.table_fields(table)
+        if fields:
+            expressions = field_expressions(fields, aliases, keys) if aliases or keys else None
+            return "\n" + render_table_load(table, fields, expressions)
+        return f"""
 // Loading table {table}
 {table}:
 LOAD *
 FROM [{table}]
 ;"""
-        if self.joins:
-            script += f"""
+    def _incremental_table_section(self, table, plan, aliases=None, keys=()):
+        fields = self.table_fields(table)
+        if fields:
+            return "\n" + render_incremental_load(table, plan, table, fields, sql=True, aliases=aliases, keys=keys)
+        return "\n" + render_incremental_load(table, plan, f"[{table}]")
+    def _joins_section(self):
+        return f"""
 
 // ========================================
 // JOINS
 // ========================================
-"""
-            for join in self.joins:
-                script += f"// Join: {join}\n"
-        script += f"""
+""" + ''.join(f"// Join: {join.expression}\n" for join in self.model.joins)
+    def _fact_section(self, fact_model, table, associations):
+        return "\n" + render_fact_load(fact_model, table, self.table_fields(table), associations)
+    def _link_table_section(self, fact_model, associations):
+        return f"""
+
+// ========================================
+// LINK TABLE
+// ========================================
+""" + render_link_table(fact_model, associations) + "\n"
+    def _associations_section(self, report):
+        return f"""
+
+// ========================================
+// ASSOCIATIONS
+// ========================================
+""" + ''.join(f"{line}\n" for line in report)
+    def _fields_section(self):
+        return f"""
 
 // ========================================
 // DIMENSIONS AND MEASURES
 // ========================================
-// Available dimensions: {', '.join(self.dimensions)}
-// Available measures: {', '.join(self.measures)}
-// Available attributes: {', '.join(self.attributes)}
+// Available dimensions: {', '.join(self.model.object_names('Dimension'))}
+// Available measures: {', '.join(self.model.object_names('Measure'))}
+// Available attributes: {', '.join(self.model.object_names('Attribute'))}
 
 // ========================================
 // CALCULATION EXAMPLES
 // ========================================
 """
-        for measure in self.measures:
-            script += f"""
+    def _measure_section(self, measure):
+        return f"""
 // Calculation for {measure}
 // Sum({measure}) as Total_{measure}
 // Avg({measure}) as Avg_{measure}
 // Count({measure}) as Count_{measure}
 """
-        script += f"""
+    def _footer_section(self):
+        return f"""
 
 // ========================================
 // USAGE NOTES
@@ -266,24 +401,75 @@ FROM [{table}]
 // END OF SCRIPT
 // ========================================
 """
-        return script
-    def save_script(self, script):
-        """Saves the generated script"""
-        print("3. Saving script...")
+    def generate_qlik_script(self):
+        """Generates the Qlik Cloud script"""
+        return ''.join(self.iter_qlik_script())
+    def output_path(self):
+        """Path of the script to write (creates the output directory)"""
         output_dir = "../output"
         os.makedirs(output_dir, exist_ok=True)
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"qlik_script_{self.file_type}_{timestamp}.qvs"
-        filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(script)
+        if self.output_name:
+            filename = self.output_name
+        elif self.incremental:
+            # A stable name, so the next run finds the script and its manifest
+            stem = os.path.splitext(os.path.basename(self.file_path))[0]
+            filename = f"qlik_script_{stem}_{self.file_type}.qvs"
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = f"qlik_script_{self.file_type}_{timestamp}.qvs"
+        return os.path.join(output_dir, filename)
+    def save_script(self, script):
+        """Saves the generated script (a string or an iterator of text chunks)"""
+        print("3. Saving script...")
+        filepath = self.output_path()
+        write_script(filepath, script)
         print(f"✅ Script saved: {filepath}")
         return filepath
+    def save_incremental(self):
+        """Generates and saves the script, rendering only the sections changed since the last run"""
+        print("2. Generating Qlik Cloud script (incremental)...")
+        filepath = self.output_path()
+        self.incremental_report = write_incremental(filepath, self.script_sections(), CONVERTER_VERSION)
+        for line in format_report(self.incremental_report):
+            print(line)
+        if self.incremental_report['written']:
+            print(f"✅ Script saved: {filepath}")
+        return filepath
+    def record_in_catalog(self):
+        """Records the parsed model in the metadata catalog, unless it is already there unchanged"""
+        fingerprint = universe_fingerprint(self.archive.zip_file)
+        version = self.model_version()
+        if self.catalog.is_recorded(self.file_path, fingerprint, version):
+            print("🗂️  Catalog: universe unchanged")
+            return False
+        self.catalog.record(self.file_path, fingerprint, self.model, self.file_type, version)
+        print(f"🗂️  Catalog: universe recorded in {self.catalog.path}")
+        return True
+    def save_model_export(self, script_path):
+        """Exports the parsed model next to the script"""
+        path = export_model(self.model, export_path(script_path, self.export_format), self.export_format)
+        print(f"🗃️  Model exported: {path}")
+        return path
+    def stage(self, name):
+        """Context manager timing a conversion stage when profiling is enabled"""
+        if self.profiler is None:
+            return contextlib.nullcontext()
+        return self.profiler.stage(name)
+    def save_profile(self, output_file):
+        """Writes the stage profile next to the generated script"""
+        self.profiler.stop()
+        paths = self.profiler.write(profile_base_path(output_file), {
+            'file': self.file_path,
+            'file_type': self.file_type,
+            'converter_version': CONVERTER_VERSION
+        })
+        for path in paths:
+            print(f"⏱️  Profile saved: {path}")
     def cleanup(self):
-        """Cleans up temporary files"""
-        if self.extract_dir and os.path.exists(self.extract_dir):
-            shutil.rmtree(self.extract_dir, ignore_errors=True)
-            print("✅ Temporary files cleaned up")
+        """Closes the universe archive"""
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
     def run_conversion(self):
         """Runs the full conversion process"""
         print("=== UNIVERSAL BO2QLIK CONVERTER ===\n")
@@ -293,23 +479,46 @@ FROM [{table}]
                 if not self.find_business_objects_file():
                     return False
             
-            if not self.extract_file():
-                return False
-            if self.file_type == 'unx':
-                if not self.parse_unx_file():
-                    return False
-            else:
-                if not self.parse_unv_file():
+            if self.profiler:
+                self.profiler.start()
+            with self.stage('open'):
+                if not self.open_file():
                     return False
-            script = self.generate_qlik_script()
-            output_file = self.save_script(script)
+            if self.profiler:
+                self.profiler.read_counter = lambda archive=self.archive: archive.bytes_read
+            if not self.load_model():
+                return False
+            # The script is streamed to disk as it is generated, so both are one stage
+            with self.stage('generate_save'):
+                if self.incremental:
+                    output_file = self.save_incremental()
+                else:
+                    output_file = self.save_script(self.iter_qlik_script())
+            if self.export_format:
+                with self.stage('export'):
+                    self.save_model_export(output_file)
+            if self.catalog is not None:
+                with self.stage('catalog'):
+                    self.record_in_catalog()
+            if self.profiler:
+                self.save_profile(output_file)
             print("\n=== CONVERSION SUMMARY ===")
             print(f"📁 {self.file_type.upper()} file processed: {os.path.basename(self.file_path)}")
-            print(f"📊 Tables extracted: {len(self.tables)}")
-            print(f"🔗 Joins extracted: {len(self.joins)}")
-            print(f"📏 Dimensions found: {len(self.dimensions)}")
-            print(f"📈 Measures found: {len(self.measures)}")
-            print(f"🏷️  Attributes found: {len(self.attributes)}")
+            print(f"📊 Tables extracted: {len(self.model.tables)}")
+            print(f"🔗 Joins extracted: {len(self.model.joins)}")
+            print(f"📏 Dimensions found: {len(self.model.object_names('Dimension'))}")
+            print(f"📈 Measures found: {len(self.model.object_names('Measure'))}")
+            print(f"🏷️  Attributes found: {len(self.model.object_names('Attribute'))}")
+            fact_model, associations = self.star_schema()
+            if fact_model:
+                print(f"⭐ Star schema: {len(fact_model['facts'])} facts "
+                      f"({'link table' if fact_model['strategy'] == 'link' else 'concatenated'})")
+            if associations['synthetic_keys'] or associations['loops']:
+                print(f"🧩 Associations resolved: {len(associations['synthetic_keys'])} synthetic keys, "
+                      f"{len(associations['loops'])} circular references")
+            if self.qvd_path:
+                incremental_tables = sum(map(is_incremental, self.load_plans().values()))
+                print(f"🔁 Incremental QVD loads: {incremental_tables} fact tables")
             print(f"📄 Script generated: {os.path.basename(output_file)}")
             print(f"\n🎉 {self.file_type.upper()} conversion completed successfully!")
             return True
@@ -318,19 +527,228 @@ FROM [{table}]
             return False
         finally:
             self.cleanup()
+            if self.profiler:
+                self.profiler.stop()
+def detect_file_type(file_path):
+    """Returns 'unv' or 'unx' from the file extension, None if unsupported"""
+    if file_path.endswith('.unv'):
+        return 'unv'
+    if file_path.endswith('.unx'):
+        return 'unx'
+    return None
+
+def find_universe_files(directory):
+    """Recursively lists the .unv and .unx files of a directory, sorted"""
+    universe_files = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for file in sorted(files):
+            if detect_file_type(file):
+                universe_files.append(os.path.join(root, file))
+    return universe_files
+
+def batch_output_name(file_path, directory):
+    """Builds a stable, collision-free script name from the path relative to the batch directory"""
+    relative = os.path.relpath(file_path, directory)
+    stem = os.path.splitext(relative)[0].replace(os.sep, '__')
+    return f"qlik_script_{stem}_{detect_file_type(file_path)}.qvs"
+
+def _init_batch_worker(temp_root):
+    """Gives each worker process its own temporary directory"""
+    tempfile.tempdir = tempfile.mkdtemp(prefix=f"worker_{os.getpid()}_", dir=temp_root)
+
+def convert_universe(file_path, output_name=None, cache_dir=None, keywords_file=None, profile=False, pstats=False,
+                     incremental=False, export_format=None, catalog_path=None, qvd_path=None):
+    """Converts one universe quietly and returns a result record (batch worker)"""
+    start = time.perf_counter()
+    log = io.StringIO()
+    converter = UniversalBO2QlikConverter()
+    converter.file_path = file_path
+    converter.file_type = detect_file_type(file_path)
+    converter.output_name = output_name
+    converter.keywords_file = keywords_file
+    converter.incremental = incremental
+    converter.export_format = export_format
+    converter.qvd_path = qvd_path
+    if profile or pstats:
+        converter.profiler = StageProfiler(cprofile=pstats)
+    if cache_dir:
+        converter.cache = ParseCache(cache_dir)
+    with contextlib.redirect_stdout(log):
+        if catalog_path:
+            with MetadataCatalog(catalog_path) as converter.catalog:
+                success = converter.run_conversion()
+        else:
+            success = converter.run_conversion()
+    error = None
+    if not success:
+        errors = [line for line in log.getvalue().splitlines() if line.startswith('❌')]
+        error = errors[-1] if errors else "Conversion failed"
+    return {
+        'file': file_path,
+        'success': success,
+        'seconds': time.perf_counter() - start,
+        'tables': len(converter.model.tables),
+        'joins': len(converter.model.joins),
+        'objects': len(converter.model.objects),
+        'output': output_name,
+        'error': error,
+        'incremental': converter.incremental_report
+    }
+
+def print_batch_result(result, directory):
+    status = "✅" if result['success'] else "❌"
+    report = result.get('incremental')
+    changes = ""
+    if report and not report['full']:
+        changes = f", {len(report['changed']) + len(report['added']) + len(report['removed'])} sections changed" \
+            if report['written'] else ", unchanged"
+    print(f"{status} {os.path.relpath(result['file'], directory)} ({result['seconds']:.2f}s{changes})")
+
+def run_batch(directory, jobs=None, cache_dir=None, keywords_file=None, profile=False, pstats=False, pipeline=False,
+              incremental=False, export_format=None, catalog_path=None, qvd_path=None):
+    """Converts every universe of a directory in a process pool and prints a summary
+
+    With pipeline, universes go through the asyncio stage pipeline of async_pipeline
+    instead (jobs is then the number of parse workers; profiling is not supported).
+    """
+    print("=== UNIVERSAL BO2QLIK CONVERTER - BATCH MODE ===\n")
+    if not os.path.isdir(directory):
+        print(f"❌ Directory not found: {directory}")
+        return False
+    universe_files = find_universe_files(directory)
+    if not universe_files:
+        print(f"❌ No .unv or .unx file found in {directory}")
+        return False
+    if pipeline:
+        from async_pipeline import run_pipeline
+        jobs = jobs or os.cpu_count() or 1
+        print(f"📁 {len(universe_files)} universes found, asyncio pipeline with {jobs} parse workers")
+        start = time.perf_counter()
+        results, stage_seconds = run_pipeline(
+            [(file_path, batch_output_name(file_path, directory)) for file_path in universe_files],
+            jobs, cache_dir=cache_dir, keywords_file=keywords_file,
+            on_result=lambda result: print_batch_result(result, directory))
+        elapsed = time.perf_counter() - start
+        print_batch_summary(results, elapsed, directory)
+        print("⏱️  Stage busy time: " + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in stage_seconds.items()))
+        return all(result['success'] for result in results)
+    jobs = jobs or os.cpu_count() or 1
+    print(f"📁 {len(universe_files)} universes found, {jobs} worker processes")
+    start = time.perf_counter()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bo2qlik_batch_") as temp_root:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_batch_worker, initargs=(temp_root,)) as executor:
+            futures = {
+                executor.submit(convert_universe, file_path, batch_output_name(file_path, directory),
+                                cache_dir, keywords_file, profile, pstats, incremental, export_format,
+                                catalog_path, qvd_path): file_path
+                for file_path in universe_files
+            }
+            for future in as_completed(futures):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'file': futures[future], 'success': False, 'seconds': 0.0,
+                              'tables': 0, 'joins': 0, 'objects': 0, 'output': None, 'error': f"❌ Worker error: {e}"}
+                print_batch_result(result, directory)
+                results.append(result)
+    elapsed = time.perf_counter() - start
+    print_batch_summary(results, elapsed, directory)
+    return all(result['success'] for result in results)
+
+def print_batch_summary(results, elapsed, directory):
+    """Prints per-file timings, failures and throughput of a batch run"""
+    results = sorted(results, key=lambda result: result['file'])
+    failures = [result for result in results if not result['success']]
+    print("\n=== BATCH SUMMARY ===")
+    for result in results:
+        status = "OK  " if result['success'] else "FAIL"
+        print(f"{status} {result['seconds']:8.2f}s  {result['tables']:5d} tables  {result['joins']:5d} joins  "
+              f"{result['objects']:6d} objects  {os.path.relpath(result['file'], directory)}")
+    print(f"\n📁 Universes processed: {len(results)}")
+    print(f"✅ Succeeded: {len(results) - len(failures)}")
+    print(f"❌ Failed: {len(failures)}")
+    for result in failures:
+        print(f"   - {os.path.relpath(result['file'], directory)}: {result['error']}")
+    cumulated = sum(result['seconds'] for result in results)
+    print(f"⏱️  Wall time: {elapsed:.2f}s (cumulated conversion time: {cumulated:.2f}s)")
+    if elapsed > 0:
+        print(f"🚀 Throughput: {len(results) / elapsed:.2f} universes/s")
+
 def main():
+    parser = argparse.ArgumentParser(description="Converts Business Objects universes (.unv/.unx) to Qlik Cloud scripts")
+    parser.add_argument('file', nargs='?', help="Universe file to convert (default: first file found in ../data)")
+    parser.add_argument('--batch', metavar='DIR', help="Convert every .unv/.unx file of a directory")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="Worker processes for --batch (default: CPU count)")
+    parser.add_argument('--member-jobs', type=int, default=1,
+                        help="Parse the members of a single universe concurrently in N processes (0: CPU count)")
+    parser.add_argument('--pipeline', action='store_true',
+                        help="With --batch, overlap reading, parsing and writing in an asyncio pipeline")
+    parser.add_argument('--cache', action='store_true', help="Reuse parsed models of unchanged universes")
+    parser.add_argument('--cache-dir', default=None, help="Parse cache directory (default: ../cache or $BO2QLIK_CACHE_DIR)")
+    parser.add_argument('--keywords', metavar='FILE', default=None,
+                        help="JSON dimension/measure keywords for field categorization (default: $BO2QLIK_KEYWORDS)")
+    parser.add_argument('--profile', action='store_true',
+                        help="Record per-stage time, memory and bytes read in <script>.profile.json")
+    parser.add_argument('--pstats', action='store_true', help="With --profile, also dump a cProfile <script>.pstats")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Keep a section manifest next to the script and only regenerate changed sections")
+    parser.add_argument('--export-model', nargs='?', const='columnar', choices=EXPORT_FORMATS, default=None,
+                        help="Also export the parsed model next to the script (columnar by default, parquet needs pyarrow)")
+    parser.add_argument('--catalog', nargs='?', const=DEFAULT_CATALOG_PATH, default=None, metavar='DB',
+                        help="Record the parsed models in a SQLite metadata catalog (default: ../catalog/universes.db)")
+    parser.add_argument('--qvd-incremental', nargs='?', const=DEFAULT_QVD_PATH, default=None, metavar='QVD_PATH',
+                        help="Reload fact tables incrementally through QVD files (default folder: lib://QVD/)")
+    parser.add_argument('--serve', action='store_true', help="Run a local conversion server keeping parsed models in memory")
+    parser.add_argument('--host', default='127.0.0.1', help="--serve address (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="--serve port (default: 8765)")
+    parser.add_argument('--socket', metavar='PATH', default=None, help="Serve on a Unix socket instead of a TCP port")
+    parser.add_argument('--workers', type=int, default=None, help="--serve worker threads (default: CPU count + 4)")
+    parser.add_argument('--max-models', type=int, default=64, help="Parsed models kept in memory by --serve (default: 64)")
+    args = parser.parse_args()
+    cache_dir = (args.cache_dir or DEFAULT_CACHE_DIR) if args.cache or args.cache_dir else None
+    if args.export_model == 'parquet' and not PYARROW_AVAILABLE:
+        print("❌ --export-model parquet requires pyarrow (pip install pyarrow)")
+        return False
+
+    if args.member_jobs != 1 and (args.batch or args.serve):
+        # --batch and --serve already spread universes over their workers
+        print("❌ --member-jobs is only supported for a single universe, not with --batch or --serve")
+        return False
+
+    if args.serve:
+        from conversion_server import serve
+        return serve(args.host, args.port, args.socket, args.workers, args.max_models, cache_dir, args.keywords)
+
+    if args.batch:
+        if args.pipeline and (args.incremental or args.export_model or args.catalog or args.qvd_incremental or
+                              args.profile or args.pstats):
+            print("❌ --incremental, --export-model, --catalog, --qvd-incremental, --profile and --pstats "
+                  "are not supported with --pipeline")
+            return False
+        return run_batch(args.batch, args.jobs, cache_dir, args.keywords, args.profile, args.pstats, args.pipeline,
+                         args.incremental, args.export_model, args.catalog, args.qvd_incremental)
+
     converter = UniversalBO2QlikConverter()
+    converter.keywords_file = args.keywords
+    converter.incremental = args.incremental
+    converter.member_workers = args.member_jobs
+    converter.export_format = args.export_model
+    converter.qvd_path = args.qvd_incremental
+    if args.profile or args.pstats:
+        converter.profiler = StageProfiler(cprofile=args.pstats)
+    if cache_dir:
+        converter.cache = ParseCache(cache_dir)
     
     # Check if a specific file was provided as argument
-    if len(sys.argv) > 1:
-        file_path = sys.argv[1]
+    if args.file:
+        file_path = args.file
         if os.path.exists(file_path):
             converter.file_path = file_path
-            if file_path.endswith('.unv'):
-                converter.file_type = 'unv'
-            elif file_path.endswith('.unx'):
-                converter.file_type = 'unx'
-            else:
+            converter.file_type = detect_file_type(file_path)
+            if not converter.file_type:
                 print(f"❌ Unsupported file format: {file_path}")
                 return False
             print(f"📁 Processing specified file: {file_path}")
@@ -338,9 +756,12 @@ def main():
             print(f"❌ File not found: {file_path}")
             return False
     
+    if args.catalog:
+        with MetadataCatalog(args.catalog) as converter.catalog:
+            return converter.run_conversion()
     success = converter.run_conversion()
     return success
 
 if __name__ == '__main__':
     success = main()
-    sys.exit(0 if success else 1) 
\ No newline at end of file
+    sys.exit(0 if success else 1)
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Synthetic universe generator for load testing
+Builds .unv or .unx universes of any size from a few parameters (tables,
+columns per table, joins, contexts, objects, hierarchies, seed), streaming
+every XML and binary member straight into the ZIP so memory stays bounded
+whatever the universe size
+
+Tables form a random join tree (each table references a random earlier one),
+extra joins are composite joins on a shared code, and every name is derived
+from its index so nothing but the join tree is kept in memory.
+"""
+
+import argparse
+import random
+import sys
+import zipfile
+from array import array
+
+from unv_storage import encode_context, encode_count, encode_join, encode_table
+
+# Column suffixes: the classifier keywords make them dimensions or measures
+DIMENSION_SUFFIXES = ('name', 'code', 'label', 'date', 'city', 'category')
+MEASURE_SUFFIXES = ('amount', 'quantity', 'price', 'cost', 'revenue', 'margin')
+SUFFIXES = DIMENSION_SUFFIXES + MEASURE_SUFFIXES
+SHARED_COLUMN = 'Shared_code'
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+class _BufferedMember:
+    """Groups small writes into large ones before they reach the compressor"""
+
+    def __init__(self, stream, buffer_size=WRITE_BUFFER_SIZE):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.chunks = []
+        self.pending = 0
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.chunks.append(data)
+        self.pending += len(data)
+        if self.pending >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.chunks:
+            self.stream.write(b''.join(self.chunks))
+            self.chunks = []
+            self.pending = 0
+
+class UniverseGenerator:
+    def __init__(self, tables=100, columns_per_table=10, joins=None, contexts=2, objects=None,
+                 hierarchies=4, seed=42):
+        if tables < 1 or columns_per_table < 3:
+            raise ValueError("At least 1 table and 3 columns per table are required")
+        self.table_count = tables
+        self.columns_per_table = columns_per_table
+        self.join_count = tables - 1 if joins is None else joins
+        self.context_count = contexts
+        self.object_count = tables * columns_per_table if objects is None else objects
+        self.hierarchy_count = hierarchies
+        self.seed = seed
+        # Parent of each table in the join tree: the only per-table state kept
+        rng = random.Random(seed)
+        self.parents = array('I', [0] * tables)
+        for table in range(1, tables):
+            self.parents[table] = rng.randrange(table)
+
+    # Names and types, derived from indexes
+
+    @staticmethod
+    def table_name(table):
+        return f"Table_{table:07d}"
+
+    def column(self, table, index):
+        """(name, type) of a column: primary key, parent key, shared code, then data columns"""
+        if index == 0:
+            return f"{self.table_name(table)}_id", 'Numeric'
+        if index == 1:
+            return (f"{self.table_name(self.parents[table])}_id" if table else "Parent_id"), 'Numeric'
+        if index == 2:
+            return SHARED_COLUMN, 'Character'
+        suffix = SUFFIXES[(table * 7 + index) % len(SUFFIXES)]
+        if suffix in MEASURE_SUFFIXES:
+            column_type = 'Numeric'
+        elif suffix == 'date':
+            column_type = 'Date'
+        else:
+            column_type = 'Character'
+        return f"Col_{index:03d}_{suffix}", column_type
+
+    def columns(self, table):
+        return [self.column(table, index) for index in range(self.columns_per_table)]
+
+    def join(self, join):
+        """(left table, right table, [(left column, right column)]) of a join"""
+        if join < self.table_count - 1:
+            child = join + 1
+            parent = self.parents[child]
+            key = f"{self.table_name(parent)}_id"
+            return parent, child, [(key, key)]
+        # Extra joins: composite joins between pseudo-random pairs of tables
+        left = (join * 7919) % self.table_count
+        right = (left + 1 + (join * 104729) % max(self.table_count - 1, 1)) % self.table_count
+        return left, right, [(SHARED_COLUMN, SHARED_COLUMN), (f"{self.table_name(left)}_id", f"{self.table_name(left)}_id")]
+
+    def join_expression(self, join):
+        left, right, pairs = self.join(join)
+        return ' and '.join(f"{self.table_name(left)}.{l}={self.table_name(right)}.{r}" for l, r in pairs)
+
+    def context_joins(self, context):
+        """Joins of a context: join k belongs to context k % contexts"""
+        return range(context, self.join_count, self.context_count)
+
+    def business_object(self, index):
+        """(name, kind, table, column name) of a business object"""
+        table = index % self.table_count
+        column_index = 3 + (index // self.table_count) % (self.columns_per_table - 3) \
+            if self.columns_per_table > 3 else 0
+        column_name, _ = self.column(table, column_index)
+        suffix = column_name.rsplit('_', 1)[-1]
+        if suffix in MEASURE_SUFFIXES:
+            kind = 'Measure'
+        elif index % 10 == 9:
+            kind = 'Attribute'
+        else:
+            kind = 'Dimension'
+        return f"Obj_{index:07d}_{suffix}", kind, table, column_name
+
+    def hierarchy_levels(self, hierarchy, levels=3):
+        """Objects of a hierarchy, from top to bottom level"""
+        if not self.object_count:
+            return []
+        return [(hierarchy * levels + level) % self.object_count for level in range(levels)]
+
+    # Writers
+
+    def _open(self, zip_file, name):
+        # force_zip64: member sizes are not known in advance and may exceed 4 GB
+        return zip_file.open(name, 'w', force_zip64=True)
+
+    def write(self, path, compresslevel=1):
+        """Writes the universe; the format (.unv or .unx) comes from the extension"""
+        if path.endswith('.unx'):
+            writer = self.write_unx_members
+        elif path.endswith('.unv'):
+            writer = self.write_unv_members
+        else:
+            raise ValueError(f"Unsupported universe extension: {path}")
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as zip_file:
+            writer(zip_file)
+        return path
+
+    def _write_member(self, zip_file, name, chunks):
+        with self._open(zip_file, name) as stream:
+            member = _BufferedMember(stream)
+            for chunk in chunks:
+                member.write(chunk)
+            member.flush()
+
+    def write_unv_members(self, zip_file):
+        self._write_member(zip_file, 'UNW_Storage/Tables/Tables', self._unv_tables())
+        self._write_member(zip_file, 'UNW_Storage/Joins/Joins', self._unv_joins())
+        self._write_member(zip_file, 'UNW_Storage/Contexts/Contexts', self._unv_contexts())
+        self._write_member(zip_file, 'UNW_Storage/Hierarchies/Hierarchies', self._unv_hierarchies())
+        # Legacy members read by the string-based parsers
+        padding = b'\x00\x01\x02'
+        self._write_member(zip_file, 'Tables;', (padding + self.table_name(table).encode('ascii')
+                                                 for table in range(self.table_count)))
+        self._write_member(zip_file, 'Joins;', (padding + self.join_expression(join).encode('ascii')
+                                                for join in range(self.join_count)))
+        self._write_member(zip_file, 'Columns;', (self.business_object(index)[0] + '\n'
+                                                  for index in range(self.object_count)))
+        rng = random.Random(self.seed)
+        zip_file.writestr('BO_checksum', bytes(rng.randrange(256) for _ in range(18)))
+
+    def _unv_tables(self):
+        yield encode_count(self.table_count)
+        for table in range(self.table_count):
+            yield encode_table(table + 1, self.table_name(table), self.columns(table))
+
+    def _unv_joins(self):
+        yield encode_count(self.join_count)
+        for join in range(self.join_count):
+            left, right, pairs = self.join(join)
+            if len(pairs) == 1:
+                template = '='
+            else:
+                template = ' and '.join('\x01=\x01' for _ in pairs)
+            references = []
+            for left_column, right_column in pairs:
+                references.append((left + 1, left_column))
+                references.append((right + 1, right_column))
+            yield encode_join(join + 1, left + 1, right + 1, template, references)
+
+    def _unv_contexts(self):
+        yield encode_count(self.context_count)
+        for context in range(self.context_count):
+            join_ids = [join + 1 for join in self.context_joins(context)]
+            yield encode_context(context + 1, f"Context_{context:04d}", join_ids)
+
+    def _unv_hierarchies(self):
+        # Synthetic layout (same record framing as contexts): not decoded by the converters
+        yield encode_count(self.hierarchy_count)
+        for hierarchy in range(self.hierarchy_count):
+            levels = [index + 1 for index in self.hierarchy_levels(hierarchy)]
+            yield encode_context(hierarchy + 1, f"Hierarchy_{hierarchy:04d}", levels)
+
+    def write_unx_members(self, zip_file):
+        self._write_member(zip_file, 'datafoundation/datafoundation.xml', self._unx_datafoundation())
+        self._write_member(zip_file, 'businesslayer/businesslayer.xml', self._unx_businesslayer())
+
+    def _unx_datafoundation(self):
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<dataFoundation xmlns="http://www.sap.com/rws/bip">\n    <tables>\n')
+        for table in range(self.table_count):
+            name = self.table_name(table)
+            columns = ''.join(f'                <column id="C{table}_{index}" name="{column_name}" type="{column_type}"/>\n'
+                              for index, (column_name, column_type) in enumerate(self.columns(table)))
+            yield (f'        <table id="T{table}" name="{name}" description="Table {table}">\n'
+                   f'            <columns>\n{columns}            </columns>\n        </table>\n')
+        yield '    </tables>\n    <joins>\n'
+        for join in range(self.join_count):
+            left, right, _ = self.join(join)
+            yield (f'        <join id="J{join}" name="Join_{join}" leftTable="T{left}" rightTable="T{right}">\n'
+                   f'            <expression>{self.join_expression(join)}</expression>\n'
+                   f'        </join>\n')
+        yield '    </joins>\n    <contexts>\n'
+        for context in range(self.context_count):
+            # joinRef, not join: contexts must not be mistaken for joins
+            refs = ''.join(f'            <joinRef id="J{join}"/>\n' for join in self.context_joins(context))
+            yield f'        <context id="CTX{context}" name="Context_{context:04d}">\n{refs}        </context>\n'
+        yield '    </contexts>\n</dataFoundation>'
+
+    def _unx_businesslayer(self):
+        yield ('<?xml version="1.0" encoding="UTF-8"?>\n'
+               '<businessLayer xmlns="http://www.sap.com/rws/bip">\n    <businessObjects>\n')
+        for index in range(self.object_count):
+            name, kind, table, column_name = self.business_object(index)
+            yield (f'        <businessObject id="BO{index}" name="{name}" type="{kind}">\n'
+                   f'            <description>{column_name} of {self.table_name(table)}</description>\n'
+                   f'            <dataFoundation>\n'
+                   f'                <table id="T{table}" name="{self.table_name(table)}"/>\n'
+                   f'            </dataFoundation>\n'
+                   f'        </businessObject>\n')
+        yield '    </businessObjects>\n    <hierarchies>\n'
+        for hierarchy in range(self.hierarchy_count):
+            levels = ''.join(f'            <level businessObjectRef="BO{index}"/>\n'
+                             for index in self.hierarchy_levels(hierarchy))
+            yield f'        <hierarchy id="H{hierarchy}" name="Hierarchy_{hierarchy:04d}">\n{levels}        </hierarchy>\n'
+        yield '    </hierarchies>\n</businessLayer>'
+
+def generate_universe(path, tables=100, columns_per_table=10, joins=None, contexts=2, objects=None,
+                      hierarchies=4, seed=42, compresslevel=1):
+    """Generates a synthetic .unv or .unx universe and returns its path"""
+    generator = UniverseGenerator(tables, columns_per_table, joins, contexts, objects, hierarchies, seed)
+    return generator.write(path, compresslevel)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates synthetic .unv/.unx universes for load testing")
+    parser.add_argument('output', help="Universe to create (.unv or .unx)")
+    parser.add_argument('--tables', type=int, default=100)
+    parser.add_argument('--columns', type=int, default=10, help="Columns per table (at least 3)")
+    parser.add_argument('--joins', type=int, default=None, help="Joins (default: tables - 1, a join tree)")
+    parser.add_argument('--contexts', type=int, default=2)
+    parser.add_argument('--objects', type=int, default=None, help="Business objects (default: tables x columns)")
+    parser.add_argument('--hierarchies', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--compress-level', type=int, default=1, help="Deflate level, 0-9 (default: 1, fastest)")
+    args = parser.parse_args()
+    try:
+        generate_universe(args.output, args.tables, args.columns, args.joins, args.contexts, args.objects,
+                          args.hierarchies, args.seed, args.compress_level)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+    with zipfile.ZipFile(args.output) as zip_file:
+        size = sum(info.file_size for info in zip_file.infolist())
+    print(f"✅ Universe generated: {args.output} ({size / 1024 / 1024:.1f} MB uncompressed)")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Indexed universe metadata model
+Compact entity classes (__slots__, interned names) with dict indexes by id and
+by name, and a table -> columns -> objects adjacency index. The universal
+converter builds one model per parsed (or cached) UNV or UNX universe and
+generates from it; the list views below give the planning passes and the
+parse cache the shapes they take.
+"""
+
+import sys
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+def position_ids(names):
+    """{name: 1-based position of its first occurrence}, the ids of entities without a numeric one"""
+    ids = {}
+    for position, name in enumerate(names, 1):
+        if name:
+            ids.setdefault(name, position)
+    return ids
+
+class Table:
+    __slots__ = ('id', 'name', 'columns', 'objects')
+
+    def __init__(self, name, table_id=None):
+        self.id = table_id
+        self.name = name
+        self.columns = {}  # column name -> Column
+        self.objects = []  # BusinessObjects bound to this table
+
+    def __repr__(self):
+        return f"Table({self.name!r}, {len(self.columns)} columns)"
+
+class Column:
+    __slots__ = ('table', 'name', 'type', 'objects')
+
+    def __init__(self, table, name, column_type=None):
+        self.table = table
+        self.name = name
+        self.type = column_type
+        self.objects = ()  # Few per column: tuples are grown on binding
+
+    def __repr__(self):
+        return f"Column({self.table.name}.{self.name})"
+
+class Join:
+    __slots__ = ('id', 'expression', 'left_table', 'right_table', 'operator', 'pairs')
+
+    def __init__(self, expression, join_id=None, left_table=None, right_table=None, operator=None, pairs=()):
+        self.id = join_id
+        self.expression = expression
+        self.left_table = left_table
+        self.right_table = right_table
+        self.operator = operator
+        self.pairs = tuple(tuple(pair) for pair in pairs)
+
+    def __repr__(self):
+        return f"Join({self.expression!r})"
+
+class BusinessObject:
+    __slots__ = ('id', 'name', 'kind', 'tables', 'columns')
+
+    def __init__(self, name, kind=None, object_id=None):
+        self.id = object_id
+        self.name = name
+        self.kind = kind  # 'Dimension', 'Measure', 'Attribute' or None
+        # Most objects are bound to one or two tables: empty tuples cost nothing
+        self.tables = ()
+        self.columns = ()
+
+    def __repr__(self):
+        return f"BusinessObject({self.name!r}, {self.kind})"
+
+class Context:
+    __slots__ = ('id', 'name', 'joins')
+
+    def __init__(self, name, context_id=None, joins=()):
+        self.id = context_id
+        self.name = name
+        self.joins = list(joins)
+
+    def __repr__(self):
+        return f"Context({self.name!r}, {len(self.joins)} joins)"
+
+class UniverseModel:
+    def __init__(self):
+        self.tables = {}  # name -> Table, in insertion order
+        self.tables_by_id = {}
+        self.joins = []
+        self.joins_by_id = {}
+        self.objects = {}  # name -> BusinessObject, in insertion order
+        self.objects_by_id = {}
+        self.contexts = {}  # name -> Context
+        self.columns_by_name = {}  # column name -> [Column] across tables
+
+    # Building
+
+    def add_table(self, name, table_id=None):
+        """Adds a table (or returns the existing one with that name)"""
+        name = _intern(name)
+        table = self.tables.get(name)
+        if table is None:
+            table = Table(name, table_id)
+            self.tables[name] = table
+        if table_id is not None:
+            table.id = table_id
+            self.tables_by_id[table_id] = table
+        return table
+
+    def add_column(self, table_name, column_name, column_type=None):
+        """Adds a column to a table, creating the table if needed"""
+        table = self.add_table(table_name)
+        column_name = _intern(column_name)
+        column = table.columns.get(column_name)
+        if column is None:
+            column = Column(table, column_name, _intern(column_type))
+            table.columns[column_name] = column
+            self.columns_by_name.setdefault(column_name, []).append(column)
+        elif column_type and not column.type:
+            column.type = _intern(column_type)
+        return column
+
+    def add_join(self, expression, join_id=None, left_table=None, right_table=None, operator=None, pairs=()):
+        join = Join(_intern(expression), join_id, _intern(left_table), _intern(right_table), _intern(operator), pairs)
+        self.joins.append(join)
+        if join_id is not None:
+            self.joins_by_id[join_id] = join
+        return join
+
+    def add_object(self, name, kind=None, object_id=None, tables=()):
+        """Adds a business object (or updates the existing one) and binds it to tables"""
+        # Object names are unique keys of self.objects: interning them would only grow the intern table
+        obj = self.objects.get(name)
+        if obj is None:
+            obj = BusinessObject(name, _intern(kind), object_id)
+            self.objects[name] = obj
+        elif kind and not obj.kind:
+            obj.kind = _intern(kind)
+        if object_id is not None:
+            obj.id = object_id
+            self.objects_by_id[object_id] = obj
+        for table_name in tables:
+            self.bind_object(obj, self.add_table(table_name))
+        return obj
+
+    def bind_object(self, obj, table, column_name=None):
+        """Links an object to a table, and to the column of that table with the given (or its own) name"""
+        if table not in obj.tables:
+            obj.tables += (table,)
+            table.objects.append(obj)
+        column = table.columns.get(column_name or obj.name)
+        if column is not None and obj not in column.objects:
+            column.objects += (obj,)
+            obj.columns += (column,)
+
+    def add_context(self, name, context_id=None, joins=()):
+        context = Context(_intern(name), context_id, joins)
+        self.contexts[context.name] = context
+        return context
+
+    def link_objects_to_columns(self):
+        """Binds unbound objects to every column carrying their name (UNV objects are column names)"""
+        for obj in self.objects.values():
+            if obj.tables:
+                continue
+            for column in self.columns_by_name.get(obj.name, ()):
+                self.bind_object(obj, column.table, column.name)
+
+    # Lookups
+
+    def table(self, name):
+        return self.tables.get(name)
+
+    def object(self, name):
+        return self.objects.get(name)
+
+    def has_table(self, name):
+        return name in self.tables
+
+    def has_object(self, name):
+        return name in self.objects
+
+    def columns_of(self, table_name):
+        table = self.tables.get(table_name)
+        return list(table.columns.values()) if table else []
+
+    def objects_of_table(self, table_name):
+        """Objects bound to a table, directly or through one of its columns"""
+        table = self.tables.get(table_name)
+        return list(table.objects) if table else []
+
+    def tables_with_column(self, column_name):
+        return [column.table for column in self.columns_by_name.get(column_name, ())]
+
+    def objects_of_kind(self, kind):
+        return [obj for obj in self.objects.values() if obj.kind == kind]
+
+    # List views (planning passes, parse cache)
+
+    def table_names(self):
+        return list(self.tables)
+
+    def join_expressions(self):
+        return [join.expression for join in self.joins]
+
+    def object_names(self, kind=None):
+        """Object names, in insertion order, of every object or of one kind"""
+        if kind is None:
+            return list(self.objects)
+        return [obj.name for obj in self.objects.values() if obj.kind == kind]
+
+    def table_columns(self):
+        """{table name: [(column name, type)]} of the tables with known columns"""
+        return {table.name: [(column.name, column.type) for column in table.columns.values()]
+                for table in self.tables.values() if table.columns}
+
+    def join_records(self):
+        """Decoded join records, when every join has an id (UNW_Storage), else []"""
+        if not self.joins or any(join.id is None for join in self.joins):
+            return []
+        return [{'id': join.id, 'expression': join.expression, 'left_table': join.left_table,
+                 'right_table': join.right_table, 'operator': join.operator,
+                 'pairs': [list(pair) for pair in join.pairs]} for join in self.joins]
+
+    def context_records(self):
+        return [{'id': context.id, 'name': context.name, 'joins': list(context.joins)}
+                for context in self.contexts.values()]
+
+    def object_tables(self):
+        """{object name: [table names]} of the bound objects"""
+        return {obj.name: [table.name for table in obj.tables] for obj in self.objects.values() if obj.tables}
+
+    def table_ids(self):
+        return {table.name: table.id for table in self.tables.values() if table.id is not None}
+
+    def object_ids(self):
+        return {obj.name: obj.id for obj in self.objects.values() if obj.id is not None}
+
+    def to_lists(self):
+        """Keyword arguments of from_lists rebuilding this model"""
+        return {
+            'tables': self.table_names(),
+            'joins': self.join_expressions(),
+            'objects': self.object_names(),
+            'dimensions': self.object_names('Dimension'),
+            'measures': self.object_names('Measure'),
+            'attributes': self.object_names('Attribute'),
+            'join_records': self.join_records(),
+            'contexts': self.context_records(),
+            'table_columns': self.table_columns(),
+            'object_tables': self.object_tables(),
+            'table_ids': self.table_ids(),
+            'object_ids': self.object_ids()
+        }
+
+    def summary(self):
+        return {
+            'tables': len(self.tables),
+            'columns': sum(len(table.columns) for table in self.tables.values()),
+            'joins': len(self.joins),
+            'objects': len(self.objects),
+            'contexts': len(self.contexts)
+        }
+
+    @classmethod
+    def from_lists(cls, tables=(), joins=(), objects=(), dimensions=(), measures=(), attributes=(),
+                   table_columns=None, object_tables=None, join_records=(), contexts=(), table_ids=None,
+                   object_ids=None):
+        """Builds a model from the list-based attributes of the converters
+
+        table_ids and object_ids map names to the ids of the parsed entities.
+        """
+        model = cls()
+        table_ids = table_ids or {}
+        object_ids = object_ids or {}
+        for table_name in tables:
+            model.add_table(table_name, table_ids.get(table_name))
+        for table_name, columns in (table_columns or {}).items():
+            model.add_table(table_name, table_ids.get(table_name))
+            for column_name, column_type in columns:
+                model.add_column(table_name, column_name, column_type)
+        if join_records:
+            for record in join_records:
+                model.add_join(record['expression'], record.get('id'), record.get('left_table'),
+                               record.get('right_table'), record.get('operator'), record.get('pairs', ()))
+        else:
+            for expression in joins:
+                model.add_join(expression)
+        object_tables = object_tables or {}
+        for name in objects:
+            if name:
+                model.add_object(name, object_id=object_ids.get(name), tables=object_tables.get(name, ()))
+        # The first category listing an object wins
+        for kind, names in (('Dimension', dimensions), ('Measure', measures), ('Attribute', attributes)):
+            for name in names:
+                if name:
+                    model.add_object(name, kind, object_ids.get(name), object_tables.get(name, ()))
+        model.link_objects_to_columns()
+        for context in contexts:
+            model.add_context(context['name'], context.get('id'), context.get('joins', ()))
+        return model
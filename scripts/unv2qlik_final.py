@@ -1,10 +1,33 @@
 import re
 import struct
 import os
-import zipfile
 import shutil
 from collections import defaultdict
 
+from field_classifier import KeywordClassifier, load_keywords
+from join_analysis import join_sides, lookup_join
+from load_script import key_expression, qlik_field
+from mapped_member import extract_mapped_strings, iter_mapped_identifiers, map_file
+from qvd_load import QVD_PATH_VARIABLE, is_incremental, plan_loads, qvd_path_setting, render_incremental_load
+from script_writer import write_script
+from string_extractor import extract_strings
+from unv_reader import UniverseArchiveReader
+from unv_storage import StorageFormatError, decode_universe_storage
+
+# Mots-clés de catégorisation par défaut (remplaçables via $BO2QLIK_KEYWORDS)
+DEFAULT_KEYWORDS = {
+    'dimension': ['id', 'name', 'code', 'date', 'year', 'month', 'week', 'city', 'state', 'category', 'family', 'color', 'article', 'shop', 'promotion'],
+    'measure': ['revenue', 'sales', 'amount', 'price', 'margin', 'quantity', 'count', 'cost']
+}
+
+# Tables de lookup chargées par le script, avec leurs champs
+LOOKUP_FIELDS = {
+    'Calendar_year_lookup': ['Year', 'Qtr', 'Mth', 'Month_Name', 'Week_id', 'Week_In_Year', 'Fiscal_Period', 'Holiday_Flag'],
+    'Article_lookup': ['Article_id', 'Article_label', 'Category', 'Family_name', 'Family_code', 'Color_code', 'Color_label', 'Sale_price'],
+    'promotion_lookup': ['Promotion_id', 'Promotion_flag', 'Promotion_cost', 'Duration', 'Direct_mail_flag', 'Television_flag', 'Radio_flag', 'Print_flag']
+}
+CSV_FORMAT = "(utf8, txt, delimiter is ',', embedded labels)"
+
 class UNV2QlikConverter:
     def __init__(self):
         self.tables = []
@@ -12,10 +35,20 @@ class UNV2QlikConverter:
         self.joins = []
         self.dimensions = []
         self.measures = []
+        self.archive = None
+        self.join_records = []
+        self.contexts = []
+        self.table_columns = {}
+        self.keywords_file = None
+        self.classifier = None
+        # Fichiers extraits lus par mmap plutôt que chargés en mémoire
+        self.memory_map = True
+        # Dossier QVD du chargement incrémental des faits ($BO2QLIK_QVD_PATH), chargement complet sinon
+        self.qvd_path = os.environ.get(QVD_PATH_VARIABLE)
         
     def extract_unv_file(self):
-        """Extrait automatiquement le fichier UNV s'il n'est pas déjà extrait"""
-        print("0. Extraction automatique du fichier UNV...")
+        """Ouvre le fichier UNV pour une lecture directe dans l'archive (sans extraction sur disque)"""
+        print("0. Ouverture du fichier UNV...")
         
         # Chercher les fichiers UNV dans data/
         data_dir = "../data"
@@ -39,63 +72,91 @@ class UNV2QlikConverter:
             print("✅ Fichiers déjà extraits, pas besoin de réextraire")
             return True
         
-        # Extraire le fichier UNV
+        # Ouvrir le fichier UNV (.unv ou .unv.zip, les deux sont des archives ZIP)
         try:
-            if unv_file.endswith('.zip'):
-                # C'est un fichier ZIP
-                with zipfile.ZipFile(unv_file, 'r') as zip_ref:
-                    zip_ref.extractall(".")
-                print("✅ Fichier UNV extrait avec succès")
-            else:
-                # C'est un fichier UNV direct (qui est en fait un ZIP)
-                with zipfile.ZipFile(unv_file, 'r') as zip_ref:
-                    zip_ref.extractall(".")
-                print("✅ Fichier UNV extrait avec succès")
-            
+            self.archive = UniverseArchiveReader(unv_file)
+            print("✅ Fichier UNV ouvert avec succès (lecture directe dans l'archive)")
             return True
         except Exception as e:
-            print(f"❌ Erreur lors de l'extraction: {e}")
+            print(f"❌ Erreur lors de l'ouverture: {e}")
             return False
+    
+    def close_archive(self):
+        """Ferme l'archive UNV ouverte"""
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+    
+    def extracted_member(self, prefix, excluded_suffixes=()):
+        """Chemin d'un membre extrait dans le répertoire courant, ou None"""
+        for file in os.listdir('.'):
+            if file.startswith(prefix) and not file.endswith(tuple(excluded_suffixes)):
+                return file
+        return None
+    
+    def mapped_member(self, prefix, excluded_suffixes=()):
+        """Chemin du membre extrait à lire par mmap, None s'il faut passer par open_member"""
+        if self.archive is not None or not self.memory_map:
+            return None
+        return self.extracted_member(prefix, excluded_suffixes)
+    
+    def open_member(self, prefix, excluded_suffixes=(), text=False):
+        """Ouvre un membre de l'univers depuis l'archive, ou depuis le répertoire courant s'il a été extrait"""
+        if self.archive is not None:
+            name = self.archive.find_member(prefix, excluded_suffixes)
+            if not name:
+                return None
+            return self.archive.open_text(name) if text else self.archive.open_member(name)
+        file = self.extracted_member(prefix, excluded_suffixes)
+        if file is None:
+            return None
+        if text:
+            return open(file, 'r', encoding='utf-8')
+        return open(file, 'rb')
         
     def extract_strings(self, data):
-        """Extrait les chaînes de caractères lisibles"""
-        strings = []
-        current_string = ""
-        
-        for byte in data:
-            if 32 <= byte <= 126:  # Caractères ASCII imprimables
-                current_string += chr(byte)
-            else:
-                if len(current_string) > 3:  # Seulement les chaînes de plus de 3 caractères
-                    strings.append(current_string)
-                current_string = ""
-        
-        if len(current_string) > 3:
-            strings.append(current_string)
-        
-        return list(set(strings))  # Supprimer les doublons
+        """Extrait les chaînes de caractères lisibles (sans doublons)"""
+        return extract_strings(data, dedup=True)
+    
+    def member_strings(self, prefix, excluded_suffixes=()):
+        """Chaînes lisibles (sans doublons) d'un membre binaire, None s'il est absent"""
+        path = self.mapped_member(prefix, excluded_suffixes)
+        if path is not None:
+            # Balayage en place: la page cache sert les données, sans copie du membre
+            with map_file(path) as mapped:
+                return extract_mapped_strings(mapped, dedup=True)
+        member = self.open_member(prefix, excluded_suffixes)
+        if not member:
+            return None
+        with member as f:
+            data = f.read()
+        return self.extract_strings(data)
+    
+    def filter_fields(self, names):
+        """Filtre les champs courts et les doublons"""
+        return list(dict.fromkeys(f for f in names if len(f) > 2 and f not in ('id', 'name', 'code', 'flag')))
     
     def parse_columns_file(self):
         """Parse le fichier Columns pour extraire les noms de champs"""
         try:
             # Chercher le fichier Columns avec le bon nom
-            columns_file = None
-            for file in os.listdir('.'):
-                if file.startswith('Columns') and not file.endswith('Id;') and not file.endswith('References;'):
-                    columns_file = file
-                    break
-            
-            if not columns_file:
-                print("❌ Fichier Columns non trouvé")
-                return []
-            
-            with open(columns_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Extraire les noms de champs (séparés par des espaces/newlines)
-            fields = re.findall(r'\b[A-Za-z_][A-Za-z0-9_]*\b', content)
-            # Filtrer les champs courts et les doublons
-            fields = list(set([f for f in fields if len(f) > 2 and f not in ['id', 'name', 'code', 'flag']]))
+            path = self.mapped_member('Columns', ('Id;', 'References;'))
+            if path is not None:
+                # Filtré au fil du balayage: la liste complète des identifiants n'est jamais construite
+                with map_file(path) as mapped:
+                    fields = self.filter_fields(iter_mapped_identifiers(mapped))
+            else:
+                columns_file = self.open_member('Columns', ('Id;', 'References;'), text=True)
+                
+                if not columns_file:
+                    print("❌ Fichier Columns non trouvé")
+                    return []
+                
+                with columns_file as f:
+                    content = f.read()
+                
+                # Extraire les noms de champs (séparés par des espaces/newlines)
+                fields = self.filter_fields(re.findall(r'\b[A-Za-z_][A-Za-z0-9_]*\b', content))
             
             self.fields = fields
             return fields
@@ -107,21 +168,12 @@ class UNV2QlikConverter:
         """Parse le fichier Tables pour extraire les noms de tables"""
         try:
             # Chercher le fichier Tables avec le bon nom
-            tables_file = None
-            for file in os.listdir('.'):
-                if file.startswith('Tables') and not file.endswith('Extensions;'):
-                    tables_file = file
-                    break
+            strings = self.member_strings('Tables', ('Extensions;',))
             
-            if not tables_file:
+            if strings is None:
                 print("❌ Fichier Tables non trouvé")
                 return []
             
-            with open(tables_file, 'rb') as f:
-                data = f.read()
-            
-            strings = self.extract_strings(data)
-            
             # Chercher des noms de tables dans les chaînes
             table_keywords = ['table', 'TABLE', 'Table', 'lookup', 'fact', 'dimension', 'Agg_', 'Calendar_', 'Article_', 'Shop_', 'promotion_']
             tables = [s for s in strings if any(keyword in s for keyword in table_keywords)]
@@ -135,22 +187,28 @@ class UNV2QlikConverter:
     def parse_joins_file(self):
         """Parse le fichier Joins pour extraire les jointures"""
         try:
-            # Chercher le fichier Joins avec le bon nom
-            joins_file = None
-            for file in os.listdir('.'):
-                if file.startswith('Joins') and not file.endswith('Extensions;'):
-                    joins_file = file
-                    break
+            # Décoder les enregistrements binaires de UNW_Storage/Joins s'ils sont disponibles
+            if self.archive is not None:
+                try:
+                    storage = decode_universe_storage(self.archive)
+                except StorageFormatError as e:
+                    print(f"⚠️  UNW_Storage non décodé: {e}")
+                    storage = None
+                if storage:
+                    self.join_records = storage['joins']
+                    self.contexts = storage['contexts']
+                    self.table_columns = {table['name']: [(column['name'], column['type']) for column in table['columns']]
+                                          for table in storage['tables']}
+                    self.joins = [join['expression'] for join in self.join_records]
+                    return self.joins
+            
+            # Sinon, chercher le fichier Joins avec le bon nom
+            strings = self.member_strings('Joins', ('Extensions;',))
             
-            if not joins_file:
+            if strings is None:
                 print("❌ Fichier Joins non trouvé")
                 return []
             
-            with open(joins_file, 'rb') as f:
-                data = f.read()
-            
-            strings = self.extract_strings(data)
-            
             # Chercher des conditions de jointure
             join_keywords = ['id', 'ID', 'Id', 'promotion', 'week', 'shop', 'article']
             joins = [s for s in strings if any(keyword in s.lower() for keyword in join_keywords)]
@@ -163,11 +221,13 @@ class UNV2QlikConverter:
     
     def categorize_fields(self):
         """Catégorise les champs en dimensions et mesures"""
-        dimension_keywords = ['id', 'name', 'code', 'date', 'year', 'month', 'week', 'city', 'state', 'category', 'family', 'color', 'article', 'shop', 'promotion']
-        measure_keywords = ['revenue', 'sales', 'amount', 'price', 'margin', 'quantity', 'count', 'cost']
+        if self.classifier is None:
+            self.classifier = KeywordClassifier(load_keywords(self.keywords_file, DEFAULT_KEYWORDS))
         
-        self.dimensions = [f for f in self.fields if any(keyword in f.lower() for keyword in dimension_keywords)]
-        self.measures = [f for f in self.fields if any(keyword in f.lower() for keyword in measure_keywords)]
+        # Un champ peut être à la fois dimension et mesure
+        flags = self.classifier.classify(self.fields, ('dimension', 'measure'))
+        self.dimensions = [f for f, flag in zip(self.fields, flags['dimension']) if flag]
+        self.measures = [f for f, flag in zip(self.fields, flags['measure']) if flag]
     
     def cleanup_extracted_files(self):
         """Nettoie les fichiers extraits après traitement"""
@@ -223,99 +283,163 @@ class UNV2QlikConverter:
         
         print(f"✅ Nettoyage terminé: {removed_count} éléments supprimés")
     
-    def generate_qlik_script(self):
-        """Génère un script Qlik Cloud complet"""
+    def load_plans(self):
+        """Plan de chargement de chaque table détectée (incrémental pour les faits avec une clé)"""
+        return plan_loads(self.tables + ['Shop_facts'], self.table_columns, self.joins)
+    
+    def fact_fields(self):
+        """Champs chargés dans Shop_facts: ses colonnes si UNW_Storage les décrit, sinon tous les champs trouvés"""
+        columns = self.table_columns.get('Shop_facts')
+        return [name for name, _ in columns] if columns else self.fields
+    
+    def lookup_joins(self):
+        """(lookup, colonnes de jointure, champs à reporter, jointure trouvée) de chaque table de lookup
         
-        script = """// Script Qlik Cloud généré depuis UNV Business Objects
-// Fichier: eFashion.unv
-// Tables détectées: """ + ", ".join(self.tables) + """
-
+        Les colonnes de jointure [(champ de Shop_facts, champ du lookup)] ne sont renseignées que pour
+        une jointure many-to-one ou one-to-one, qui peut passer par ApplyMap; les champs à reporter sont
+        ceux du lookup (et de ses colonnes connues) référencés par les objets et absents de Shop_facts.
+        """
+        referenced = set(self.dimensions) | set(self.measures)
+        mapped = set(self.fact_fields())
+        result = []
+        for lookup, fields in LOOKUP_FIELDS.items():
+            joined = False
+            pairs = None
+            for expression in self.joins:
+                sides = join_sides(expression)
+                if sides is None or set(sides) != {'Shop_facts', lookup}:
+                    continue
+                joined = True
+                pairs = lookup_join(expression, 'Shop_facts', lookup, self.table_columns)
+                if pairs is not None:
+                    break
+            columns = []
+            if pairs is not None:
+                keys = {lookup_column for _, lookup_column in pairs}
+                if keys <= set(fields):
+                    known = {name for name, _ in self.table_columns.get(lookup, ())} or set(fields)
+                    columns = [f for f in fields
+                               if f in referenced and f in known and f not in keys and f not in mapped]
+                    mapped.update(columns)
+                else:
+                    # Clé absente des champs chargés: la correspondance ne peut pas être construite
+                    pairs = None
+            result.append((lookup, pairs, columns, joined))
+        return result
+    
+    def iter_join_section(self):
+        """Section des jointures: ApplyMap pour les lookups many-to-one (supprimés ensuite), LEFT JOIN sinon"""
+        yield """
 // ========================================
-// SECTION 1: CHARGEMENT DES TABLES PRINCIPALES
+// SECTION 2: JOINTURES
 // ========================================
-
-// Table principale: Shop_facts
-Shop_facts:
-LOAD
 """
-        
-        # Ajouter tous les champs trouvés
-        for i, field in enumerate(self.fields):
-            if i < len(self.fields) - 1:
-                script += f"    {field},\n"
-            else:
-                script += f"    {field}\n"
-        
-        script += """FROM [lib://DataConnection/Shop_facts.csv]
-(utf8, txt, delimiter is ',', embedded labels);
-
-// Table de lookup: Calendar_year_lookup
-Calendar_year_lookup:
-LOAD
-    Year,
-    Qtr,
-    Mth,
-    Month_Name,
-    Week_id,
-    Week_In_Year,
-    Fiscal_Period,
-    Holiday_Flag
-FROM [lib://DataConnection/Calendar_year_lookup.csv]
-(utf8, txt, delimiter is ',', embedded labels);
-
-// Table de lookup: Article_lookup
-Article_lookup:
+        if not self.table_columns:
+            # Colonnes inconnues (pas de UNW_Storage): cardinalité des jointures indéterminable
+            for lookup in LOOKUP_FIELDS:
+                yield self.left_join(lookup)
+            return
+        applied = []
+        for lookup, pairs, columns, joined in self.lookup_joins():
+            if pairs is None:
+                if joined:
+                    yield self.left_join(lookup)
+                else:
+                    yield f"\n// Pas de jointure entre Shop_facts et {lookup} dans l'univers\n"
+                continue
+            if not columns:
+                # Laissé en place, le lookup s'associerait à Shop_facts sur tous leurs champs communs
+                yield f"\n// {lookup}: aucun champ référencé par les objets, pas de jointure\nDROP TABLE {lookup};\n"
+                continue
+            lookup_key = key_expression([lookup_column for _, lookup_column in pairs])
+            fact_key = key_expression([fact_column for fact_column, _ in pairs])
+            for column in columns:
+                name = f"Map_{lookup}_{column}"
+                yield f"""
+// Correspondance {lookup}.{column} (lookup many-to-one)
+{name}:
+MAPPING LOAD
+    {lookup_key},
+    {qlik_field(column)}
+RESIDENT {lookup};
+"""
+                applied.append(f"    ApplyMap('{name}', {fact_key}, Null()) AS {qlik_field(column)}")
+            # Les champs utiles sont dans les tables de correspondance: le lookup ne reste pas dans le modèle
+            yield f"\n// {lookup} remplacé par ses correspondances\nDROP TABLE {lookup};\n"
+        if applied:
+            yield """
+// Champs de lookup reportés par ApplyMap, sans élargir Shop_facts de toutes les colonnes des lookups
+Shop_facts_lookups:
+NOCONCATENATE
 LOAD
-    Article_id,
-    Article_label,
-    Category,
-    Family_name,
-    Family_code,
-    Color_code,
-    Color_label,
-    Sale_price
-FROM [lib://DataConnection/Article_lookup.csv]
-(utf8, txt, delimiter is ',', embedded labels);
-
-// Table de lookup: promotion_lookup
-promotion_lookup:
+    *,
+""" + ",\n".join(applied) + """
+RESIDENT Shop_facts;
+DROP TABLE Shop_facts;
+RENAME TABLE Shop_facts_lookups TO Shop_facts;
+"""
+    
+    def left_join(self, lookup):
+        return f"""
+// Jointure avec {lookup}
+LEFT JOIN (Shop_facts)
 LOAD
-    Promotion_id,
-    Promotion_flag,
-    Promotion_cost,
-    Duration,
-    Direct_mail_flag,
-    Television_flag,
-    Radio_flag,
-    Print_flag
-FROM [lib://DataConnection/promotion_lookup.csv]
-(utf8, txt, delimiter is ',', embedded labels);
+    *
+FROM [lib://DataConnection/{lookup}.csv]
+{CSV_FORMAT};
+"""
+    
+    def iter_qlik_script(self):
+        """Génère le script Qlik Cloud morceau par morceau (écriture en flux)"""
+        
+        yield """// Script Qlik Cloud généré depuis UNV Business Objects
+// Fichier: eFashion.unv
+// Tables détectées: """ + ", ".join(self.tables) + """
 
 // ========================================
-// SECTION 2: JOINTURES
+// SECTION 1: CHARGEMENT DES TABLES PRINCIPALES
 // ========================================
 
-// Jointure avec Calendar_year_lookup
-LEFT JOIN (Shop_facts)
-LOAD
-    *
-FROM [lib://DataConnection/Calendar_year_lookup.csv]
-(utf8, txt, delimiter is ',', embedded labels);
-
-// Jointure avec Article_lookup
-LEFT JOIN (Shop_facts)
+"""
+        
+        plan = self.load_plans().get('Shop_facts') if self.qvd_path else None
+        if is_incremental(plan):
+            # Seules les lignes nouvelles sont lues dans la source, les autres viennent du QVD
+            yield f"{qvd_path_setting(self.qvd_path)}\n\n"
+            yield render_incremental_load('Shop_facts', plan, f"[lib://DataConnection/Shop_facts.csv]\n{CSV_FORMAT}",
+                                          self.fact_fields()) + "\n"
+        else:
+            yield """// Table principale: Shop_facts
+Shop_facts:
 LOAD
-    *
-FROM [lib://DataConnection/Article_lookup.csv]
+"""
+            
+            # Ajouter les champs de la table de faits
+            fields = self.fact_fields()
+            last = len(fields) - 1
+            for i, field in enumerate(fields):
+                if i < last:
+                    yield f"    {field},\n"
+                else:
+                    yield f"    {field}\n"
+            
+            yield """FROM [lib://DataConnection/Shop_facts.csv]
 (utf8, txt, delimiter is ',', embedded labels);
-
-// Jointure avec promotion_lookup
-LEFT JOIN (Shop_facts)
+"""
+        
+        for lookup, fields in LOOKUP_FIELDS.items():
+            yield f"""
+// Table de lookup: {lookup}
+{lookup}:
 LOAD
-    *
-FROM [lib://DataConnection/promotion_lookup.csv]
-(utf8, txt, delimiter is ',', embedded labels);
-
+""" + ",\n".join(f"    {field}" for field in fields) + f"""
+FROM [lib://DataConnection/{lookup}.csv]
+{CSV_FORMAT};
+"""
+        
+        yield from self.iter_join_section()
+        
+        yield """
 // ========================================
 // SECTION 3: COMMENTAIRES ET MÉTADONNÉES
 // ========================================
@@ -324,23 +448,23 @@ FROM [lib://DataConnection/promotion_lookup.csv]
 """
         
         for dim in self.dimensions:
-            script += f"// - {dim}\n"
+            yield f"// - {dim}\n"
         
-        script += f"""
+        yield f"""
 // Mesures détectées ({len(self.measures)}):
 """
         
         for measure in self.measures:
-            script += f"// - {measure}\n"
+            yield f"// - {measure}\n"
         
-        script += f"""
+        yield f"""
 // Jointures détectées ({len(self.joins)}):
 """
         
         for join in self.joins:
-            script += f"// - {join}\n"
+            yield f"// - {join}\n"
         
-        script += """
+        yield """
 // ========================================
 // SECTION 4: CALCULS ET EXPRESSIONS SUGGÉRÉES
 // ========================================
@@ -361,8 +485,10 @@ FROM [lib://DataConnection/promotion_lookup.csv]
 // 5. Optimiser les jointures selon vos volumes de données
 
 """
-        
-        return script
+
+    def generate_qlik_script(self):
+        """Génère un script Qlik Cloud complet"""
+        return ''.join(self.iter_qlik_script())
 
 def main():
     print("=== UNV to Qlik Cloud Converter - Version Finale ===\n")
@@ -389,10 +515,7 @@ def main():
     
     # Générer les fichiers
     print("5. Génération du script Qlik...")
-    qlik_script = converter.generate_qlik_script()
-    
-    with open('../output/qlik_script_final.qvs', 'w', encoding='utf-8') as f:
-        f.write(qlik_script)
+    write_script('../output/qlik_script_final.qvs', converter.iter_qlik_script())
     
     # Sauvegarder les listes détectées
     with open('../output/tables_detected.txt', 'w', encoding='utf-8') as f:
@@ -408,8 +531,11 @@ def main():
     print(f"Mesures: {len(converter.measures)}")
     print(f"Jointures: {len(converter.joins)}")
     
-    # Nettoyer les fichiers extraits
-    converter.cleanup_extracted_files()
+    # Fermer l'archive (rien n'a été extrait sur disque), ou nettoyer d'anciens fichiers extraits
+    if converter.archive is not None:
+        converter.close_archive()
+    else:
+        converter.cleanup_extracted_files()
     
     print("\nFichiers générés:")
     print("- qlik_script_final.qvs (Script Qlik Cloud)")
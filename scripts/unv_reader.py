@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+In-archive universe reader
+Gives direct, lazily decompressed access to the members of a .unv/.unx
+archive (Tables;, Joins;, Columns;, UNW_Storage/*, XML documents) without
+extracting anything to disk. The archive may also be an in-memory file object,
+and preload() decompresses every member up front (pipeline decompress stage).
+"""
+
+import io
+import zipfile
+
+class UniverseArchiveReader:
+    STORAGE_PREFIX = 'UNW_Storage/'
+
+    def __init__(self, path):
+        self.path = path  # File path or binary file object
+        self.zip_file = zipfile.ZipFile(path, 'r')
+        # Directory entries are kept out of the member list
+        self.members = [info.filename for info in self.zip_file.infolist()
+                        if not info.filename.endswith('/')]
+        self._member_set = set(self.members)
+        # Compressed bytes of the members opened or read (profiling)
+        self.bytes_read = 0
+        self._preloaded = None  # member name -> decompressed bytes, after preload()
+
+    @classmethod
+    def from_members(cls, members, path=None):
+        """Reader over already decompressed members {name: bytes} (no ZIP file)"""
+        reader = cls.__new__(cls)
+        reader.path = path
+        reader.zip_file = None
+        reader.members = list(members)
+        reader._member_set = set(reader.members)
+        reader.bytes_read = 0
+        reader._preloaded = dict(members)
+        return reader
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the underlying ZIP file"""
+        if self.zip_file is not None:
+            self.zip_file.close()
+            self.zip_file = None
+        self._preloaded = None
+
+    def has_member(self, name):
+        return name in self._member_set
+
+    def find_member(self, prefix, excluded_suffixes=()):
+        """Returns the first top-level member starting with prefix, or None"""
+        for name in self.members:
+            if '/' in name:
+                continue
+            if name.startswith(prefix) and not name.endswith(tuple(excluded_suffixes)):
+                return name
+        return None
+
+    def _count(self, name):
+        self.bytes_read += self.zip_file.getinfo(name).compress_size
+
+    def preload(self):
+        """Decompresses every member into memory and returns them {name: bytes}
+
+        Later reads are served from memory. zlib releases the GIL while
+        inflating, so a thread can preload one universe while another one is
+        being parsed.
+        """
+        if self._preloaded is None:
+            preloaded = {}
+            for name in self.members:
+                self._count(name)
+                preloaded[name] = self.zip_file.read(name)
+            self._preloaded = preloaded
+        return self._preloaded
+
+    def open_member(self, name):
+        """Opens a member as a binary stream decompressed on the fly"""
+        if self._preloaded is not None:
+            return io.BytesIO(self._preloaded[name])
+        self._count(name)
+        return self.zip_file.open(name, 'r')
+
+    def open_text(self, name, encoding='utf-8'):
+        """Opens a member as a text stream (universal newlines, like open())"""
+        return io.TextIOWrapper(self.open_member(name), encoding=encoding)
+
+    def read_member(self, name):
+        """Reads a whole member into memory"""
+        if self._preloaded is not None:
+            return self._preloaded[name]
+        self._count(name)
+        return self.zip_file.read(name)
+
+    def storage_members(self):
+        """Lists the UNW_Storage/* binary members"""
+        return [name for name in self.members if name.startswith(self.STORAGE_PREFIX)]
+
+    def storage_member(self, section):
+        """Returns the UNW_Storage member name for a section (e.g. 'Joins'), or None"""
+        name = f"{self.STORAGE_PREFIX}{section}/{section}"
+        return name if self.has_member(name) else None
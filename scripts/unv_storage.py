@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Binary record decoder for UNW_Storage members of .unv files
+Walks the length-prefixed records of UNW_Storage/Tables, UNW_Storage/Joins and
+UNW_Storage/Contexts with struct over memoryview slices (no string scanning)
+
+Layout (little endian, every record starts with its total length, itself included):
+    member  := u32 count, record * count
+    table   := u32 length, u32 id, 3 bytes flags, 4 * u32 layout, string name,
+               u32 description length + bytes, u32 column count, column * count
+    column  := u32 length, u32 reserved, string name, u32 type, ...
+    join    := u32 length, u32 id, 4 * u32 reserved, u32 left table id,
+               u32 right table id, string template, 14 bytes flags,
+               u32 reference count, (u32 table id, string column) * count
+    context := u32 length, u32 id, string name, u32 description length + bytes,
+               u32 join count, u32 join id * count
+    string  := u32 length, bytes
+
+A join template is either a bare operator ('=') between the two references, or
+an expression where each \x01 placeholder takes the next reference in order.
+
+The encode_* functions write the same layout (synthetic universes, tests).
+"""
+
+import struct
+
+_U32 = struct.Struct('<I')
+ENCODING = 'cp1252'
+PLACEHOLDER = '\x01'
+
+# Column type codes of the Tables storage
+COLUMN_TYPES = {1: 'Numeric', 2: 'Character', 3: 'Date', 4: 'LongText'}
+COLUMN_TYPE_CODES = {name: code for code, name in COLUMN_TYPES.items()}
+
+class StorageFormatError(ValueError):
+    """Raised when a UNW_Storage member does not follow the expected layout"""
+
+def _u32(view, offset):
+    if offset + 4 > len(view):
+        raise StorageFormatError(f"Truncated record at offset {offset}")
+    return _U32.unpack_from(view, offset)[0]
+
+def _string(view, offset):
+    """Reads a u32 length-prefixed string, returns (string, next offset)"""
+    length = _u32(view, offset)
+    start = offset + 4
+    end = start + length
+    if end > len(view):
+        raise StorageFormatError(f"String overflows the member at offset {offset}")
+    return bytes(view[start:end]).decode(ENCODING, errors='replace'), end
+
+def _records(data):
+    """Yields (view, offset, end) for each length-prefixed record of a member"""
+    view = memoryview(data)
+    if len(view) < 4:
+        return
+    count = _u32(view, 0)
+    offset = 4
+    for _ in range(count):
+        length = _u32(view, offset)
+        end = offset + length
+        if length < 8 or end > len(view):
+            raise StorageFormatError(f"Invalid record length {length} at offset {offset}")
+        yield view, offset, end
+        offset = end
+
+def decode_tables(data):
+    """Decodes UNW_Storage/Tables/Tables into [{'id', 'name', 'columns': [{'name', 'type'}]}]"""
+    tables = []
+    for view, offset, end in _records(data):
+        table_id = _u32(view, offset + 4)
+        name, position = _string(view, offset + 8 + 3 + 16)
+        description_length = _u32(view, position)
+        position += 4 + description_length
+        column_count = _u32(view, position)
+        position += 4
+        columns = []
+        for _ in range(column_count):
+            column_length = _u32(view, position)
+            if column_length < 12 or position + column_length > end:
+                raise StorageFormatError(f"Invalid column record at offset {position}")
+            column_name, type_position = _string(view, position + 8)
+            type_code = _u32(view, type_position)
+            columns.append({'name': column_name, 'type': COLUMN_TYPES.get(type_code, str(type_code))})
+            position += column_length
+        tables.append({'id': table_id, 'name': name, 'columns': columns})
+    return tables
+
+def decode_joins(data, table_names=None):
+    """Decodes UNW_Storage/Joins/Joins into typed join records
+
+    Each record is a dict with 'id', 'left_table', 'right_table', 'operator',
+    'expression', 'pairs' ([(left column, right column)]) and 'flags'.
+    Columns are 'Table.Column' when table_names ({id: name}) resolves the
+    table id, '#id.Column' otherwise.
+    """
+    table_names = table_names or {}
+
+    def table_name(table_id):
+        return table_names.get(table_id, f"#{table_id}")
+
+    joins = []
+    for view, offset, end in _records(data):
+        join_id = _u32(view, offset + 4)
+        left_table = _u32(view, offset + 24)
+        right_table = _u32(view, offset + 28)
+        template, position = _string(view, offset + 32)
+        flags = _u32(view, position)
+        position += 14
+        reference_count = _u32(view, position)
+        position += 4
+        references = []
+        for _ in range(reference_count):
+            table_id = _u32(view, position)
+            column, position = _string(view, position + 4)
+            references.append(f"{table_name(table_id)}.{column}")
+        if position > end:
+            raise StorageFormatError(f"Join {join_id} overflows its record")
+        if PLACEHOLDER in template:
+            parts = template.split(PLACEHOLDER)
+            expression = parts[0]
+            for reference, part in zip(references, parts[1:]):
+                expression += reference + part
+            tokens = template.replace(PLACEHOLDER, ' ').split()
+            operator = tokens[0] if tokens else '='
+        else:
+            operator = template or '='
+            expression = f"{references[0]}{operator}{references[1]}" if len(references) == 2 else operator
+        joins.append({
+            'id': join_id,
+            'left_table': table_name(left_table),
+            'right_table': table_name(right_table),
+            'operator': operator,
+            'expression': expression,
+            'pairs': [(references[i], references[i + 1]) for i in range(0, len(references) - 1, 2)],
+            'flags': flags
+        })
+    return joins
+
+def decode_contexts(data):
+    """Decodes UNW_Storage/Contexts/Contexts into [{'id', 'name', 'joins': [join ids]}]"""
+    contexts = []
+    for view, offset, end in _records(data):
+        context_id = _u32(view, offset + 4)
+        name, position = _string(view, offset + 8)
+        position += 4 + _u32(view, position)
+        join_count = _u32(view, position)
+        position += 4
+        if position + 4 * join_count > end:
+            raise StorageFormatError(f"Context {context_id} overflows its record")
+        join_ids = list(struct.unpack_from(f'<{join_count}I', view, position))
+        contexts.append({'id': context_id, 'name': name, 'joins': join_ids})
+    return contexts
+
+def decode_universe_storage(archive):
+    """Decodes tables, joins and contexts from an open UniverseArchiveReader
+
+    Returns None when the archive has no UNW_Storage/Joins member.
+    """
+    joins_member = archive.storage_member('Joins')
+    if not joins_member:
+        return None
+    tables = []
+    tables_member = archive.storage_member('Tables')
+    if tables_member:
+        tables = decode_tables(archive.read_member(tables_member))
+    table_names = {table['id']: table['name'] for table in tables}
+    joins = decode_joins(archive.read_member(joins_member), table_names)
+    contexts = []
+    contexts_member = archive.storage_member('Contexts')
+    if contexts_member:
+        contexts = decode_contexts(archive.read_member(contexts_member))
+    return {'tables': tables, 'joins': joins, 'contexts': contexts}
+
+def encode_string(value):
+    data = value.encode(ENCODING)
+    return _U32.pack(len(data)) + data
+
+def _record(body):
+    return _U32.pack(len(body) + 4) + body
+
+def encode_count(count):
+    """Header of a member holding count records"""
+    return _U32.pack(count)
+
+def encode_table(table_id, name, columns, description=''):
+    """Encodes a table record; columns are (name, type name) tuples"""
+    body = [_U32.pack(table_id), b'\x00' * 3, struct.pack('<4I', 0, 0, 0, 0), encode_string(name),
+            encode_string(description), _U32.pack(len(columns))]
+    for column_name, column_type in columns:
+        body.append(_record(_U32.pack(0) + encode_string(column_name) + _U32.pack(COLUMN_TYPE_CODES.get(column_type, 2))))
+    return _record(b''.join(body))
+
+def encode_join(join_id, left_table, right_table, template, references, flags=0x88):
+    """Encodes a join record; references are (table id, column) tuples filling the template"""
+    body = [struct.pack('<I4I2I', join_id, 0, 0, 0, 0, left_table, right_table), encode_string(template),
+            _U32.pack(flags), b'\x00' * 10, _U32.pack(len(references))]
+    for table_id, column in references:
+        body.append(_U32.pack(table_id) + encode_string(column))
+    return _record(b''.join(body))
+
+def encode_context(context_id, name, join_ids, description=''):
+    """Encodes a context record"""
+    return _record(_U32.pack(context_id) + encode_string(name) + encode_string(description)
+                   + _U32.pack(len(join_ids)) + struct.pack(f'<{len(join_ids)}I', *join_ids))
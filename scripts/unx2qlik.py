@@ -5,77 +5,50 @@ Extracts tables, objects, dimensions, measures, joins and prints a summary
 """
 
 import os
-import zipfile
-import tempfile
-import shutil
-import xml.etree.ElementTree as ET
+
+from unx_parser import BUSINESSLAYER_MEMBER, DATAFOUNDATION_MEMBER, UnxUniverse
 
 class UNX2QlikParser:
+    """Lists are properties of a lazy UnxUniverse: reading only the tables parses only datafoundation.xml"""
+
     def __init__(self, unx_path):
         self.unx_path = unx_path
-        self.extract_dir = tempfile.mkdtemp(prefix="unx_extract_")
-        self.tables = []
-        self.joins = []
-        self.objects = []
-        self.dimensions = []
-        self.measures = []
+        self.universe = UnxUniverse(unx_path)
+
+    @property
+    def tables(self):
+        return self.universe.tables
+
+    @property
+    def joins(self):
+        return self.universe.joins
+
+    @property
+    def objects(self):
+        return self.universe.objects
+
+    @property
+    def dimensions(self):
+        return self.universe.dimensions
+
+    @property
+    def measures(self):
+        return self.universe.measures
 
     def extract_unx(self):
-        print(f"Extracting UNX file: {self.unx_path}")
-        with zipfile.ZipFile(self.unx_path, 'r') as zip_ref:
-            zip_ref.extractall(self.extract_dir)
-        print(f"✅ Extracted to: {self.extract_dir}")
+        """Opens the UNX file; members are decompressed when first needed, nothing is extracted to disk"""
+        print(f"Opening UNX file: {self.unx_path}")
+        print(f"✅ {len(self.universe.archive.members)} members, read on demand")
 
     def parse_datafoundation(self):
         """Parse datafoundation.xml for tables and joins"""
-        df_path = os.path.join(self.extract_dir, 'datafoundation', 'datafoundation.xml')
-        if not os.path.exists(df_path):
-            print(f"❌ File not found: {df_path}")
-            return
-        tree = ET.parse(df_path)
-        root = tree.getroot()
-        ns = {'bip': 'http://www.sap.com/rws/bip'}
-        # Tables
-        for table in root.findall('.//bip:table', ns):
-            name = table.get('name') or table.get('id')
-            if name:
-                self.tables.append(name)
-        # Joins
-        for join in root.findall('.//bip:join', ns):
-            expr = join.get('expression') or join.get('id')
-            if expr:
-                self.joins.append(expr)
-        # If no namespace, try without
-        if not self.tables:
-            for table in root.findall('.//table'):
-                name = table.get('name') or table.get('id')
-                if name:
-                    self.tables.append(name)
-        if not self.joins:
-            for join in root.findall('.//join'):
-                expr = join.get('expression') or join.get('id')
-                if expr:
-                    self.joins.append(expr)
+        if self.universe.datafoundation is None:
+            print(f"❌ File not found: {DATAFOUNDATION_MEMBER}")
 
     def parse_businesslayer(self):
         """Parse businesslayer.xml for objects, dimensions, measures"""
-        bl_path = os.path.join(self.extract_dir, 'businesslayer', 'businesslayer.xml')
-        if not os.path.exists(bl_path):
-            print(f"❌ File not found: {bl_path}")
-            return
-        tree = ET.parse(bl_path)
-        root = tree.getroot()
-        # Objects (dimensions, measures, attributes)
-        for obj in root.findall('.//businessObject'):
-            name = obj.get('name') or obj.get('id')
-            if name:
-                self.objects.append(name)
-            # Simple categorization
-            typ = obj.get('type')
-            if typ == 'Dimension':
-                self.dimensions.append(name)
-            elif typ == 'Measure':
-                self.measures.append(name)
+        if self.universe.businesslayer is None:
+            print(f"❌ File not found: {BUSINESSLAYER_MEMBER}")
 
     def summary(self):
         print("\n=== UNX SUMMARY ===")
@@ -91,7 +64,7 @@ class UNX2QlikParser:
         print(self.measures[:10], '...')
 
     def cleanup(self):
-        shutil.rmtree(self.extract_dir, ignore_errors=True)
+        self.universe.close()
 
 if __name__ == '__main__':
     import sys
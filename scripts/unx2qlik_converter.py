@@ -6,22 +6,23 @@ Extracts data from a .unx file and generates a Qlik Cloud script
 
 import os
 import sys
-import zipfile
-import tempfile
-import shutil
-import xml.etree.ElementTree as ET
 from datetime import datetime
 
+from association_analysis import format_associations
+from fact_model import context_joins, format_fact_model, plan_star_schema, render_fact_load, render_link_table
+from load_script import field_expressions, render_table_load
+from qvd_load import QVD_PATH_VARIABLE, is_incremental, plan_loads, qvd_path_setting, render_incremental_load
+from script_writer import write_script
+from universe_model import UniverseModel, position_ids
+from unx_parser import BUSINESSLAYER_MEMBER, DATAFOUNDATION_MEMBER, UnxUniverse
+
 class UNX2QlikConverter:
     def __init__(self, unx_path=None):
         self.unx_path = unx_path
-        self.extract_dir = None
-        self.tables = []
-        self.joins = []
-        self.objects = []
-        self.dimensions = []
-        self.measures = []
-        self.attributes = []
+        self.universe = None  # Lazy UnxUniverse: members are decompressed when parsed, never extracted
+        self.model = None  # UniverseModel built once the datafoundation and business layer are parsed
+        # QVD folder of the incremental fact loads ($BO2QLIK_QVD_PATH), full loads when unset
+        self.qvd_path = os.environ.get(QVD_PATH_VARIABLE)
         
     def find_unx_file(self):
         """Automatically finds a .unx file in the data/ folder"""
@@ -40,101 +41,86 @@ class UNX2QlikConverter:
         print(f"📁 UNX file found: {self.unx_path}")
         return True
     def extract_unx(self):
-        """Extracts the .unx file"""
+        """Opens the .unx file (its members are read on demand, nothing is extracted to disk)"""
         if not self.unx_path:
             if not self.find_unx_file():
                 return False
-        print(f"Extracting UNX file: {self.unx_path}")
-        self.extract_dir = tempfile.mkdtemp(prefix="unx_extract_")
-        with zipfile.ZipFile(self.unx_path, 'r') as zip_ref:
-            zip_ref.extractall(self.extract_dir)
-        print(f"✅ UNX file extracted successfully")
+        print(f"Opening UNX file: {self.unx_path}")
+        self.universe = UnxUniverse(self.unx_path)
+        print(f"✅ UNX file opened ({len(self.universe.archive.members)} members)")
         return True
     def parse_datafoundation(self):
         """Parse datafoundation.xml for tables and joins"""
         print("1. Parsing datafoundation.xml...")
-        df_path = os.path.join(self.extract_dir, 'datafoundation', 'datafoundation.xml')
-        if not os.path.exists(df_path):
-            print(f"❌ File not found: {df_path}")
+        datafoundation = self.universe.datafoundation
+        if datafoundation is None:
+            print(f"❌ File not found: {DATAFOUNDATION_MEMBER}")
             return False
-        tree = ET.parse(df_path)
-        root = tree.getroot()
-        ns = {'bip': 'http://www.sap.com/rws/bip'}
-        for table in root.findall('.//bip:table', ns):
-            name = table.get('name') or table.get('id')
-            if name:
-                self.tables.append(name)
-                print(f"   📋 Table found: {name}")
-        if not self.tables:
-            for table in root.findall('.//table'):
-                name = table.get('name') or table.get('id')
-                if name:
-                    self.tables.append(name)
-                    print(f"   📋 Table found (no namespace): {name}")
-        for join in root.findall('.//bip:join', ns):
-            expr = join.get('expression') or join.get('id')
-            if expr:
-                self.joins.append(expr)
-                print(f"   🔗 Join found: {expr}")
-        if not self.joins:
-            for join in root.findall('.//join'):
-                expr = join.get('expression') or join.get('id')
-                if expr:
-                    self.joins.append(expr)
-                    print(f"   🔗 Join found (no namespace): {expr}")
-        print(f"✅ {len(self.tables)} tables and {len(self.joins)} joins found")
+        suffix = "" if datafoundation['namespaced']['tables'] else " (no namespace)"
+        for name in datafoundation['tables']:
+            print(f"   📋 Table found{suffix}: {name}")
+        suffix = "" if datafoundation['namespaced']['joins'] else " (no namespace)"
+        for expr in datafoundation['joins']:
+            print(f"   🔗 Join found{suffix}: {expr}")
+        print(f"✅ {len(datafoundation['tables'])} tables and {len(datafoundation['joins'])} joins found")
         return True
     def parse_businesslayer(self):
         """Parse businesslayer.xml for objects, dimensions, measures"""
         print("2. Parsing businesslayer.xml...")
-        bl_path = os.path.join(self.extract_dir, 'businesslayer', 'businesslayer.xml')
-        if not os.path.exists(bl_path):
-            print(f"❌ File not found: {bl_path}")
+        businesslayer = self.universe.businesslayer
+        if businesslayer is None:
+            print(f"❌ File not found: {BUSINESSLAYER_MEMBER}")
             return False
-        tree = ET.parse(bl_path)
-        root = tree.getroot()
-        ns = {'bip': 'http://www.sap.com/rws/bip'}
-        for obj in root.findall('.//bip:businessObject', ns):
-            name = obj.get('name') or obj.get('id')
+        suffix = "" if businesslayer['namespaced'] else " (no namespace)"
+        for name, typ in businesslayer['objects']:
             if name:
-                self.objects.append(name)
-                print(f"   📊 Object found: {name}")
-            typ = obj.get('type')
+                print(f"   📊 Object found{suffix}: {name}")
             if typ == 'Dimension':
-                self.dimensions.append(name)
-                print(f"   📏 Dimension found: {name}")
+                print(f"   📏 Dimension found{suffix}: {name}")
             elif typ == 'Measure':
-                self.measures.append(name)
-                print(f"   📈 Measure found: {name}")
+                print(f"   📈 Measure found{suffix}: {name}")
             elif typ == 'Attribute':
-                self.attributes.append(name)
-                print(f"   🏷️  Attribute found: {name}")
-        if not self.objects:
-            for obj in root.findall('.//businessObject'):
-                name = obj.get('name') or obj.get('id')
-                if name:
-                    self.objects.append(name)
-                    print(f"   📊 Object found (no namespace): {name}")
-                typ = obj.get('type')
-                if typ == 'Dimension':
-                    self.dimensions.append(name)
-                    print(f"   📏 Dimension found (no namespace): {name}")
-                elif typ == 'Measure':
-                    self.measures.append(name)
-                    print(f"   📈 Measure found (no namespace): {name}")
-                elif typ == 'Attribute':
-                    self.attributes.append(name)
-                    print(f"   🏷️  Attribute found (no namespace): {name}")
-        print(f"✅ {len(self.objects)} objects found ({len(self.dimensions)} dimensions, {len(self.measures)} measures, {len(self.attributes)} attributes)")
+                print(f"   🏷️  Attribute found{suffix}: {name}")
+        universe = self.universe
+        print(f"✅ {len(universe.objects)} objects found ({len(universe.dimensions)} dimensions, {len(universe.measures)} measures, {len(universe.attributes)} attributes)")
         return True
-    def generate_qlik_script(self):
-        """Generates the Qlik Cloud script"""
+    def build_model(self):
+        """Builds the indexed UniverseModel of the parsed datafoundation and business layer"""
+        universe = self.universe
+        self.model = UniverseModel.from_lists(
+            tables=universe.tables, table_ids=position_ids(universe.tables), joins=universe.joins,
+            objects=universe.objects, object_ids=position_ids(universe.objects),
+            dimensions=universe.dimensions, measures=universe.measures, attributes=universe.attributes,
+            table_columns=universe.table_columns, object_tables=universe.object_tables,
+            contexts=universe.contexts)
+        return self.model
+    def iter_qlik_script(self):
+        """Starts generating the Qlik Cloud script and returns its text chunks as an iterator"""
         print("3. Generating Qlik Cloud script...")
-        script = f"""// Qlik Cloud script generated from UNX Business Objects
+        if self.model is None:
+            self.build_model()
+        return self._script_chunks()
+    def table_columns(self):
+        """{table: [(column name, type)]} of the datafoundation"""
+        return self.model.table_columns()
+    def load_plans(self):
+        """{table: load plan} of the QVD incremental mode"""
+        return plan_loads(self.model.table_names(), self.table_columns(), self.model.join_expressions())
+    def star_schema(self):
+        """(fact model, association plan) of the tables: facts of the contexts linked or concatenated,
+        renamed fields and composite keys for the join fields only"""
+        model = self.model
+        joins = model.join_expressions()
+        return plan_star_schema(model.table_names(), self.table_columns(), joins,
+                                context_joins(model.context_records(), joins, model.join_records()))
+    def _script_chunks(self):
+        model = self.model
+        qvd_setting = f"{qvd_path_setting(self.qvd_path)}\n" if self.qvd_path else ""
+        yield f"""// Qlik Cloud script generated from UNX Business Objects
 // Source file: {os.path.basename(self.unx_path)}
 // Generation date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-// Extracted tables: {len(self.tables)}
-// Extracted objects: {len(self.objects)}
+// Extracted tables: {len(model.tables)}
+// Extracted objects: {len(model.objects)}
 
 // ========================================
 // CONNECTION CONFIGURATION
@@ -144,7 +130,7 @@ LET vServer = 'your_db_server';
 LET vDatabase = 'your_database';
 LET vUsername = 'your_user';
 LET vPassword = 'your_password';
-
+{qvd_setting}
 // ========================================
 // DATABASE CONNECTION
 // ========================================
@@ -155,43 +141,84 @@ LET vPassword = 'your_password';
 // TABLE LOADING
 // ========================================
 """
-        for table in self.tables:
-            script += f"""
+        plans = self.load_plans() if self.qvd_path else {}
+        table_columns = self.table_columns()
+        fact_model, associations = self.star_schema()
+        concatenated = fact_model['facts'] if fact_model and fact_model['strategy'] == 'concatenate' else ()
+        for table in model.table_names():
+            plan = plans.get(table)
+            # Explicit fields when the datafoundation lists the columns of the table
+            fields = [name for name, _ in table_columns.get(table, ())]
+            if table in concatenated:
+                yield "\n" + render_fact_load(fact_model, table, fields, associations)
+                continue
+            aliases, keys = associations['aliases'].get(table), associations['keys'].get(table, ())
+            if is_incremental(plan):
+                if fields:
+                    yield "\n" + render_incremental_load(table, plan, table, fields, sql=True,
+                                                         aliases=aliases, keys=keys)
+                else:
+                    yield "\n" + render_incremental_load(table, plan, f"[{table}]")
+                continue
+            if fields:
+                expressions = field_expressions(fields, aliases, keys) if aliases or keys else None
+                yield "\n" + render_table_load(table, fields, expressions)
+                continue
+            yield f"""
 // Loading table {table}
 {table}:
 LOAD *
 FROM [{table}]
 ;"""
-        if self.joins:
-            script += f"""
+        if fact_model and fact_model['strategy'] == 'link':
+            yield f"""
+
+// ========================================
+// LINK TABLE
+// ========================================
+"""
+            yield render_link_table(fact_model, associations) + "\n"
+        joins = model.join_expressions()
+        if joins:
+            yield f"""
 
 // ========================================
 // JOINS
 // ========================================
 """
-            for join in self.joins:
-                script += f"// Join: {join}\n"
-        script += f"""
+            for join in joins:
+                yield f"// Join: {join}\n"
+        report = (format_fact_model(fact_model) if fact_model else []) + format_associations(associations)
+        if report:
+            yield f"""
+
+// ========================================
+// ASSOCIATIONS
+// ========================================
+"""
+            for line in report:
+                yield f"{line}\n"
+        yield f"""
 
 // ========================================
 // DIMENSIONS AND MEASURES
 // ========================================
-// Available dimensions: {', '.join(self.dimensions)}
-// Available measures: {', '.join(self.measures)}
-// Available attributes: {', '.join(self.attributes)}
+// Available dimensions: {', '.join(model.object_names('Dimension'))}
+// Available measures: {', '.join(model.object_names('Measure'))}
+// Available attributes: {', '.join(model.object_names('Attribute'))}
 
 // ========================================
 // CALCULATION EXAMPLES
 // ========================================
 """
-        for measure in self.measures:
-            script += f"""
+        for measure in model.object_names('Measure'):
+            yield f"""
 // Calculation for {measure}
 // Sum({measure}) as Total_{measure}
 // Avg({measure}) as Avg_{measure}
 // Count({measure}) as Count_{measure}
 """
-        script += f"""
+        yield f"""
 
 // ========================================
 // USAGE NOTES
@@ -206,24 +233,25 @@ FROM [{table}]
 // END OF SCRIPT
 // ========================================
 """
-        return script
+    def generate_qlik_script(self):
+        """Generates the Qlik Cloud script"""
+        return ''.join(self.iter_qlik_script())
     def save_script(self, script):
-        """Saves the generated script"""
+        """Saves the generated script (a string or an iterator of text chunks)"""
         print("4. Saving script...")
         output_dir = "../output"
         os.makedirs(output_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"qlik_script_unx_{timestamp}.qvs"
         filepath = os.path.join(output_dir, filename)
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(script)
+        write_script(filepath, script)
         print(f"✅ Script saved: {filepath}")
         return filepath
     def cleanup(self):
-        """Cleans up temporary files"""
-        if self.extract_dir and os.path.exists(self.extract_dir):
-            shutil.rmtree(self.extract_dir, ignore_errors=True)
-            print("✅ Temporary files cleaned up")
+        """Closes the UNX file"""
+        if self.universe is not None:
+            self.universe.close()
+            self.universe = None
     def run_conversion(self):
         """Runs the full conversion process"""
         print("=== UNX TO QLIK CLOUD CONVERTER ===\n")
@@ -234,15 +262,16 @@ FROM [{table}]
                 return False
             if not self.parse_businesslayer():
                 return False
-            script = self.generate_qlik_script()
-            output_file = self.save_script(script)
+            model = self.build_model()
+            # The script is streamed to disk as it is generated
+            output_file = self.save_script(self.iter_qlik_script())
             print("\n=== CONVERSION SUMMARY ===")
             print(f"📁 UNX file processed: {os.path.basename(self.unx_path)}")
-            print(f"📊 Tables extracted: {len(self.tables)}")
-            print(f"🔗 Joins extracted: {len(self.joins)}")
-            print(f"📏 Dimensions found: {len(self.dimensions)}")
-            print(f"📈 Measures found: {len(self.measures)}")
-            print(f"🏷️  Attributes found: {len(self.attributes)}")
+            print(f"📊 Tables extracted: {len(model.tables)}")
+            print(f"🔗 Joins extracted: {len(model.joins)}")
+            print(f"📏 Dimensions found: {len(model.object_names('Dimension'))}")
+            print(f"📈 Measures found: {len(model.object_names('Measure'))}")
+            print(f"🏷️  Attributes found: {len(model.object_names('Attribute'))}")
             print(f"📄 Script generated: {os.path.basename(output_file)}")
             print("\n🎉 Conversion completed successfully!")
             return True
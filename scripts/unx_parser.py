@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Incremental parser for .unx XML documents
+Walks datafoundation.xml and businesslayer.xml once with ET.iterparse,
+matching namespaced (bip) and non-namespaced tags in the same pass and
+clearing elements as soon as they are consumed; UnxUniverse parses each
+document only when one of its properties is first used
+"""
+
+import sys
+import xml.etree.ElementTree as ET
+from functools import cached_property
+
+from unv_reader import UniverseArchiveReader
+
+BIP_NAMESPACE = 'http://www.sap.com/rws/bip'
+DATAFOUNDATION_MEMBER = 'datafoundation/datafoundation.xml'
+BUSINESSLAYER_MEMBER = 'businesslayer/businesslayer.xml'
+
+def split_tag(tag):
+    """Splits '{namespace}local' into (namespace, local); namespace is None if absent"""
+    if tag[:1] == '{':
+        namespace, _, local = tag[1:].partition('}')
+        return namespace, local
+    return None, tag
+
+def iterparse_elements(source, tags, namespace=BIP_NAMESPACE):
+    """Yields (tag, namespaced, element) for every element whose local name is in tags
+
+    Only elements in the given namespace (namespaced=True) or without any
+    namespace (namespaced=False) are reported, like findall('.//bip:tag') and
+    findall('.//tag'). Each element is complete (with its children) when it is
+    yielded, then cleared and detached from its parent so memory stays flat
+    whatever the document size: callers must copy what they need.
+    """
+    tags = set(tags)
+    # tag -> (local, namespaced) for matched tags, None otherwise
+    classified = {}
+    stack = []
+    # Matched elements keep their subtree until they end
+    open_matches = 0
+    for event, elem in ET.iterparse(source, events=('start', 'end')):
+        if event == 'start':
+            tag = elem.tag
+            if tag not in classified:
+                elem_namespace, local = split_tag(tag)
+                if local in tags and elem_namespace in (namespace, None):
+                    classified[tag] = (local, elem_namespace is not None)
+                else:
+                    classified[tag] = None
+            match = classified[tag]
+            stack.append((elem, match))
+            if match:
+                open_matches += 1
+            continue
+        _, match = stack.pop()
+        if match:
+            open_matches -= 1
+            yield match[0], match[1], elem
+        if open_matches == 0:
+            elem.clear()
+            if stack:
+                # Children are detached as soon as they end, so this is the only one
+                stack[-1][0].remove(elem)
+
+def _pick(found, key):
+    """Prefers namespaced matches and falls back to non-namespaced ones"""
+    if found[(key, True)]:
+        return found[(key, True)], True
+    return found[(key, False)], False
+
+def _children(elem, local_name):
+    """Descendants of elem with the given local name, whatever their namespace"""
+    return [child for child in elem.iter() if child is not elem and split_tag(child.tag)[1] == local_name]
+
+def parse_datafoundation(source):
+    """Parses a datafoundation.xml path or stream in a single pass
+
+    Returns a dict with 'tables' and 'joins' name lists, 'columns' mapping
+    each table to its (column name, type) list, 'contexts' as {'id': None,
+    'name', 'joins'} dicts whose joins are the 1-based positions of their
+    <joinRef> joins in 'joins' (UNX joins have no numeric id), and a
+    'namespaced' dict telling for each list whether it came from bip: tags.
+    """
+    found = {(key, namespaced): [] for key in ('table', 'join', 'context') for namespaced in (True, False)}
+    columns = {True: {}, False: {}}
+    join_ids = {True: [], False: []}
+    for tag, namespaced, elem in iterparse_elements(source, ('table', 'join', 'context')):
+        if tag == 'table':
+            value = elem.get('name') or elem.get('id')
+            if value:
+                table_columns = columns[namespaced].setdefault(value, [])
+                for column in _children(elem, 'column'):
+                    column_name = column.get('name') or column.get('id')
+                    if column_name:
+                        table_columns.append((column_name, column.get('type')))
+        elif tag == 'join':
+            # The expression is an attribute or an <expression> child of the join
+            expressions = [child.text.strip() for child in _children(elem, 'expression') if child.text]
+            value = elem.get('expression') or (expressions[0] if expressions else None) or elem.get('id')
+            if value:
+                join_ids[namespaced].append(elem.get('id'))
+        else:
+            name = elem.get('name') or elem.get('id')
+            value = (name, [ref.get('id') for ref in _children(elem, 'joinRef')]) if name else None
+        if value:
+            found[(tag, namespaced)].append(value)
+    tables, tables_namespaced = _pick(found, 'table')
+    joins, joins_namespaced = _pick(found, 'join')
+    positions = {join_id: position for position, join_id in enumerate(join_ids[joins_namespaced], 1) if join_id}
+    contexts, _ = _pick(found, 'context')
+    return {
+        'tables': tables,
+        'joins': joins,
+        'columns': columns[tables_namespaced],
+        'contexts': [{'id': None, 'name': name, 'joins': [positions[ref] for ref in refs if ref in positions]}
+                     for name, refs in contexts],
+        'namespaced': {'tables': tables_namespaced, 'joins': joins_namespaced}
+    }
+
+def parse_businesslayer(source):
+    """Parses a businesslayer.xml path or stream in a single pass
+
+    Returns a dict with 'objects' as (name, type) tuples in document order,
+    'bindings' mapping object names to the tables they are built on, and
+    'namespaced' telling whether they came from bip: tags.
+    """
+    found = {('businessObject', True): [], ('businessObject', False): []}
+    bindings = {True: {}, False: {}}
+    for tag, namespaced, elem in iterparse_elements(source, ('businessObject',)):
+        name = elem.get('name') or elem.get('id')
+        found[(tag, namespaced)].append((name, elem.get('type')))
+        tables = [table.get('name') or table.get('id') for table in _children(elem, 'table')]
+        if name and tables:
+            bindings[namespaced].setdefault(name, []).extend(table for table in tables if table)
+    objects, namespaced = _pick(found, 'businessObject')
+    return {'objects': objects, 'bindings': bindings[namespaced], 'namespaced': namespaced}
+
+class UnxUniverse:
+    """Lazy, memoized view of a .unx file
+
+    Opening it only reads the ZIP central directory. tables, joins and
+    table_columns decompress and parse datafoundation.xml on first use,
+    business_objects and the lists derived from it businesslayer.xml; a
+    document is parsed at most once, and a missing one gives empty results.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def archive(self):
+        if self._archive is None:
+            self._archive = UniverseArchiveReader(self.path)
+        return self._archive
+
+    def close(self):
+        if self._archive is not None:
+            self._archive.close()
+            self._archive = None
+
+    def has_member(self, name):
+        return self.archive.has_member(name)
+
+    @property
+    def bytes_read(self):
+        """Compressed bytes of the members parsed so far"""
+        return self._archive.bytes_read if self._archive is not None else 0
+
+    def _parse(self, member, parser):
+        if not self.archive.has_member(member):
+            return None
+        with self.archive.open_member(member) as f:
+            return parser(f)
+
+    @cached_property
+    def datafoundation(self):
+        """parse_datafoundation result, None if the member is missing"""
+        return self._parse(DATAFOUNDATION_MEMBER, parse_datafoundation)
+
+    @cached_property
+    def businesslayer(self):
+        """parse_businesslayer result, None if the member is missing"""
+        return self._parse(BUSINESSLAYER_MEMBER, parse_businesslayer)
+
+    @property
+    def tables(self):
+        return self.datafoundation['tables'] if self.datafoundation else []
+
+    @property
+    def joins(self):
+        return self.datafoundation['joins'] if self.datafoundation else []
+
+    @property
+    def table_columns(self):
+        return self.datafoundation['columns'] if self.datafoundation else {}
+
+    @property
+    def contexts(self):
+        return self.datafoundation['contexts'] if self.datafoundation else []
+
+    @property
+    def business_objects(self):
+        """(name, type) of every business object, in document order"""
+        return self.businesslayer['objects'] if self.businesslayer else []
+
+    @property
+    def object_tables(self):
+        return self.businesslayer['bindings'] if self.businesslayer else {}
+
+    @cached_property
+    def objects(self):
+        return [name for name, _ in self.business_objects if name]
+
+    def objects_of_type(self, object_type):
+        return [name for name, typ in self.business_objects if typ == object_type]
+
+    @cached_property
+    def dimensions(self):
+        return self.objects_of_type('Dimension')
+
+    @cached_property
+    def measures(self):
+        return self.objects_of_type('Measure')
+
+    @cached_property
+    def attributes(self):
+        return self.objects_of_type('Attribute')
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: python3 unx_parser.py <file.unx>")
+        return False
+    with UnxUniverse(sys.argv[1]) as universe:
+        if universe.datafoundation:
+            print(f"📋 Tables: {len(universe.tables)}")
+            print(f"🔗 Joins: {len(universe.joins)}")
+        if universe.businesslayer:
+            print(f"📊 Objects: {len(universe.business_objects)}")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)